@@ -57,8 +57,8 @@ class DatabaseConnection:
         """Initialize database tables if they don't exist."""
         create_table_query = """
         CREATE TABLE IF NOT EXISTS environmental_scores (
-            id SERIAL PRIMARY KEY,
-            timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            id SERIAL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
             region VARCHAR(2) NOT NULL,
             risk_score DECIMAL(10,6) NOT NULL,
             flare_risk DECIMAL(10,6),
@@ -68,8 +68,21 @@ class DatabaseConnection:
             data_status VARCHAR(20) NOT NULL,
             confidence_score DECIMAL(10,6),
             model_version VARCHAR(10),
+            CONSTRAINT environmental_scores_pkey PRIMARY KEY (id, timestamp),
             CONSTRAINT region_check CHECK (region ~ '^[1-3][A-D]$')
-        );
+        ) PARTITION BY RANGE (timestamp);
+
+        -- Monthly partitions are created by the ingestion Lambda (prism/src/partitions.py);
+        -- tables created before partitioning are converted by its migrations
+        DO $$
+        BEGIN
+            IF (SELECT relkind FROM pg_class WHERE oid = 'environmental_scores'::regclass) = 'p' THEN
+                CREATE TABLE IF NOT EXISTS environmental_scores_default PARTITION OF environmental_scores DEFAULT;
+            END IF;
+        END $$;
+
+        CREATE INDEX IF NOT EXISTS environmental_scores_region_timestamp_idx ON environmental_scores (region, timestamp);
+        CREATE INDEX IF NOT EXISTS environmental_scores_timestamp_idx ON environmental_scores (timestamp);
         """
         try:
             async with pool.acquire() as conn:
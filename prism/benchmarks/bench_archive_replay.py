@@ -0,0 +1,95 @@
+"""
+Archive and replay benchmark: the selected sources are ingested from the
+stub server once with the payload archive on ('fetch'), then the archived
+run is fed back through replay_run ('replay'), as `lambda_function.py
+--replay` does.
+
+The stub answers every request after --latency-ms, as a distant API would.
+Writes go to a recording pool, or to PostgreSQL with --postgres (DB_*
+variables). Reported per phase: wall time, upstream requests, and for the
+fetch phase the payloads archived and their compressed size.
+
+Usage (from prism/):
+    python benchmarks/bench_archive_replay.py --count 20000 --latency-ms 500 --postgres
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import archive  # noqa: E402
+import cache  # noqa: E402
+import lambda_function  # noqa: E402
+from bench_response_cache import request_counter  # noqa: E402
+from fixtures import PAYLOADS  # noqa: E402
+from recording import RecordingPool  # noqa: E402
+from run_benchmarks import SOURCES  # noqa: E402
+from stub_server import api_base_urls, encode_payloads, start_stub_server  # noqa: E402
+
+
+def archive_size(root):
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for directory, _, names in os.walk(os.path.join(root, archive.OBJECTS_PREFIX)) for name in names
+    )
+
+
+async def bench(args, archive_dir):
+    payloads = encode_payloads({source: PAYLOADS[source](args.count) for source in args.sources})
+    runner, root = await start_stub_server(payloads, latency=args.latency_ms / 1000)
+    if args.postgres:
+        db_conn = lambda_function.DatabaseConnection()
+        pool = await db_conn.connect()
+        await db_conn.setup_database(pool)
+    else:
+        pool = RecordingPool()
+    payload_archive = archive.create_archive(archive_dir)
+    trace_config, counter = request_counter()
+    print(f"{', '.join(args.sources)}: {args.count} objects each, {args.latency_ms:.0f} ms per response")
+    print(f"{'phase':8s} {'seconds':>8s} {'requests':>9s}")
+    try:
+        async with lambda_function.create_http_session(trace_configs=[trace_config]) as session:
+            run_id = payload_archive.start_run()
+            started = time.perf_counter()
+            for source in args.sources:
+                api_factory, run_processor = SOURCES[source]
+                api = api_factory()
+                api.base_url = api_base_urls(root)[source]
+                api.response_cache = archive.ArchivingCache(cache.ResponseCache(), payload_archive)
+                await run_processor(pool, api, session)
+            elapsed = time.perf_counter() - started
+            archived = len(payload_archive.entries)
+            await payload_archive.finish_run()
+            print(f"{'fetch':8s} {elapsed:8.2f} {counter['requests']:9d}   "
+                  f"{archived} payloads archived, {archive_size(archive_dir) / 2 ** 20:.2f} MB")
+
+            counter['requests'] = 0
+            started = time.perf_counter()
+            await lambda_function.replay_run(pool, payload_archive, run_id, session)
+            print(f"{'replay':8s} {time.perf_counter() - started:8.2f} {counter['requests']:9d}")
+    finally:
+        await pool.close()
+        await payload_archive.close()
+        await runner.cleanup()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--sources', nargs='+', choices=sorted(SOURCES), default=list(SOURCES))
+    arg_parser.add_argument('--count', type=int, default=20000, help='objects per source payload')
+    arg_parser.add_argument('--latency-ms', type=float, default=500.0, help='stub delay per response')
+    arg_parser.add_argument('--postgres', action='store_true', help='write to PostgreSQL (DB_* variables)')
+    args = arg_parser.parse_args()
+    for name in ('lambda_function', 'archive', 'cache'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory(prefix='payload-archive-') as archive_dir:
+        asyncio.run(bench(args, archive_dir))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Round-trip benchmark for the geostorm, solar flare and HSS processors.
+
+Feeds a synthetic DONKI payload through each processor against a recording
+pool and compares the batched writes with the previous pattern of one
+fetchrow per event plus one execute per Kp reading, instrument and linked
+event. The network column is round trips times --rtt-ms, the latency a
+remote database would add on top of server-side work.
+
+Usage (from prism/):
+    python benchmarks/bench_child_writes.py --events 10000 --rtt-ms 1
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+os.environ.setdefault('NASA_API_KEY', 'DEMO_KEY')
+
+import lambda_function  # noqa: E402
+from fixtures import flare_payload, geostorm_payload, hss_payload  # noqa: E402
+from recording import RecordingPool  # noqa: E402
+
+START_DATE = '2010-01-01'
+
+
+def fixture_api(api_class, payload):
+    """An instance of the real API class whose fetch returns ``payload``"""
+    class FixtureAPI(api_class):
+        async def fetch_data(self, session, start_date=None):
+            return payload
+    return FixtureAPI()
+
+
+async def legacy_write(connection, parents, children):
+    """The previous N+1 pattern: one statement per parent and per child row"""
+    async with connection.transaction():
+        for parent in parents:
+            await connection.fetchrow('INSERT ... RETURNING', *parent)
+        for rows in children:
+            for row in rows:
+                await connection.execute('INSERT ...', *row)
+
+
+async def run_case(name, api_class, processor, payload, rtt_ms, children_of):
+    api = fixture_api(api_class, payload)
+
+    batched_pool = RecordingPool()
+    await processor(batched_pool, api, None, START_DATE)
+
+    processed = api.sanitize_data(payload)
+    parents = [(item,) for item in processed]
+    legacy_pool = RecordingPool()
+    await legacy_write(legacy_pool.connection, parents, children_of(processed))
+
+    for label, pool in (('per-row', legacy_pool), ('batched', batched_pool)):
+        round_trips = pool.connection.round_trips
+        print(
+            f"{name:12s} {label:8s} {round_trips:8d} round trips  "
+            f"{pool.connection.rows_sent:8d} rows  "
+            f"{round_trips * rtt_ms / 1000:9.2f} s network"
+        )
+
+
+async def bench(args):
+    rtt = args.rtt_ms
+    await run_case(
+        'geostorm', lambda_function.GeostormAPI, lambda_function.process_geostorm_data,
+        geostorm_payload(args.events, args.children, args.linked), rtt,
+        lambda items: (
+            [(s['gst_id'], kp['observed_time']) for s in items for kp in s['kp_index_data']],
+            [(s['gst_id'], e) for s in items for e in s['linked_events']],
+        )
+    )
+    await run_case(
+        'solar flare', lambda_function.SolarFlareAPI, lambda_function.process_solar_flare_data,
+        flare_payload(args.events, args.children, args.linked), rtt,
+        lambda items: (
+            [(f['flare_id'], i) for f in items for i in f['instruments']],
+            [(f['flare_id'], e) for f in items for e in f['linked_events']],
+        )
+    )
+    await run_case(
+        'hss', lambda_function.HighSpeedStreamAPI, lambda_function.process_hss_data,
+        hss_payload(args.events, args.children, args.linked), rtt,
+        lambda items: (
+            [(h['hss_id'], i) for h in items for i in h['instruments']],
+            [(h['hss_id'], e) for h in items for e in h['linked_events']],
+        )
+    )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--events', type=int, default=10000, help='parent events per source')
+    arg_parser.add_argument('--children', type=int, default=8, help='Kp readings or instruments per event')
+    arg_parser.add_argument('--linked', type=int, default=2, help='linked events per event')
+    arg_parser.add_argument('--rtt-ms', type=float, default=1.0, help='database round-trip time to cost the network at')
+    asyncio.run(bench(arg_parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Connection reuse benchmark: one ClientSession per fetcher vs the shared
+session built by create_http_session.
+
+Runs a local aiohttp stub server and replays the request pattern of main():
+eight concurrent fetchers, each issuing a few requests to the same host.
+Reports wall time, TCP connections opened and DNS lookups for both modes.
+
+Usage (from prism/):
+    python benchmarks/bench_http_session.py --fetchers 8 --requests 4 --rounds 5
+
+Pass --tls-cert/--tls-key to serve HTTPS so TLS handshakes are included.
+"""
+import argparse
+import asyncio
+import os
+import ssl
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lambda_function import create_http_session  # noqa: E402
+
+
+async def start_stub_server(host, port, ssl_context):
+    """Starts a stub that answers every path with a small JSON array"""
+    async def handle(request):
+        return web.json_response([{'id': i} for i in range(10)])
+
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port, ssl_context=ssl_context)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def counting_trace_config(counters):
+    """Counts new connections and DNS resolutions made by a session"""
+    async def on_connection_create_end(session, ctx, params):
+        counters['connections'] += 1
+
+    async def on_dns_resolvehost_end(session, ctx, params):
+        counters['dns_lookups'] += 1
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    return trace_config
+
+
+async def fetcher(session, url, requests, verify):
+    for i in range(requests):
+        async with session.get(f"{url}/source/{i}", ssl=verify) as response:
+            await response.read()
+
+
+async def run_per_fetcher_sessions(url, fetchers, requests, verify, counters):
+    """The previous pattern: every process_* coroutine opens its own session"""
+    trace_config = counting_trace_config(counters)
+
+    async def isolated_fetcher():
+        async with aiohttp.ClientSession(trace_configs=[trace_config]) as session:
+            await fetcher(session, url, requests, verify)
+
+    await asyncio.gather(*(isolated_fetcher() for _ in range(fetchers)))
+
+
+async def run_shared_session(url, fetchers, requests, verify, counters):
+    """The current pattern: main() owns one tuned session"""
+    async with create_http_session(trace_configs=[counting_trace_config(counters)]) as session:
+        await asyncio.gather(*(fetcher(session, url, requests, verify) for _ in range(fetchers)))
+
+
+async def bench(args):
+    ssl_context = None
+    if args.tls_cert:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(args.tls_cert, args.tls_key)
+    scheme = 'https' if ssl_context else 'http'
+
+    runner, port = await start_stub_server('127.0.0.1', args.port, ssl_context)
+    # Use a hostname so the DNS cache is exercised as well
+    url = f"{scheme}://localhost:{port}"
+    verify = False if ssl_context else None
+
+    try:
+        for name, scenario in (('per-fetcher sessions', run_per_fetcher_sessions),
+                               ('shared session', run_shared_session)):
+            counters = {'connections': 0, 'dns_lookups': 0}
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                await scenario(url, args.fetchers, args.requests, verify, counters)
+            elapsed = time.perf_counter() - started
+            total_requests = args.rounds * args.fetchers * args.requests
+            print(
+                f"{name:22s} {elapsed * 1000:9.1f} ms  "
+                f"{counters['connections']:5d} connections  "
+                f"{counters['dns_lookups']:5d} DNS lookups  "
+                f"{total_requests / elapsed:9.0f} req/s"
+            )
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--fetchers', type=int, default=8, help='concurrent fetchers, as in main()')
+    arg_parser.add_argument('--requests', type=int, default=4, help='requests per fetcher per round')
+    arg_parser.add_argument('--rounds', type=int, default=5, help='repetitions of the whole pattern')
+    arg_parser.add_argument('--port', type=int, default=0, help='stub server port (0 picks a free one)')
+    arg_parser.add_argument('--tls-cert', help='certificate file to serve HTTPS')
+    arg_parser.add_argument('--tls-key', help='private key for --tls-cert')
+    asyncio.run(bench(arg_parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+NeoWs multi-week refresh benchmark: 7-day feed windows fetched one at a
+time vs NEOWS_FETCH_CONCURRENCY at once.
+
+A local stub answers the feed endpoint for whatever window is requested,
+after --latency-ms, with --per-day NEOs per date. NEO ids repeat every 30
+days so windows overlap the way real close approaches do. process_nasa_data
+writes to a recording pool. Reports wall time, feed requests, and the
+NEO rows and approaches written for each concurrency.
+
+Usage (from prism/):
+    python benchmarks/bench_neows_windows.py --days 90 --latency-ms 800
+"""
+import argparse
+import asyncio
+import functools
+import logging
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+os.environ.setdefault('NASA_API_KEY', 'DEMO_KEY')
+
+import lambda_function  # noqa: E402
+from recording import RecordingConnection, RecordingPool  # noqa: E402
+
+START = date(2024, 1, 1)
+REPEAT_DAYS = 30
+
+
+class TallyingConnection(RecordingConnection):
+    """Also counts the rows written to each NeoWs table"""
+
+    def __init__(self):
+        super().__init__()
+        self.table_rows = {'neo_objects': 0, 'neo_approaches': 0}
+
+    async def executemany(self, query, args):
+        args = list(args)
+        for table in self.table_rows:
+            if f"INTO {table}" in query:
+                self.table_rows[table] += len(args)
+        await super().executemany(query, args)
+
+
+def feed_payload(start, end, per_day):
+    days = {}
+    day = start
+    while day <= end:
+        days[day.isoformat()] = [{
+            'id': str(3000000 + (day.toordinal() % REPEAT_DAYS) * per_day + k),
+            'name': f"(2024 NW{k})",
+            'estimated_diameter': {'kilometers': {'estimated_diameter_max': 0.5}},
+            'is_potentially_hazardous_asteroid': k % 13 == 0,
+            'close_approach_data': [{
+                'close_approach_date': day.isoformat(),
+                'relative_velocity': {'kilometers_per_hour': '50000.0'},
+                'miss_distance': {'kilometers': '4000000.0'},
+            }],
+        } for k in range(per_day)]
+        day += timedelta(days=1)
+    return {'element_count': sum(map(len, days.values())), 'near_earth_objects': days}
+
+
+async def start_feed_stub(latency, per_day, counters):
+    async def feed(request):
+        counters['requests'] += 1
+        start = date.fromisoformat(request.query['start_date'])
+        end = date.fromisoformat(request.query.get('end_date') or (start + timedelta(days=7)).isoformat())
+        if (end - start).days >= lambda_function.NASANeoWsAPI.FEED_WINDOW_DAYS:
+            return web.json_response({'error_message': 'Date Format Exception - Expected format (yyyy-mm-dd) - '
+                                                       'The Feed date limit is only 7 Days'}, status=400)
+        await asyncio.sleep(latency)
+        return web.json_response(feed_payload(start, end, per_day))
+
+    app = web.Application()
+    app.router.add_get('/neo/rest/v1/feed', feed)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/neo/rest/v1/feed"
+
+
+async def bench_concurrency(args, concurrency):
+    counters = {'requests': 0}
+    runner, url = await start_feed_stub(args.latency_ms / 1000, args.per_day, counters)
+    api = lambda_function.NASANeoWsAPI(lambda_function.RateLimiter([(10 ** 9, 1)]))
+    api.base_url = url
+    api.stream_range = functools.partial(api.stream_range, concurrency=concurrency)
+    pool = RecordingPool()
+    pool.connection = TallyingConnection()
+    end = START + timedelta(days=args.days - 1)
+    try:
+        async with lambda_function.create_http_session() as session:
+            started = time.perf_counter()
+            await lambda_function.process_nasa_data(pool, api, session, START.isoformat(), end.isoformat())
+            elapsed = time.perf_counter() - started
+    finally:
+        await runner.cleanup()
+    table_rows = pool.connection.table_rows
+    return elapsed, counters['requests'], table_rows['neo_objects'], table_rows['neo_approaches']
+
+
+async def bench(args):
+    print(f"{args.days} days, {args.per_day} NEOs per day, {args.latency_ms:.0f} ms per feed request")
+    print(f"{'concurrency':>11s} {'seconds':>8s} {'requests':>9s} {'NEO rows':>9s} {'approaches':>11s}")
+    for concurrency in sorted({1, args.concurrency}):
+        elapsed, requests, neo_rows, approach_rows = await bench_concurrency(args, concurrency)
+        print(f"{concurrency:11d} {elapsed:8.2f} {requests:9d} {neo_rows:9d} {approach_rows:11d}")
+
+
+def main():
+    logging.getLogger('lambda_function').setLevel(logging.WARNING)
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--days', type=int, default=90, help='length of the refreshed range')
+    arg_parser.add_argument('--per-day', type=int, default=20, help='NEOs listed per date')
+    arg_parser.add_argument('--latency-ms', type=float, default=800.0, help='feed response time')
+    arg_parser.add_argument('--concurrency', type=int, default=lambda_function.NEOWS_FETCH_CONCURRENCY)
+    asyncio.run(bench(arg_parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Overlap benchmark for run_pipeline: the previous sequential loop (download a
+batch, convert it, write it, repeat) against the staged pipeline used by the
+GP and SATCAT processors.
+
+Download and write times per batch are simulated with sleeps; the transform
+stage is the real convert_gp_batch over synthetic GP records.
+
+Usage (from prism/):
+    python benchmarks/bench_pipeline.py --batches 20 --download-ms 80 --write-ms 60
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lambda_function import convert_gp_batch, run_pipeline  # noqa: E402
+
+
+def gp_batch(batch_number, batch_size):
+    return [{
+        'NORAD_CAT_ID': str(batch_number * batch_size + i),
+        'GP_ID': batch_number * batch_size + i,
+        'CREATION_DATE': '2024-05-10T17:36:00',
+        'EPOCH': '2024-05-10T12:00:00.123456',
+        'MEAN_MOTION': '15.5', 'ECCENTRICITY': '0.0001', 'INCLINATION': '51.6',
+        'LAUNCH_DATE': '1998-11-20',
+    } for i in range(batch_size)]
+
+
+async def download(args):
+    for batch_number in range(args.batches):
+        await asyncio.sleep(args.download_ms / 1000)
+        yield gp_batch(batch_number, args.batch_size)
+
+
+async def bench(args):
+    async def write(records):
+        await asyncio.sleep(args.write_ms / 1000)
+        return len(records)
+
+    started = time.perf_counter()
+    written = 0
+    async for raw_batch in download(args):
+        written += await write(convert_gp_batch(raw_batch))
+    sequential = time.perf_counter() - started
+
+    started = time.perf_counter()
+    pipelined_written = await run_pipeline(download(args), convert_gp_batch, write, queue_size=args.queue_size)
+    pipelined = time.perf_counter() - started
+
+    assert written == pipelined_written
+    print(f"sequential {sequential * 1000:8.1f} ms  ({written} rows)")
+    print(f"pipelined  {pipelined * 1000:8.1f} ms  ({pipelined_written} rows)  {sequential / pipelined:4.2f}x")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--batches', type=int, default=20, help='batches in the stream')
+    arg_parser.add_argument('--batch-size', type=int, default=2000, help='records per batch')
+    arg_parser.add_argument('--download-ms', type=float, default=80, help='simulated download time per batch')
+    arg_parser.add_argument('--write-ms', type=float, default=60, help='simulated write time per batch')
+    arg_parser.add_argument('--queue-size', type=int, default=2, help='batches buffered between stages')
+    asyncio.run(bench(arg_parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
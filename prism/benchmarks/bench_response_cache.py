@@ -0,0 +1,100 @@
+"""
+Response cache benchmark: each source run against the stub server with an
+empty disk cache ('cold'), again within the TTL ('fresh') and again after
+the TTL has passed ('stale').
+
+The stub tags every response with an ETag and answers a matching
+If-None-Match with 304 (see stub_server.py), so stale runs show the cost of
+revalidating an unchanged feed. Writes go to a recording pool. Reported per
+run: wall time, upstream requests, response bytes received, and the cache
+hits, revalidations and misses counted in the run metrics.
+
+Usage (from prism/):
+    python benchmarks/bench_response_cache.py --sources gp exoplanets --count 20000 --latency-ms 300
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import aiohttp  # noqa: E402
+
+import cache  # noqa: E402
+import lambda_function  # noqa: E402
+import metrics  # noqa: E402
+from fixtures import PAYLOADS  # noqa: E402
+from recording import RecordingPool  # noqa: E402
+from run_benchmarks import SOURCES  # noqa: E402
+from stub_server import api_base_urls, encode_payloads, start_stub_server  # noqa: E402
+
+# Run label -> TTL the cache applies
+RUNS = [('cold', 3600), ('fresh', 3600), ('stale', 0)]
+
+
+def request_counter():
+    """A trace config counting requests that reached the server, and the counter it updates"""
+    counter = {'requests': 0}
+
+    async def on_request_end(session, ctx, params):
+        counter['requests'] += 1
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config, counter
+
+
+async def bench_source(args, source, cache_dir):
+    runner, root = await start_stub_server(encode_payloads({source: PAYLOADS[source](args.count)}),
+                                           latency=args.latency_ms / 1000)
+    api_factory, run_processor = SOURCES[source]
+    api = api_factory()
+    api.base_url = api_base_urls(root)[source]
+    store = cache.DiskStore(os.path.join(cache_dir, source))
+    trace_config, counter = request_counter()
+    try:
+        async with lambda_function.create_http_session(
+                trace_configs=[metrics.http_trace_config(), trace_config]) as session:
+            for label, ttl in RUNS:
+                api.response_cache = cache.ResponseCache(store, ttl=lambda _, ttl=ttl: ttl)
+                counter['requests'] = 0
+                run_metrics = metrics.start_run()
+                started = time.perf_counter()
+                await metrics.measure_source(source, run_processor(RecordingPool(), api, session))
+                elapsed = time.perf_counter() - started
+                stages = run_metrics.stages.get(source, {}).values()
+                totals = {name: sum(getattr(stage, name) for stage in stages)
+                          for name in ('bytes_received', 'cache_hits', 'cache_revalidations', 'cache_misses')}
+                print(f"{source:12s} {label:6s} {elapsed:8.2f} {counter['requests']:9d} "
+                      f"{totals['bytes_received'] / 2 ** 20:8.2f} {totals['cache_hits']:5d} "
+                      f"{totals['cache_revalidations']:6d} {totals['cache_misses']:5d}")
+    finally:
+        await runner.cleanup()
+
+
+async def bench(args):
+    print(f"{args.count} objects per source, {args.latency_ms:.0f} ms per response")
+    print(f"{'source':12s} {'run':6s} {'seconds':>8s} {'requests':>9s} {'MB recv':>8s} "
+          f"{'hits':>5s} {'304s':>6s} {'miss':>5s}")
+    with tempfile.TemporaryDirectory(prefix='response-cache-') as cache_dir:
+        for source in args.sources:
+            await bench_source(args, source, cache_dir)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--sources', nargs='+', choices=sorted(SOURCES), default=['neows', 'exoplanets', 'gp'])
+    arg_parser.add_argument('--count', type=int, default=20000, help='objects per source payload')
+    arg_parser.add_argument('--latency-ms', type=float, default=300.0, help='stub delay per response')
+    args = arg_parser.parse_args()
+    for name in ('lambda_function', 'cache'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    asyncio.run(bench(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Paginated SATCAT benchmark: NORAD_CAT_ID range pages downloaded one at a
+time vs SATCAT_FETCH_CONCURRENCY at once.
+
+The stub server answers each page after --latency-ms, as a distant
+Space-Track would, and every page is written through its own recording
+connection with --rtt-ms per round trip. process_satellite_data logs each
+page's record count and throughput; this reports the totals per
+concurrency.
+
+Usage (from prism/):
+    python benchmarks/bench_satcat_pages.py --count 60000 --page-size 10000 --latency-ms 1500
+"""
+import argparse
+import asyncio
+import functools
+import logging
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+os.environ.setdefault('SPACE_TRACK_USERNAME', 'benchmark')
+os.environ.setdefault('SPACE_TRACK_PASSWORD', 'benchmark')
+
+import lambda_function  # noqa: E402
+from fixtures import satcat_payload  # noqa: E402
+from recording import RecordingConnection  # noqa: E402
+from stub_server import api_base_urls, encode_payloads, start_stub_server  # noqa: E402
+
+
+class ConnectionPerAcquirePool:
+    """Hands out a fresh RecordingConnection per acquire, like a pool with free connections"""
+
+    def __init__(self, round_trip_delay):
+        self.round_trip_delay = round_trip_delay
+        self.connections = []
+
+    @asynccontextmanager
+    async def acquire(self):
+        connection = RecordingConnection(self.round_trip_delay)
+        self.connections.append(connection)
+        yield connection
+
+
+async def bench_concurrency(args, root, concurrency):
+    api = lambda_function.SpaceTrackAPI(rate_limiter=lambda_function.RateLimiter([(10 ** 9, 1)]))
+    api.base_url = api_base_urls(root)['satcat']
+    api.satcat_pages = functools.partial(api.satcat_pages, page_size=args.page_size)
+    lambda_function.SATCAT_FETCH_CONCURRENCY = concurrency
+    pool = ConnectionPerAcquirePool(args.rtt_ms / 1000)
+    async with lambda_function.create_http_session() as session:
+        started = time.perf_counter()
+        written = await lambda_function.process_satellite_data(pool, api, session)
+        elapsed = time.perf_counter() - started
+    return elapsed, written, len(pool.connections)
+
+
+async def bench(args):
+    runner, root = await start_stub_server(
+        encode_payloads({'satcat': satcat_payload(args.count)}), latency=args.latency_ms / 1000
+    )
+    print(f"{args.count} objects in pages of {args.page_size} ids, {args.latency_ms:.0f} ms per page request, "
+          f"{args.rtt_ms:.1f} ms per round trip")
+    print(f"{'concurrency':>11s} {'seconds':>8s} {'written':>8s} {'conns':>6s} {'obj/s':>8s}")
+    try:
+        for concurrency in sorted({1, args.concurrency}):
+            elapsed, written, connections = await bench_concurrency(args, root, concurrency)
+            print(f"{concurrency:11d} {elapsed:8.2f} {written:8d} {connections:6d} {written / elapsed:8.0f}")
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--count', type=int, default=60000, help='objects in the catalog')
+    arg_parser.add_argument('--page-size', type=int, default=lambda_function.SATCAT_PAGE_SIZE,
+                            help='NORAD_CAT_IDs per page')
+    arg_parser.add_argument('--latency-ms', type=float, default=1500.0, help='stub delay per page request')
+    arg_parser.add_argument('--rtt-ms', type=float, default=0.0, help='recording connection delay per round trip')
+    arg_parser.add_argument('--concurrency', type=int, default=lambda_function.SATCAT_FETCH_CONCURRENCY)
+    arg_parser.add_argument('--verbose', action='store_true', help='show the per-page log lines')
+    args = arg_parser.parse_args()
+    logging.getLogger('lambda_function').setLevel(logging.INFO if args.verbose else logging.WARNING)
+    asyncio.run(bench(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Timestamp parsing micro-benchmark: the previous per-row calls against
+timestamps.parse_utc / parse_date.
+
+Each case times the old and the new call over the same list of values and
+checks that both produce identical datetimes.
+
+Usage (from prism/):
+    python benchmarks/bench_timestamps.py --values 100000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytz
+from dateutil import parser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from timestamps import parse_date, parse_utc  # noqa: E402
+
+
+def legacy_donki(value):
+    return parser.parse(value).astimezone(pytz.UTC).replace(tzinfo=None)
+
+
+def legacy_gp(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f')
+    except ValueError:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S')
+
+
+def legacy_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def sample_values(count, fmt):
+    start = datetime(2010, 1, 1)
+    return [(start + timedelta(minutes=37 * i, microseconds=i)).strftime(fmt) for i in range(count)]
+
+
+def time_calls(function, values):
+    started = time.perf_counter()
+    results = [function(value) for value in values]
+    return time.perf_counter() - started, results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--values', type=int, default=100000, help='timestamps per case')
+    args = arg_parser.parse_args()
+
+    cases = [
+        ('DONKI minutes', '%Y-%m-%dT%H:%MZ', legacy_donki, lambda v: parse_utc(v, 'donki.minutes')),
+        ('DONKI seconds', '%Y-%m-%dT%H:%M:%SZ', legacy_donki, lambda v: parse_utc(v, 'donki.seconds')),
+        ('GP EPOCH', '%Y-%m-%dT%H:%M:%S.%f', legacy_gp, lambda v: parse_utc(v, 'gp.EPOCH')),
+        ('GP CREATION_DATE', '%Y-%m-%dT%H:%M:%S', legacy_gp, lambda v: parse_utc(v, 'gp.CREATION_DATE')),
+        ('dates', '%Y-%m-%d', legacy_date, parse_date),
+    ]
+
+    for name, fmt, legacy, current in cases:
+        values = sample_values(args.values, fmt)
+        legacy_elapsed, expected = time_calls(legacy, values)
+        current_elapsed, actual = time_calls(current, values)
+        if actual != expected:
+            raise SystemExit(f"{name}: results differ from the previous parser")
+        print(
+            f"{name:18s} previous {legacy_elapsed * 1e9 / len(values):8.0f} ns/value  "
+            f"current {current_elapsed * 1e9 / len(values):6.0f} ns/value  "
+            f"{legacy_elapsed / current_elapsed:6.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Transform offload benchmark: GP and SATCAT batches converted on the event
+loop ('inline') vs in a thread pool vs in a process pool (offload.py).
+
+Each mode runs run_pipeline over --batches batches of fixture records with
+the real convert_gp_batch / convert_satcat_batch and a no-op writer. A probe
+task meanwhile sleeps --tick-ms at a time and records how late it wakes up,
+which is the delay every other source's sockets would see. Reported per
+mode: wall time, rows converted, and the p50/p99/max event loop lag.
+
+Usage (from prism/):
+    python benchmarks/bench_transform_offload.py --source gp --batches 20 --batch-size 5000
+"""
+import argparse
+import asyncio
+import logging
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import lambda_function  # noqa: E402
+import offload  # noqa: E402
+from fixtures import gp_payload, satcat_payload  # noqa: E402
+
+# Source -> (fixture generator, transform)
+SOURCES = {
+    'gp': (gp_payload, lambda_function.convert_gp_batch),
+    'satcat': (satcat_payload, lambda_function.convert_satcat_batch),
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+async def measure_lag(tick, lags):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(tick)
+        lags.append(time.perf_counter() - started - tick)
+
+
+async def bench_mode(args, mode, payload):
+    make_payload, transform = SOURCES[args.source]
+    executor = offload.create_executor(mode)
+
+    async def batches():
+        for _ in range(args.batches):
+            # Hand over to the loop between batches, as a download would
+            await asyncio.sleep(0)
+            yield payload
+
+    async def write(rows):
+        return len(rows)
+
+    lags = []
+    probe = asyncio.create_task(measure_lag(args.tick_ms / 1000, lags))
+    try:
+        started = time.perf_counter()
+        written = await lambda_function.run_pipeline(batches(), transform, write, executor=executor)
+        elapsed = time.perf_counter() - started
+    finally:
+        probe.cancel()
+        if executor:
+            executor.shutdown()
+    lags.sort()
+    return elapsed, written, lags or [0.0]
+
+
+async def bench(args):
+    payload = SOURCES[args.source][0](args.batch_size)
+    print(f"{args.source}: {args.batches} batches of {args.batch_size}, {offload.TRANSFORM_WORKERS} workers, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'mode':8s} {'seconds':>8s} {'rows':>8s} {'lag p50':>8s} {'lag p99':>8s} {'lag max':>8s}  (ms)")
+    for mode in args.modes:
+        elapsed, written, lags = await bench_mode(args, mode, payload)
+        print(f"{mode:8s} {elapsed:8.2f} {written:8d} {percentile(lags, 50) * 1000:8.1f} "
+              f"{percentile(lags, 99) * 1000:8.1f} {lags[-1] * 1000:8.1f}")
+
+
+def main():
+    logging.getLogger('lambda_function').setLevel(logging.WARNING)
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--source', choices=sorted(SOURCES), default='gp')
+    arg_parser.add_argument('--batches', type=int, default=20, help='batches in the stream')
+    arg_parser.add_argument('--batch-size', type=int, default=5000, help='records per batch')
+    arg_parser.add_argument('--tick-ms', type=float, default=5.0, help='probe sleep between lag samples')
+    arg_parser.add_argument('--modes', nargs='+', choices=['inline', 'thread', 'process'],
+                            default=['inline', 'thread', 'process'])
+    asyncio.run(bench(arg_parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
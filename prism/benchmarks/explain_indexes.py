@@ -0,0 +1,276 @@
+"""
+Index verification for the frontend's read queries.
+
+Migrates the database configured through the usual DB_* variables, then,
+inside a transaction that is rolled back at the end, seeds each queried
+table with synthetic rows, runs ANALYZE and EXPLAIN (ANALYZE, BUFFERS) on
+the query shapes used by projectoasis/src/app/api, and checks that each
+plan reads through the expected indexes. On the monthly partitioned tables
+(see partitions.py) the seeded rows are first split into partitions, and a
+plan that prunes a table down to at most two partitions needs no index on
+it. Existing rows are left untouched. Exits non-zero when a query reads a
+table without its expected index.
+
+Usage (from prism/):
+    python benchmarks/explain_indexes.py --rows 50000
+    python benchmarks/explain_indexes.py --verbose
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import lambda_function  # noqa: E402
+import partitions  # noqa: E402
+
+# Same definition as Predictor/predictor.py, for databases the Predictor hasn't run against
+CREATE_ENVIRONMENTAL_SCORES_SQL = """
+CREATE TABLE IF NOT EXISTS environmental_scores (
+    id SERIAL,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    region VARCHAR(2) NOT NULL,
+    risk_score DECIMAL(10,6) NOT NULL,
+    flare_risk DECIMAL(10,6),
+    cme_risk DECIMAL(10,6),
+    storm_risk DECIMAL(10,6),
+    debris_risk DECIMAL(10,6),
+    data_status VARCHAR(20) NOT NULL,
+    confidence_score DECIMAL(10,6),
+    model_version VARCHAR(10),
+    CONSTRAINT environmental_scores_pkey PRIMARY KEY (id, timestamp),
+    CONSTRAINT region_check CHECK (region ~ '^[1-3][A-D]$')
+) PARTITION BY RANGE (timestamp);
+
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'environmental_scores'::regclass) = 'p' THEN
+        CREATE TABLE IF NOT EXISTS environmental_scores_default PARTITION OF environmental_scores DEFAULT;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS environmental_scores_region_timestamp_idx ON environmental_scores (region, timestamp);
+CREATE INDEX IF NOT EXISTS environmental_scores_timestamp_idx ON environmental_scores (timestamp);
+"""
+
+# Synthetic rows spread over about ten years, keyed so they can't collide with real data.
+# $1 is the row count.
+SEED_SQL = [
+    """
+    INSERT INTO gp (norad_cat_id, object_type, decay_date, updated_at)
+    SELECT 'explain-' || i, (ARRAY['PAYLOAD', 'ROCKET BODY', 'DEBRIS'])[1 + i % 3],
+           CASE WHEN i % 20 = 0 THEN CURRENT_DATE - 3650 + i % 4000 END,
+           now() - (i % 87600) * interval '1 hour'
+    FROM generate_series(1, $1) i
+    """,
+    """
+    INSERT INTO donki_solar_flare (flare_id, begin_time, class_type)
+    SELECT 'explain-' || i, now() - i * interval '1 hour', 'M1.0'
+    FROM generate_series(1, $1) i
+    """,
+    """
+    INSERT INTO donki_cme (activity_id, start_time, speed)
+    SELECT 'explain-' || i, now() - i * interval '1 hour', 500
+    FROM generate_series(1, $1) i
+    """,
+    """
+    INSERT INTO donki_geostorm (gst_id, start_time)
+    SELECT 'explain-' || i, now() - i * interval '8 hours'
+    FROM generate_series(1, $1 / 8) i
+    """,
+    """
+    INSERT INTO geostorm_kp_index (gst_id, observed_time, kp_index, source)
+    SELECT 'explain-' || (1 + i / 8), now() - i * interval '1 hour', 5.33, 'NOAA'
+    FROM generate_series(0, $1 / 8 * 8 - 1) i
+    """,
+    """
+    INSERT INTO neo_objects (id, name, observation_date)
+    SELECT 'explain-' || i, 'explain ' || i, CURRENT_DATE - i % 3650
+    FROM generate_series(1, $1) i
+    """,
+    """
+    INSERT INTO neo_approaches (neo_id, close_approach_date, miss_distance_km)
+    SELECT 'explain-' || i, CURRENT_DATE - i % 3650, 1.0e6
+    FROM generate_series(1, $1) i
+    """,
+    """
+    INSERT INTO environmental_scores (timestamp, region, risk_score, data_status)
+    SELECT now() - i * interval '1 hour', (1 + i % 3)::text || (ARRAY['A', 'B', 'C', 'D'])[1 + i / 3 % 4],
+           0.5, 'explain'
+    FROM generate_series(1, $1) i
+    """,
+]
+
+SEEDED_TABLES = [
+    'gp', 'donki_solar_flare', 'donki_cme', 'donki_geostorm', 'geostorm_kp_index',
+    'neo_objects', 'neo_approaches', 'environmental_scores',
+]
+
+WEEK_AGO = "now() - interval '7 days'"
+
+# (name, query as issued by the frontend route, indexes the plan must use).
+# Sequential scans are reported but allowed, e.g. on the small donki_geostorm
+# side of the geostorm join.
+QUERIES = [
+    ('debris', """
+        SELECT gp.norad_cat_id, gp.object_name, gp.object_type, gp.decay_date
+        FROM gp
+        WHERE updated_at >= NOW() - interval '24 hours'
+          AND (gp.decay_date IS NULL OR gp.decay_date > CURRENT_DATE)
+          AND object_type = 'DEBRIS'
+    """, {'gp_active_updated_at_idx', 'gp_decayed_idx'}),
+    ('solar flares', f"""
+        SELECT class_type, source_location, active_region_num, begin_time, peak_time, end_time
+        FROM public.donki_solar_flare
+        WHERE begin_time BETWEEN {WEEK_AGO} AND now()
+        ORDER BY begin_time DESC
+    """, {'donki_solar_flare_begin_time_idx'}),
+    ('cme', f"""
+        SELECT catalog, start_time, source_location, speed, type
+        FROM public.donki_cme
+        WHERE start_time BETWEEN {WEEK_AGO} AND now()
+        ORDER BY start_time DESC
+    """, {'donki_cme_start_time_idx'}),
+    ('geostorms', f"""
+        SELECT g.gst_id, k.kp_index, k.observed_time, k.source
+        FROM public.donki_geostorm g
+        JOIN public.geostorm_kp_index k ON g.gst_id = k.gst_id
+        WHERE k.observed_time BETWEEN {WEEK_AGO} AND now()
+        ORDER BY k.observed_time DESC
+    """, {'geostorm_kp_index_observed_time_idx'}),
+    ('kp index', f"""
+        SELECT observed_time, kp_index, source
+        FROM public.geostorm_kp_index
+        WHERE observed_time BETWEEN {WEEK_AGO} AND now()
+        ORDER BY observed_time DESC
+    """, {'geostorm_kp_index_observed_time_idx'}),
+    ('neo', """
+        SELECT id, name, observation_date, estimated_diameter_km, is_potentially_hazardous
+        FROM public.neo_objects
+        WHERE observation_date BETWEEN CURRENT_DATE - 7 AND CURRENT_DATE
+        ORDER BY observation_date DESC
+    """, {'neo_objects_observation_date_idx'}),
+    ('neo approaches', """
+        SELECT close_approach_date, relative_velocity_kph, miss_distance_km
+        FROM public.neo_approaches
+        WHERE close_approach_date BETWEEN CURRENT_DATE - 7 AND CURRENT_DATE
+        ORDER BY close_approach_date DESC
+    """, {'neo_approaches_close_approach_date_idx'}),
+    ('scores by region', """
+        SELECT id, timestamp, region, risk_score, data_status
+        FROM environmental_scores
+        WHERE region = '2B'
+        ORDER BY timestamp DESC
+        LIMIT 100
+    """, {'environmental_scores_region_timestamp_idx'}),
+    ('latest scores', """
+        SELECT id, timestamp, region, risk_score, data_status
+        FROM environmental_scores
+        ORDER BY timestamp DESC
+        LIMIT 100
+    """, {'environmental_scores_timestamp_idx'}),
+]
+
+INDEX_NODES = {'Index Scan', 'Index Only Scan', 'Bitmap Index Scan'}
+
+# A recent-window read of a partitioned table may touch this many partitions without an index
+PRUNED_PARTITIONS_LIMIT = 2
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def check_plan(plan):
+    """Returns (indexes used, tables read by sequential scan, tables read, shared buffers hit + read)"""
+    nodes = list(plan_nodes(plan['Plan']))
+    used = {node['Index Name'] for node in nodes if node['Node Type'] in INDEX_NODES}
+    seq_scanned = {node['Relation Name'] for node in nodes if node['Node Type'] == 'Seq Scan'}
+    relations = {node['Relation Name'] for node in nodes if 'Relation Name' in node}
+    buffers = plan['Plan'].get('Shared Hit Blocks', 0) + plan['Plan'].get('Shared Read Blocks', 0)
+    return used, seq_scanned, relations, buffers
+
+
+async def missing_indexes(conn, expected, used, relations):
+    """
+    Expected indexes the plan didn't use, other than those on partitioned
+    tables it pruned to at most PRUNED_PARTITIONS_LIMIT partitions. Returns
+    them with the indexes used and {partitioned table: partitions read}.
+    """
+    # Partition scans name the partitions' own indexes, which count as their parent's
+    used = {row[0] for row in await conn.fetch(
+        "SELECT coalesce(pg_partition_root(n::regclass), n::regclass)::text FROM unnest($1::text[]) n", list(used)
+    )}
+    partitions_read = {row['parent']: row['scanned'] for row in await conn.fetch("""
+    SELECT a.relid::regclass::text AS parent, count(DISTINCT n) AS scanned
+    FROM unnest($1::text[]) n, pg_partition_ancestors(n::regclass) a
+    WHERE a.relid <> n::regclass
+    GROUP BY 1
+    """, list(relations))}
+    index_tables = {row[0]: row[1] for row in await conn.fetch(
+        "SELECT indexrelid::regclass::text, indrelid::regclass::text FROM pg_index WHERE indexrelid = ANY($1::regclass[])",
+        list(expected)
+    )}
+    missing = {
+        index for index in expected - used
+        if partitions_read.get(index_tables.get(index), PRUNED_PARTITIONS_LIMIT + 1) > PRUNED_PARTITIONS_LIMIT
+    }
+    return missing, used, partitions_read
+
+
+async def verify(args) -> bool:
+    db_conn = lambda_function.DatabaseConnection()
+    pool = await db_conn.connect()
+    try:
+        await db_conn.setup_database(pool)
+        async with pool.acquire() as conn:
+            await conn.execute(CREATE_ENVIRONMENTAL_SCORES_SQL)
+            transaction = conn.transaction()
+            await transaction.start()
+            try:
+                for statement in SEED_SQL:
+                    await conn.execute(statement, args.rows)
+                for table, (column, retention_months) in partitions.PARTITIONED_TABLES.items():
+                    await partitions.maintain_table(conn, table, column, retention_months, date.today())
+                for table in SEEDED_TABLES:
+                    await conn.execute(f"ANALYZE {table}")
+
+                ok = True
+                for name, query, expected in QUERIES:
+                    plan = json.loads(await conn.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}"))[0]
+                    used, seq_scanned, relations, buffers = check_plan(plan)
+                    missing, used, partitions_read = await missing_indexes(conn, expected, used, relations)
+                    passed = not missing
+                    ok = ok and passed
+                    print(f"{'ok' if passed else 'FAIL':4s} {name:18s} {plan['Execution Time']:8.2f} ms "
+                          f"{buffers:6d} buffers  indexes: {', '.join(sorted(used)) or '-'}")
+                    for table, count in sorted(partitions_read.items()):
+                        print(f"     {count} partition(s) of {table} read")
+                    if missing:
+                        print(f"     expected index not used: {', '.join(sorted(missing))}")
+                    if seq_scanned:
+                        print(f"     sequential scan on: {', '.join(sorted(seq_scanned))}")
+                    if args.verbose or not passed:
+                        print(json.dumps(plan['Plan'], indent=2))
+                return ok
+            finally:
+                await transaction.rollback()
+    finally:
+        await pool.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--rows', type=int, default=50000, help='synthetic rows seeded per table')
+    arg_parser.add_argument('--verbose', action='store_true', help='print every plan, not only failing ones')
+    args = arg_parser.parse_args()
+    sys.exit(0 if asyncio.run(verify(args)) else 1)
+
+
+if __name__ == '__main__':
+    main()
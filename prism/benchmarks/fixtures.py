@@ -0,0 +1,257 @@
+"""
+Synthetic payload generator for the ingestion benchmarks.
+
+Produces responses shaped like the real NeoWs, DONKI (CME, GST, FLR, HSS),
+Exoplanet Archive, SATCAT and GP endpoints at any scale. Values are
+deterministic for a given count so runs are comparable.
+
+Usage (from prism/), writing one JSON file per source:
+    python benchmarks/fixtures.py --count 10000 --out benchmarks/fixtures
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+
+START = datetime(2010, 1, 1)
+
+
+def donki_time(index, offset_hours=0):
+    moment = START + timedelta(hours=3 * index + offset_hours)
+    return moment.strftime('%Y-%m-%dT%H:%MZ')
+
+
+def donki_id(index, kind):
+    return f"{donki_time(index)[:-1]}:00-{kind}-001"
+
+
+def linked_events(index, count):
+    return [{'activityID': f"{donki_time(index)}-CME-{n:03d}"} for n in range(count)]
+
+
+def neows_payload(count, approaches_per_object=1):
+    """A /neo/rest/v1/feed response with ``count`` objects spread over 7 days"""
+    days = {}
+    for i in range(count):
+        date = (START + timedelta(days=i % 7)).strftime('%Y-%m-%d')
+        days.setdefault(date, []).append({
+            'id': str(2000000 + i),
+            'name': f"({2000 + i // 1000} AB{i % 1000})",
+            'estimated_diameter': {'kilometers': {'estimated_diameter_min': 0.1, 'estimated_diameter_max': 0.1 + i % 50 / 10}},
+            'is_potentially_hazardous_asteroid': i % 17 == 0,
+            'close_approach_data': [{
+                'close_approach_date': (START + timedelta(days=i % 7 + 365 * n)).strftime('%Y-%m-%d'),
+                'relative_velocity': {'kilometers_per_hour': str(20000.0 + i % 5000)},
+                'miss_distance': {'kilometers': str(1.0e6 + i * 37.5)},
+            } for n in range(approaches_per_object)],
+        })
+    return {'element_count': count, 'near_earth_objects': days}
+
+
+def cme_payload(count):
+    return [{
+        'activityID': donki_id(i, 'CME'),
+        'catalog': 'M2M_CATALOG',
+        'startTime': donki_time(i),
+        'sourceLocation': 'N15W30',
+        'activeRegionNum': 13000 + i % 500,
+        'link': f"https://webtools.ccmc.gsfc.nasa.gov/DONKI/view/CME/{i}/-1",
+        'note': 'Synthetic CME',
+        'cmeAnalyses': [{
+            'latitude': -10.0 + i % 20,
+            'longitude': 30.0 - i % 60,
+            'halfAngle': 25.0,
+            'speed': 400.0 + i % 900,
+            'type': 'S',
+            'levelOfData': 0,
+            'modelCompletionTime': donki_time(i, 2),
+            'isMostAccurate': True,
+        }],
+    } for i in range(count)]
+
+
+def geostorm_payload(count, kp_per_event=8, linked_per_event=2):
+    return [{
+        'gstID': donki_id(i, 'GST'),
+        'startTime': donki_time(i),
+        'submissionTime': donki_time(i, 1),
+        'versionId': 1,
+        'link': f"https://webtools.ccmc.gsfc.nasa.gov/DONKI/view/GST/{i}/-1",
+        'allKpIndex': [
+            {'observedTime': donki_time(i, 3 * k), 'kpIndex': 5.33 + k % 3, 'source': 'NOAA'}
+            for k in range(kp_per_event)
+        ],
+        'linkedEvents': linked_events(i, linked_per_event),
+    } for i in range(count)]
+
+
+def flare_payload(count, instruments_per_event=8, linked_per_event=2):
+    return [{
+        'flrID': donki_id(i, 'FLR'),
+        'beginTime': donki_time(i),
+        'peakTime': donki_time(i, 1),
+        'endTime': donki_time(i, 2),
+        'classType': 'M1.2',
+        'sourceLocation': 'N15W30',
+        'activeRegionNum': 13000 + i % 500,
+        'link': f"https://webtools.ccmc.gsfc.nasa.gov/DONKI/view/FLR/{i}/-1",
+        'note': '',
+        'instruments': [{'displayName': f"GOES-P: EXIS {n}"} for n in range(instruments_per_event)],
+        'linkedEvents': linked_events(i, linked_per_event),
+    } for i in range(count)]
+
+
+def hss_payload(count, instruments_per_event=8, linked_per_event=2):
+    return [{
+        'hssID': donki_id(i, 'HSS'),
+        'eventTime': donki_time(i),
+        'submissionTime': donki_time(i, 1),
+        'versionId': 1,
+        'link': f"https://webtools.ccmc.gsfc.nasa.gov/DONKI/view/HSS/{i}/-1",
+        'instruments': [{'displayName': f"DSCOVR: PLASMAG {n}"} for n in range(instruments_per_event)],
+        'linkedEvents': linked_events(i, linked_per_event),
+    } for i in range(count)]
+
+
+def exoplanet_payload(count):
+    """A TAP sync result (format=json) from pscomppars"""
+    return [{
+        'pl_name': f"Synth-{i // 4} {'bcde'[i % 4]}",
+        'hostname': f"Synth-{i // 4}",
+        'discoverymethod': 'Transit' if i % 3 else 'Radial Velocity',
+        'pl_orbper': 1.5 + i % 400,
+        'pl_rade': 0.8 + i % 20 / 4,
+        'pl_bmassj': 0.01 * (1 + i % 300),
+        'pl_orbsmax': 0.02 + i % 100 / 50,
+        'disc_year': 1995 + i % 30,
+        'pl_orbeccen': i % 10 / 20,
+        'pl_insol': None if i % 5 == 0 else 10.0 + i % 1000,
+        'pl_eqt': 300 + i % 1500,
+        'pl_density': 1.0 + i % 10,
+        'st_teff': 3000 + i % 4000,
+        'st_rad': 0.5 + i % 20 / 10,
+        'st_mass': 0.4 + i % 15 / 10,
+        'st_met': -0.2 + i % 5 / 10,
+        'pl_facilityname': 'Transiting Exoplanet Survey Satellite (TESS)',
+        'pl_telescope': '0.1 m TESS Telescope',
+        'pl_instrument': 'TESS CCD Array',
+        'rastr': '05h33m15.80s',
+        'decstr': '-62d29m04.60s',
+        'pl_controv_flag': i % 50 == 0,
+        'pl_refname': f"<a refstr=SYNTH_{i} href=https://example.org/{i} target=ref>Synthetic et al. 2024</a>",
+    } for i in range(count)]
+
+
+def satcat_payload(count):
+    rows = []
+    for i in range(count):
+        year = 1957 + i % 67
+        decayed = i % 3 == 0
+        rows.append({
+            'INTLDES': f"{year}-{i % 999 + 1:03d}A",
+            'NORAD_CAT_ID': str(i + 1),
+            'OBJECT_TYPE': ('PAYLOAD', 'ROCKET BODY', 'DEBRIS')[i % 3],
+            'SATNAME': f"SYNTH {i + 1}",
+            'COUNTRY': ('US', 'CIS', 'PRC', 'ESA')[i % 4],
+            'LAUNCH': f"{year}-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            'SITE': 'AFETR',
+            'DECAY': f"{min(year + 5, 2024)}-01-01" if decayed else None,
+            'PERIOD': f"{90 + i % 600}.25",
+            'INCLINATION': f"{i % 180}.50",
+            'APOGEE': str(300 + i % 36000),
+            'PERIGEE': str(200 + i % 1000),
+            'COMMENT': None,
+            'COMMENTCODE': None,
+            'RCSVALUE': '0',
+            'RCS_SIZE': ('SMALL', 'MEDIUM', 'LARGE')[i % 3],
+            'FILE': str(i % 9000),
+            'LAUNCH_YEAR': str(year),
+            'LAUNCH_NUM': str(i % 999 + 1),
+            'LAUNCH_PIECE': 'A',
+            'CURRENT': 'N' if decayed else 'Y',
+            'OBJECT_NAME': f"SYNTH {i + 1}",
+            'OBJECT_ID': f"{year}-{i % 999 + 1:03d}A",
+            'OBJECT_NUMBER': str(i + 1),
+        })
+    return rows
+
+
+def gp_payload(count):
+    rows = []
+    for i in range(count):
+        epoch = START + timedelta(days=i % 5000, seconds=i % 86400, microseconds=i % 1000000)
+        rows.append({
+            'CCSDS_OMM_VERS': '2.0',
+            'CREATION_DATE': (epoch + timedelta(hours=6)).strftime('%Y-%m-%dT%H:%M:%S'),
+            'ORIGINATOR': '18 SPCS',
+            'OBJECT_NAME': f"SYNTH {i + 1}",
+            'OBJECT_ID': f"{1957 + i % 67}-{i % 999 + 1:03d}A",
+            'CENTER_NAME': 'EARTH',
+            'REF_FRAME': 'TEME',
+            'TIME_SYSTEM': 'UTC',
+            'MEAN_ELEMENT_THEORY': 'SGP4',
+            'EPOCH': epoch.strftime('%Y-%m-%dT%H:%M:%S.%f'),
+            'MEAN_MOTION': f"{14.0 + i % 200 / 100:.8f}",
+            'ECCENTRICITY': f"{i % 1000 / 100000:.8f}",
+            'INCLINATION': f"{i % 180:.4f}",
+            'RA_OF_ASC_NODE': f"{i % 360:.4f}",
+            'ARG_OF_PERICENTER': f"{(i * 7) % 360:.4f}",
+            'MEAN_ANOMALY': f"{(i * 13) % 360:.4f}",
+            'EPHEMERIS_TYPE': '0',
+            'CLASSIFICATION_TYPE': 'U',
+            'NORAD_CAT_ID': str(i + 1),
+            'ELEMENT_SET_NO': '999',
+            'REV_AT_EPOCH': str(i % 90000),
+            'BSTAR': '0.00012345',
+            'MEAN_MOTION_DOT': '0.00001',
+            'MEAN_MOTION_DDOT': '0',
+            'SEMIMAJOR_AXIS': f"{6700 + i % 30000:.3f}",
+            'PERIOD': f"{90 + i % 600:.3f}",
+            'APOAPSIS': f"{300 + i % 36000:.3f}",
+            'PERIAPSIS': f"{200 + i % 1000:.3f}",
+            'OBJECT_TYPE': ('PAYLOAD', 'ROCKET BODY', 'DEBRIS')[i % 3],
+            'RCS_SIZE': ('SMALL', 'MEDIUM', 'LARGE')[i % 3],
+            'COUNTRY_CODE': ('US', 'CIS', 'PRC', 'ESA')[i % 4],
+            'LAUNCH_DATE': f"{1957 + i % 67}-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            'SITE': 'AFETR',
+            'DECAY_DATE': None,
+            'FILE': str(4000000 + i),
+            'GP_ID': str(200000000 + i),
+            'TLE_LINE0': f"0 SYNTH {i + 1}",
+            'TLE_LINE1': f"1 {i + 1:05d}U 98067A   24131.50000000  .00001000  00000-0  12345-4 0  9991",
+            'TLE_LINE2': f"2 {i + 1:05d}  51.6400 {i % 360:8.4f} 0001234  90.0000 270.0000 15.50000000{i % 90000:5d}1",
+        })
+    return rows
+
+
+# Source name -> generator taking an object count
+PAYLOADS = {
+    'neows': neows_payload,
+    'donki_cme': cme_payload,
+    'donki_gst': geostorm_payload,
+    'donki_flr': flare_payload,
+    'donki_hss': hss_payload,
+    'exoplanets': exoplanet_payload,
+    'satcat': satcat_payload,
+    'gp': gp_payload,
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--count', type=int, default=10000, help='objects per source (1k to 100k is typical)')
+    arg_parser.add_argument('--out', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures'),
+                            help='directory for the <source>.json files')
+    arg_parser.add_argument('--sources', nargs='+', choices=sorted(PAYLOADS), default=sorted(PAYLOADS))
+    args = arg_parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for source in args.sources:
+        path = os.path.join(args.out, f"{source}.json")
+        with open(path, 'w') as fixture_file:
+            json.dump(PAYLOADS[source](args.count), fixture_file)
+        print(f"{source:12s} {args.count:8d} objects  {os.path.getsize(path) / 1e6:8.1f} MB  {path}")
+
+
+if __name__ == '__main__':
+    main()
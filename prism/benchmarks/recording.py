@@ -0,0 +1,81 @@
+"""
+Recording stand-ins for an asyncpg pool and connection.
+
+They accept the calls the ingestion processors make, count database round
+trips per method and can add a fixed delay per round trip to model network
+latency. Round trips are also reported to the metrics module, as a real
+InstrumentedConnection would. Nothing is stored. Importers put src/ on
+sys.path first.
+"""
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+
+import metrics
+
+
+class RecordingConnection:
+    """Counts round trips instead of talking to PostgreSQL"""
+
+    def __init__(self, round_trip_delay=0.0):
+        self.round_trip_delay = round_trip_delay
+        self.calls = Counter()
+        self.rows_sent = 0
+
+    @property
+    def round_trips(self):
+        return sum(self.calls.values())
+
+    async def _round_trip(self, method, rows=1):
+        self.calls[method] += 1
+        self.rows_sent += rows
+        metrics.record_round_trip()
+        if self.round_trip_delay:
+            await asyncio.sleep(self.round_trip_delay)
+
+    async def execute(self, query, *args):
+        # Array parameters (insert_unnest) carry one element per row
+        rows = len(args[0]) if args and isinstance(args[0], list) else 1
+        await self._round_trip('execute', rows)
+        return f"INSERT 0 {rows}"
+
+    async def executemany(self, query, args):
+        # asyncpg pipelines executemany, so it costs one round trip
+        await self._round_trip('executemany', len(list(args)))
+
+    async def fetch(self, query, *args):
+        await self._round_trip('fetch')
+        return []
+
+    async def fetchrow(self, query, *args):
+        await self._round_trip('fetchrow')
+        return None
+
+    async def fetchval(self, query, *args):
+        await self._round_trip('fetchval')
+        return None
+
+    async def copy_records_to_table(self, table_name, *, records, columns=None, **kwargs):
+        records = list(records)
+        await self._round_trip('copy_records_to_table', len(records))
+        return f"COPY {len(records)}"
+
+    @asynccontextmanager
+    async def transaction(self):
+        await self._round_trip('begin', 0)
+        yield
+        await self._round_trip('commit', 0)
+
+
+class RecordingPool:
+    """Hands out a single RecordingConnection"""
+
+    def __init__(self, round_trip_delay=0.0):
+        self.connection = RecordingConnection(round_trip_delay)
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+    async def close(self):
+        pass
@@ -0,0 +1,171 @@
+"""
+End-to-end ingestion benchmark.
+
+Each source runs in a fresh process: its payload is generated by fixtures.py,
+served by the local stub server, and the real process_* function fetches,
+sanitizes and writes it, either to a recording pool (default; --rtt-ms adds
+a delay per round trip) or to PostgreSQL (--postgres, configured through the
+usual DB_* variables). Every source is run --warmup + --repeats times.
+
+Reported per source: p50/p95/max latency over the repeats, throughput at
+the median, the p50 run's fetch/transform/write split and database round
+trips, and the process's peak RSS.
+
+Usage (from prism/):
+    python benchmarks/run_benchmarks.py --count 10000 --repeats 5
+    python benchmarks/run_benchmarks.py --sources gp satcat --count 100000 --postgres --json gp.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+os.environ.setdefault('NASA_API_KEY', 'DEMO_KEY')
+os.environ.setdefault('SPACE_TRACK_USERNAME', 'benchmark')
+os.environ.setdefault('SPACE_TRACK_PASSWORD', 'benchmark')
+
+import lambda_function  # noqa: E402
+import metrics  # noqa: E402
+from fixtures import PAYLOADS  # noqa: E402
+from recording import RecordingPool  # noqa: E402
+from stub_server import api_base_urls, encode_payloads, start_stub_server  # noqa: E402
+
+
+def space_track_api():
+    # The stub has no rate limits to respect
+    return lambda_function.SpaceTrackAPI(rate_limiter=lambda_function.RateLimiter([(10 ** 9, 1)]))
+
+
+# Source name -> (API factory, call running its processor)
+SOURCES = {
+    'neows': (lambda_function.NASANeoWsAPI,
+              lambda pool, api, session: lambda_function.process_nasa_data(pool, api, session, None)),
+    'donki_cme': (lambda_function.DONKICMEAPI,
+                  lambda pool, api, session: lambda_function.process_donki_cme_data(pool, api, session, None)),
+    'donki_gst': (lambda_function.GeostormAPI,
+                  lambda pool, api, session: lambda_function.process_geostorm_data(pool, api, session, None)),
+    'donki_flr': (lambda_function.SolarFlareAPI,
+                  lambda pool, api, session: lambda_function.process_solar_flare_data(pool, api, session, None)),
+    'donki_hss': (lambda_function.HighSpeedStreamAPI,
+                  lambda pool, api, session: lambda_function.process_hss_data(pool, api, session, None)),
+    'exoplanets': (lambda_function.NASAExoplanetAPI, lambda_function.process_exoplanet_data),
+    'satcat': (space_track_api, lambda_function.process_satellite_data),
+    'gp': (space_track_api,
+           lambda pool, api, session: lambda_function.process_gp_data(pool, api, session, full_resync=True)),
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+async def bench_source(source, options):
+    payload = PAYLOADS[source](options['count'])
+    runner, root = await start_stub_server(encode_payloads({source: payload}))
+    del payload
+
+    api_factory, run_processor = SOURCES[source]
+    api = api_factory()
+    api.base_url = api_base_urls(root)[source]
+
+    if options['postgres']:
+        db_conn = lambda_function.DatabaseConnection()
+        pool = await db_conn.connect()
+        await db_conn.setup_database(pool)
+    else:
+        pool = RecordingPool(options['rtt_ms'] / 1000)
+
+    runs = []
+    try:
+        async with lambda_function.create_http_session(trace_configs=[metrics.http_trace_config()]) as session:
+            for repeat in range(options['warmup'] + options['repeats']):
+                run_metrics = metrics.start_run()
+                started = time.perf_counter()
+                await metrics.measure_source(source, run_processor(pool, api, session))
+                elapsed = time.perf_counter() - started
+                if repeat >= options['warmup']:
+                    runs.append((elapsed, run_metrics.stages.get(source, {})))
+    finally:
+        await pool.close()
+        await runner.cleanup()
+
+    runs.sort(key=lambda run: run[0])
+    latencies = [elapsed for elapsed, _ in runs]
+    p50_elapsed, p50_stages = runs[max(0, math.ceil(len(runs) / 2) - 1)]
+    return {
+        'source': source,
+        'objects': options['count'],
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'max_ms': latencies[-1] * 1000,
+        'objects_per_s': options['count'] / p50_elapsed,
+        'stages_ms': {name: stage.wall_time_ms for name, stage in p50_stages.items() if name != 'total'},
+        'bytes_received': sum(stage.bytes_received for stage in p50_stages.values()),
+        'round_trips': sum(stage.round_trips for stage in p50_stages.values()),
+        'peak_rss_mb': peak_rss_bytes() / 2 ** 20,
+    }
+
+
+def run_in_child(source, options, results):
+    logging.getLogger('lambda_function').setLevel(logging.WARNING)
+    try:
+        results.put(asyncio.run(bench_source(source, options)))
+    except Exception as e:
+        results.put({'source': source, 'error': f"{type(e).__name__}: {e}"})
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--sources', nargs='+', choices=sorted(SOURCES), default=list(SOURCES))
+    arg_parser.add_argument('--count', type=int, default=10000, help='objects per source payload')
+    arg_parser.add_argument('--repeats', type=int, default=5, help='measured runs per source')
+    arg_parser.add_argument('--warmup', type=int, default=1, help='unmeasured runs before the repeats')
+    arg_parser.add_argument('--postgres', action='store_true', help='write to PostgreSQL (DB_* variables)')
+    arg_parser.add_argument('--rtt-ms', type=float, default=0.0, help='recording pool delay per round trip')
+    arg_parser.add_argument('--json', help='also write the results to this file')
+    args = arg_parser.parse_args()
+    options = vars(args)
+
+    # A fresh interpreter per source keeps peak RSS attributable to that source
+    context = multiprocessing.get_context('spawn')
+    results = []
+    print(f"{'source':12s} {'p50 ms':>9s} {'p95 ms':>9s} {'max ms':>9s} {'obj/s':>9s} "
+          f"{'fetch':>8s} {'xform':>8s} {'write':>8s} {'trips':>7s} {'RSS MB':>7s}")
+    for source in args.sources:
+        queue = context.Queue()
+        child = context.Process(target=run_in_child, args=(source, options, queue))
+        child.start()
+        result = queue.get()
+        child.join()
+        results.append(result)
+        if 'error' in result:
+            print(f"{source:12s} failed: {result['error']}")
+            continue
+        stages = result['stages_ms']
+        print(
+            f"{source:12s} {result['p50_ms']:9.1f} {result['p95_ms']:9.1f} {result['max_ms']:9.1f} "
+            f"{result['objects_per_s']:9.0f} {stages.get('fetch', 0):8.1f} {stages.get('transform', 0):8.1f} "
+            f"{stages.get('write', 0):8.1f} {result['round_trips']:7d} {result['peak_rss_mb']:7.1f}"
+        )
+
+    if args.json:
+        with open(args.json, 'w') as results_file:
+            json.dump({'options': options, 'results': results}, results_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Local aiohttp stand-in for the NASA, Exoplanet Archive and Space-Track APIs.
+
+Serves one pre-encoded JSON payload per source on the same paths the API
+clients request, so a client is pointed at the stub by replacing the host
+part of its base_url (see api_base_urls). Space-Track logins always succeed,
+and the NORAD_CAT_ID range, orderby, limit and predicates parts of a
+Space-Track query are applied to the payload (see space_track_query). The
+TAP endpoint answers format=csv requests with the payload as CSV (see
+tap_csv). Every response carries an ETag of its body, and a request whose
+If-None-Match matches it is answered 304 Not Modified.
+
+Usage (from prism/), serving files written by fixtures.py:
+    python benchmarks/stub_server.py --fixtures benchmarks/fixtures --port 8080
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+# Source name -> path served, relative to the stub root
+SOURCE_PATHS = {
+    'neows': '/neo/rest/v1/feed',
+    'donki_cme': '/DONKI/CME',
+    'donki_gst': '/DONKI/GST',
+    'donki_flr': '/DONKI/FLR',
+    'donki_hss': '/DONKI/HSS',
+    'exoplanets': '/TAP/sync',
+    'satcat': '/basicspacedata/query/class/satcat',
+    'gp': '/basicspacedata/query/class/gp',
+}
+
+
+def api_base_urls(root: str) -> Dict[str, str]:
+    """base_url values that point each API client at a stub served from ``root``"""
+    urls = {source: root + path for source, path in SOURCE_PATHS.items()}
+    # SpaceTrackAPI appends its own query paths to the site root
+    urls['satcat'] = urls['gp'] = root
+    return urls
+
+
+def space_track_query(records: List[Dict[str, Any]], predicates: str) -> List[Dict[str, Any]]:
+    """
+    Applies the subset of the Space-Track query language the clients use:
+    NORAD_CAT_ID/<first>--<last>, orderby/<field> [asc|desc], limit/<n> and
+    predicates/<fields>. Other parts, such as format/json, are ignored.
+    """
+    parts = [part for part in predicates.split('/') if part]
+    query = dict(zip(parts[::2], parts[1::2]))
+    if 'NORAD_CAT_ID' in query:
+        first, last = (int(bound) for bound in query['NORAD_CAT_ID'].split('--'))
+        records = [record for record in records if first <= int(record['NORAD_CAT_ID']) <= last]
+    if 'orderby' in query:
+        field, _, direction = query['orderby'].partition(' ')
+        records = sorted(records, key=lambda record: int(record[field]), reverse=direction == 'desc')
+    if 'limit' in query:
+        records = records[:int(query['limit'])]
+    if 'predicates' in query:
+        fields = query['predicates'].split(',')
+        records = [{field: record[field] for field in fields} for record in records]
+    return records
+
+
+def tap_csv(records: List[Dict[str, Any]]) -> bytes:
+    """A TAP format=csv body for ``records``: nulls are empty fields and booleans 0/1"""
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    if records:
+        writer.writerow(records[0])
+    for record in records:
+        writer.writerow(['' if value is None else int(value) if isinstance(value, bool) else value
+                         for value in record.values()])
+    return out.getvalue().encode()
+
+
+def conditional_response(request: web.Request, body: bytes, content_type: str) -> web.Response:
+    """The response for ``body``, or 304 when the request's If-None-Match names its ETag"""
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    if request.headers.get('If-None-Match') == etag:
+        return web.Response(status=304, headers={'ETag': etag})
+    return web.Response(body=body, content_type=content_type, headers={'ETag': etag})
+
+
+def build_app(payloads: Dict[str, bytes], latency: float = 0.0) -> web.Application:
+    """
+    An application answering each source path with its encoded payload.
+    ``latency`` seconds are added before every response to model the
+    distance to the real API.
+    """
+    def handler(body):
+        async def handle(request):
+            if latency:
+                await asyncio.sleep(latency)
+            return conditional_response(request, body, 'application/json')
+        return handle
+
+    def space_track_handler(body):
+        records = []
+
+        async def handle(request):
+            predicates = request.match_info['predicates']
+            if not any(part in predicates for part in ('NORAD_CAT_ID/', 'limit/', 'predicates/')):
+                return await handler(body)(request)
+            if not records:
+                records.extend(json.loads(body))
+            if latency:
+                await asyncio.sleep(latency)
+            return conditional_response(request, json.dumps(space_track_query(records, predicates)).encode(),
+                                        'application/json')
+        return handle
+
+    def tap_handler(body):
+        csv_body = []
+
+        async def handle(request):
+            if request.query.get('format') != 'csv':
+                return await handler(body)(request)
+            if not csv_body:
+                csv_body.append(tap_csv(json.loads(body)))
+            if latency:
+                await asyncio.sleep(latency)
+            return conditional_response(request, csv_body[0], 'text/csv')
+        return handle
+
+    async def login(request):
+        await request.post()
+        return web.Response(text='""', content_type='application/json')
+
+    app = web.Application()
+    app.router.add_post('/ajaxauth/login', login)
+    for source, body in payloads.items():
+        path = SOURCE_PATHS[source]
+        if path.startswith('/basicspacedata/'):
+            # Space-Track encodes the query predicates as further path segments
+            app.router.add_get(path + '{predicates:(/.*)?}', space_track_handler(body))
+        elif source == 'exoplanets':
+            app.router.add_get(path, tap_handler(body))
+        else:
+            app.router.add_get(path, handler(body))
+    return app
+
+
+async def start_stub_server(payloads: Dict[str, bytes], host: str = '127.0.0.1', port: int = 0,
+                            latency: float = 0.0):
+    """Starts the stub and returns (runner, root URL); call runner.cleanup() to stop it"""
+    runner = web.AppRunner(build_app(payloads, latency), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+def encode_payloads(payloads: Dict[str, object]) -> Dict[str, bytes]:
+    return {source: json.dumps(payload).encode() for source, payload in payloads.items()}
+
+
+async def serve(args):
+    payloads = {}
+    for source in SOURCE_PATHS:
+        path = os.path.join(args.fixtures, f"{source}.json")
+        if os.path.exists(path):
+            with open(path, 'rb') as fixture_file:
+                payloads[source] = fixture_file.read()
+    runner, root = await start_stub_server(payloads, args.host, args.port, args.latency_ms / 1000)
+    print(f"Serving {', '.join(sorted(payloads))} at {root}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--fixtures', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures'),
+                            help='directory of <source>.json files from fixtures.py')
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8080)
+    arg_parser.add_argument('--latency-ms', type=float, default=0.0, help='delay added before every response')
+    try:
+        asyncio.run(serve(arg_parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,10 @@
 """
 NASA Lambda Data Ingestion Package
-"""
 
-from .lambda_function import lambda_handler
+The modules here are deployed flat, as the Lambda's top-level modules, and
+import each other by name (``import metrics``), so the handler is
+``lambda_function.lambda_handler`` with this directory on sys.path rather
+than a re-export from this package.
+"""
 
-__version__ = '0.1.0'
-__all__ = ['lambda_handler']
\ No newline at end of file
+__version__ = '0.1.0'
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+Raw payload archive and replay for the upstream API fetchers.
+
+With PAYLOAD_ARCHIVE_URL set (a local directory or s3://bucket/prefix, as
+for RESPONSE_CACHE_URL in cache.py), every response body an API client reads
+is archived exactly as received:
+
+    objects/<sha256[:2]>/<sha256>.gz   the gzipped body, named by the SHA-256
+                                       of the raw bytes, so an unchanged
+                                       payload is stored once however often
+                                       it is fetched
+    runs/<run id>.json                 one manifest per ingestion run: source,
+                                       URL, query params (without the API
+                                       key), digest and Content-Type of each
+                                       response, in the order they were read
+
+Run ids start with the UTC start time, so they sort chronologically.
+
+ArchivingCache records responses on their way out of the response cache.
+ReplayCache answers the API clients from a run's manifest instead, so
+lambda_function.replay_archive can feed archived payloads through the usual
+sanitize_data and process_* paths without any network access.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import cache
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_ARCHIVE_URL = os.getenv('PAYLOAD_ARCHIVE_URL', '')
+
+RUNS_PREFIX = 'runs/'
+OBJECTS_PREFIX = 'objects/'
+
+
+def object_name(digest: str) -> str:
+    return f"{OBJECTS_PREFIX}{digest[:2]}/{digest}.gz"
+
+
+class HashingResponse(cache.RecordingResponse):
+    """A RecordingResponse that also takes the SHA-256 of the raw body"""
+
+    def __init__(self, response):
+        super().__init__(response)
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def _record(self, data: bytes):
+        super()._record(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+class PayloadArchive:
+    """Content-addressed response bodies in ``store``, plus one manifest per run"""
+
+    def __init__(self, store):
+        self.store = store
+        self.run_id = None
+        self.entries: List[Dict[str, Any]] = []
+
+    def start_run(self) -> str:
+        """Starts a new manifest; responses archived from now on are listed in it"""
+        self.run_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:8]}"
+        self.entries = []
+        return self.run_id
+
+    async def add(self, source: str, url: str, params: Optional[Dict[str, Any]], response: HashingResponse):
+        """
+        Archives a fully read response body and lists it in the current run's
+        manifest. The body is copied from the response's spool file.
+        """
+        if self.run_id is None:
+            self.start_run()
+        digest = response.hexdigest()
+        try:
+            if not await self.store.exists(object_name(digest)):
+                await self.store.put(object_name(digest), response.compressed_body())
+        except Exception as e:
+            logger.warning(f"Could not archive {source} payload {digest}: {e}")
+            return
+        self.entries.append({
+            'source': source,
+            'url': url,
+            'params': {
+                name: str(value) for name, value in (params or {}).items()
+                if name not in cache.UNKEYED_PARAMS and value is not None
+            },
+            'key': cache.cache_key(source, url, params),
+            'digest': digest,
+            'size': response.size,
+            'content_type': response.headers.get('Content-Type', ''),
+            'fetched_at': datetime.now(timezone.utc).isoformat(),
+        })
+
+    async def finish_run(self):
+        """Writes the current run's manifest, if anything was archived"""
+        run_id, entries = self.run_id, self.entries
+        self.run_id, self.entries = None, []
+        if not entries:
+            return
+        try:
+            await self.store.put(f"{RUNS_PREFIX}{run_id}.json", json.dumps(entries).encode())
+            logger.info(f"Archived {len(entries)} payloads as run {run_id}")
+        except Exception as e:
+            logger.warning(f"Could not write the manifest of archive run {run_id}: {e}")
+
+    async def list_runs(self) -> List[str]:
+        """Archived run ids, oldest first"""
+        names = await self.store.list(RUNS_PREFIX)
+        return [name[len(RUNS_PREFIX):-len('.json')] for name in names if name.endswith('.json')]
+
+    async def load_run(self, run_id: str) -> List[Dict[str, Any]]:
+        manifest = await self.store.get(f"{RUNS_PREFIX}{run_id}.json")
+        if manifest is None:
+            raise LookupError(f"No archived run {run_id}")
+        return json.loads(manifest)
+
+    async def open_payload(self, digest: str):
+        """The gzipped body with this digest, opened for streaming; the caller closes it"""
+        body = await self.store.open(object_name(digest))
+        if body is None:
+            raise LookupError(f"Archived payload {digest} is missing")
+        return body
+
+    async def close(self):
+        await self.store.close()
+
+
+class ArchivingCache:
+    """
+    Wraps a ResponseCache so every 200 response it yields, from upstream or
+    from the cache, is archived once the caller has read it all.
+    """
+
+    def __init__(self, response_cache: cache.ResponseCache, archive: PayloadArchive):
+        self.response_cache = response_cache
+        self.archive = archive
+
+    @asynccontextmanager
+    async def fetch(self, source: str, url: str, params: Optional[Dict[str, Any]], send):
+        async with self.response_cache.fetch(source, url, params, send) as response:
+            if response.status != 200:
+                yield response
+                return
+            recording = HashingResponse(response)
+            try:
+                yield recording
+                # Only reached when the caller finished without an error
+                await recording.drain()
+            except BaseException:
+                recording.close()
+                raise
+        try:
+            if recording.complete:
+                await self.archive.add(source, url, params, recording)
+        finally:
+            recording.close()
+
+    async def close(self):
+        await self.response_cache.close()
+        await self.archive.close()
+
+
+class ReplayCache:
+    """
+    Answers fetches from one archived run without calling upstream. A request
+    gets the archived response with the same source, URL and params if one
+    is left, otherwise the next one archived for its source: requests whose
+    URL depends on the date or a watermark still receive the payloads of the
+    run in order. Each archived response is served once.
+    """
+
+    def __init__(self, archive: PayloadArchive, entries: List[Dict[str, Any]]):
+        self.archive = archive
+        self.pending = list(entries)
+        self._lock = asyncio.Lock()
+
+    def remaining(self, source: str) -> List[Dict[str, Any]]:
+        return [entry for entry in self.pending if entry['source'] == source]
+
+    async def _take(self, source: str, url: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        async with self._lock:
+            key = cache.cache_key(source, url, params)
+            candidates = self.remaining(source)
+            entry = next((entry for entry in candidates if entry['key'] == key), None) or next(iter(candidates), None)
+            if entry is None:
+                raise LookupError(f"No archived {source} response left for {url}")
+            self.pending.remove(entry)
+            return entry
+
+    @asynccontextmanager
+    async def fetch(self, source: str, url: str, params: Optional[Dict[str, Any]], send):
+        entry = await self._take(source, url, params)
+        body = await self.archive.open_payload(entry['digest'])
+        try:
+            yield cache.CachedResponse({'headers': {'Content-Type': entry['content_type']}}, body)
+        finally:
+            body.close()
+
+    async def close(self):
+        pass
+
+
+def create_archive(url: str = PAYLOAD_ARCHIVE_URL) -> Optional[PayloadArchive]:
+    """The archive PAYLOAD_ARCHIVE_URL describes, or None when archiving is off"""
+    # An archive is never trimmed
+    return PayloadArchive(cache.create_store(url, max_bytes=None)) if url else None
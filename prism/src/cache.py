@@ -0,0 +1,581 @@
+"""
+Persistent response cache for the upstream API fetchers.
+
+Most feeds change far less often than the Lambda runs, so every API client
+sends its GETs through a ResponseCache (see cached_get and
+SpaceTrackAPI._query in lambda_function):
+
+- An entry younger than its source's TTL is served without any request.
+- An older entry is revalidated with If-None-Match / If-Modified-Since when
+  upstream sent an ETag or Last-Modified. A 304 serves the stored body and
+  restarts the TTL, so an unchanged feed costs one conditional request.
+- Stored bodies are served by streaming them from the store and gunzipping
+  them chunk by chunk, never holding a whole body in memory.
+- Anything else is downloaded. A 200 body is gzipped as it streams past to
+  the caller, spooled to a temporary file once it outgrows SPOOL_MAX_MEMORY,
+  and stored once it has been read in full.
+
+Entries are keyed by source, URL and sorted query parameters (credentials
+left out), and stored as a JSON metadata object plus the gzipped body,
+either under a local directory or in an S3-compatible bucket:
+
+    RESPONSE_CACHE_URL=/tmp/prism-cache          (local disk, e.g. Lambda /tmp)
+    RESPONSE_CACHE_URL=s3://bucket/prefix        (aiobotocore, imported on first use)
+
+Unset, the cache is disabled and requests go straight upstream. Hits,
+revalidations and misses are counted in the run metrics. Store failures
+are logged and never fail a fetch.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+from multidict import CIMultiDict
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_URL = os.getenv('RESPONSE_CACHE_URL', '')
+# Endpoint of an S3-compatible service; unset means AWS S3
+RESPONSE_CACHE_S3_ENDPOINT = os.getenv('RESPONSE_CACHE_S3_ENDPOINT') or None
+# The disk store deletes its least recently written files beyond this size
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# Compressed bodies being recorded stay in memory up to this size, then
+# move to a temporary file
+SPOOL_MAX_MEMORY = 1024 * 1024
+# Files larger than this go to S3 as a multipart upload of parts this size
+S3_PART_SIZE = 8 * 1024 * 1024
+
+# Seconds an entry is served without asking upstream, per source; override
+# with RESPONSE_CACHE_TTL_<SOURCE>, e.g. RESPONSE_CACHE_TTL_SATCAT=43200.
+# Space-Track asks for SATCAT at most daily and GP at most hourly.
+DEFAULT_TTL = 900
+SOURCE_TTLS = {
+    'neows': 3600,
+    'donki_cme': 3600,
+    'donki_gst': 3600,
+    'donki_flr': 3600,
+    'donki_hss': 3600,
+    'exoplanets': 86400,
+    'satcat': 86400,
+    'spacetrack_gp': 3600,
+}
+
+# Query parameters that identify the caller rather than the resource
+UNKEYED_PARAMS = {'api_key'}
+
+# Response headers kept with an entry and replayed on hits
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+# Bodies are compressed on the event loop as they stream past, so favour speed
+COMPRESS_LEVEL = 1
+GZIP_WBITS = 31
+
+
+def source_ttl(source: str) -> float:
+    return float(os.getenv(f"RESPONSE_CACHE_TTL_{source.upper()}", SOURCE_TTLS.get(source, DEFAULT_TTL)))
+
+
+def cache_key(source: str, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Object name prefix for a request: the source, then a digest of the URL and its normalised params"""
+    normalised = sorted(
+        (str(name), str(value)) for name, value in (params or {}).items()
+        if name not in UNKEYED_PARAMS and value is not None
+    )
+    digest = hashlib.sha256(json.dumps([url, normalised]).encode()).hexdigest()
+    return f"{source}/{digest}"
+
+
+class FileBody:
+    """A stored object open on disk, read in a worker thread one chunk at a time"""
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self.size = os.fstat(file.fileno()).st_size
+
+    async def read(self, size: int) -> bytes:
+        return await asyncio.to_thread(self._file.read, size)
+
+    def close(self):
+        self._file.close()
+
+
+class S3Body:
+    """A stored object streamed from the body of an S3 GetObject response"""
+
+    def __init__(self, response: Dict[str, Any]):
+        self._body = response['Body']
+        self.size = response['ContentLength']
+
+    async def read(self, size: int) -> bytes:
+        return await self._body.read(size)
+
+    def close(self):
+        self._body.close()
+
+
+class DiskStore:
+    """
+    Objects as files under ``root``, trimmed to ``max_bytes`` (unless None)
+    after each write. The directory is only walked on the first write; the
+    sizes of later writes are added to that index as they are made.
+    """
+
+    def __init__(self, root: str, max_bytes: Optional[int] = RESPONSE_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        # Path -> size of every file under root, oldest first
+        self._sizes: Optional[Dict[str, int]] = None
+        self._total = 0
+        self._sizes_lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, *name.split('/'))
+
+    def _read(self, name: str) -> Optional[bytes]:
+        try:
+            with open(self._path(name), 'rb') as cache_file:
+                return cache_file.read()
+        except FileNotFoundError:
+            return None
+
+    def _open(self, name: str) -> Optional[FileBody]:
+        try:
+            return FileBody(open(self._path(name), 'rb'))
+        except FileNotFoundError:
+            return None
+
+    def _write(self, name: str, data: Union[bytes, BinaryIO]):
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and renamed, so a concurrent reader never sees half a file
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'wb') as cache_file:
+            if isinstance(data, bytes):
+                cache_file.write(data)
+            else:
+                shutil.copyfileobj(data, cache_file)
+            size = cache_file.tell()
+        os.replace(temporary_path, path)
+        if self.max_bytes is not None:
+            self._trim(path, size)
+
+    def _scan(self) -> Dict[str, int]:
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, path, stat.st_size))
+        return {path: size for _, path, size in sorted(files)}
+
+    def _trim(self, written_path: str, written_size: int):
+        """Adds a written file to the size index, then deletes the oldest files while over max_bytes"""
+        with self._sizes_lock:
+            if self._sizes is None:
+                # Already includes the file just written
+                self._sizes = self._scan()
+                self._total = sum(self._sizes.values())
+            else:
+                # Popped first, so a rewritten file moves to the newest end
+                self._total += written_size - self._sizes.pop(written_path, 0)
+                self._sizes[written_path] = written_size
+            while self._total > self.max_bytes and self._sizes:
+                path = next(iter(self._sizes))
+                self._total -= self._sizes.pop(path)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    async def get(self, name: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, name)
+
+    async def open(self, name: str) -> Optional[FileBody]:
+        """
+        The object open for reading in chunks, or None if it is missing. A
+        trim deleting the file meanwhile doesn't cut the read short.
+        """
+        return await asyncio.to_thread(self._open, name)
+
+    async def put(self, name: str, data: Union[bytes, BinaryIO]):
+        """Stores ``data``, bytes or a binary file read from its current position"""
+        await asyncio.to_thread(self._write, name, data)
+
+    async def exists(self, name: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, self._path(name))
+
+    async def list(self, prefix: str) -> List[str]:
+        """Names of the objects directly under ``prefix``, which ends with '/'"""
+        try:
+            names = await asyncio.to_thread(os.listdir, self._path(prefix.rstrip('/')))
+        except FileNotFoundError:
+            return []
+        return sorted(prefix + name for name in names if not name.endswith('.tmp'))
+
+    async def close(self):
+        pass
+
+
+class S3Store:
+    """
+    Objects in an S3-compatible bucket under ``prefix``. The client is
+    created on first use; bound a cache bucket's size with a lifecycle rule.
+    """
+
+    def __init__(self, bucket: str, prefix: str = '', endpoint_url: Optional[str] = RESPONSE_CACHE_S3_ENDPOINT):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.endpoint_url = endpoint_url
+        self._client = None
+        self._client_lock = None
+        self._exit_stack = AsyncExitStack()
+
+    async def _get_client(self):
+        if self._client_lock is None:
+            self._client_lock = asyncio.Lock()
+        async with self._client_lock:
+            if self._client is None:
+                # Imported on first use; the AWS SDK is not needed at cold start
+                from aiobotocore.session import get_session
+
+                self._client = await self._exit_stack.enter_async_context(
+                    get_session().create_client('s3', endpoint_url=self.endpoint_url)
+                )
+        return self._client
+
+    async def _get_object(self, name: str) -> Optional[Dict[str, Any]]:
+        from botocore.exceptions import ClientError
+
+        client = await self._get_client()
+        try:
+            return await client.get_object(Bucket=self.bucket, Key=self.prefix + name)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+
+    async def get(self, name: str) -> Optional[bytes]:
+        response = await self._get_object(name)
+        if response is None:
+            return None
+        async with response['Body'] as body:
+            return await body.read()
+
+    async def open(self, name: str) -> Optional[S3Body]:
+        """The object's body as it downloads, or None if it is missing"""
+        response = await self._get_object(name)
+        return S3Body(response) if response is not None else None
+
+    async def put(self, name: str, data: Union[bytes, BinaryIO]):
+        """
+        Stores ``data``, bytes or a binary file read from its current
+        position. A file larger than S3_PART_SIZE is sent as a multipart
+        upload, so only one part of it is in memory at a time.
+        """
+        client = await self._get_client()
+        key = self.prefix + name
+        if not isinstance(data, bytes):
+            part = await asyncio.to_thread(data.read, S3_PART_SIZE)
+            if len(part) == S3_PART_SIZE:
+                await self._put_parts(client, key, part, data)
+                return
+            data = part
+        await client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    async def _put_parts(self, client, key: str, part: bytes, file: BinaryIO):
+        upload_id = (await client.create_multipart_upload(Bucket=self.bucket, Key=key))['UploadId']
+        try:
+            parts = []
+            while part:
+                number = len(parts) + 1
+                response = await client.upload_part(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=part
+                )
+                parts.append({'PartNumber': number, 'ETag': response['ETag']})
+                part = await asyncio.to_thread(file.read, S3_PART_SIZE)
+            await client.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={'Parts': parts}
+            )
+        except BaseException:
+            await client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+    async def exists(self, name: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        client = await self._get_client()
+        try:
+            await client.head_object(Bucket=self.bucket, Key=self.prefix + name)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return False
+            raise
+        return True
+
+    async def list(self, prefix: str) -> List[str]:
+        """Names of the objects directly under ``prefix``, which ends with '/'"""
+        client = await self._get_client()
+        names = []
+        paginator = client.get_paginator('list_objects_v2')
+        async for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix, Delimiter='/'):
+            names.extend(item['Key'][len(self.prefix):] for item in page.get('Contents', []))
+        return sorted(names)
+
+    async def close(self):
+        await self._exit_stack.aclose()
+        self._client = None
+
+
+class CachedResponse:
+    """
+    Stands in for an aiohttp response whose body comes from the cache. The
+    gzipped body is read from ``body`` (a FileBody or S3Body, left open for
+    the caller to close) and decompressed as the response is consumed, so
+    like an aiohttp body it can only be read once.
+    """
+    from_cache = True
+    status = 200
+
+    def __init__(self, entry: Dict[str, Any], body):
+        self.headers = CIMultiDict(entry.get('headers', {}))
+        self._body = body
+        # The response's own body stream, as aiohttp exposes it
+        self.content = self
+
+    def raise_for_status(self):
+        pass
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        decompressor = zlib.decompressobj(GZIP_WBITS)
+        while compressed := await self._body.read(size):
+            # Bounded like aiohttp's chunks, however well the body compressed
+            while compressed:
+                chunk = decompressor.decompress(compressed, size)
+                compressed = decompressor.unconsumed_tail
+                if chunk:
+                    yield chunk
+        if tail := decompressor.flush():
+            yield tail
+
+    async def read(self) -> bytes:
+        return b''.join([chunk async for chunk in self.iter_chunked(64 * 1024)])
+
+    async def text(self, encoding: str = 'utf-8') -> str:
+        return (await self.read()).decode(encoding)
+
+    async def json(self) -> Any:
+        return json.loads(await self.read())
+
+
+class RecordingResponse:
+    """
+    Wraps a 200 response and gzips its body as the caller reads it, whether
+    streamed through content.iter_chunked or read whole. The gzipped body is
+    spooled to a temporary file past SPOOL_MAX_MEMORY; close() discards it.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self.from_cache = getattr(response, 'from_cache', False)
+        self.status = response.status
+        self.headers = response.headers
+        self.complete = False
+        self.compressed_size = 0
+        self._compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+        self._spool = tempfile.SpooledTemporaryFile(SPOOL_MAX_MEMORY)
+        # Stands in for the response's body stream too
+        self.content = self
+
+    def _spool_part(self, part: bytes):
+        self._spool.write(part)
+        self.compressed_size += len(part)
+
+    def _record(self, data: bytes):
+        if part := self._compressor.compress(data):
+            self._spool_part(part)
+
+    def raise_for_status(self):
+        self._response.raise_for_status()
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        async for chunk in self._response.content.iter_chunked(size):
+            self._record(chunk)
+            yield chunk
+        self.complete = True
+
+    async def read(self) -> bytes:
+        body = await self._response.read()
+        self._record(body)
+        self.complete = True
+        return body
+
+    async def text(self, encoding: str = 'utf-8') -> str:
+        return (await self.read()).decode(encoding)
+
+    async def json(self) -> Any:
+        return json.loads(await self.read())
+
+    async def drain(self):
+        """Reads what the caller left of the body, such as whitespace after a JSON array it stopped at"""
+        if not self.complete:
+            async for _ in self.iter_chunked(64 * 1024):
+                pass
+
+    def compressed_body(self) -> BinaryIO:
+        """The gzipped body of a complete response as a file, rewound; valid until close()"""
+        if self._compressor is not None:
+            self._spool_part(self._compressor.flush())
+            self._compressor = None
+        self._spool.seek(0)
+        return self._spool
+
+    def close(self):
+        self._spool.close()
+
+
+class ResponseCache:
+    """
+    Serves GETs from ``store`` where possible (see the module docstring).
+    Without a store every request goes straight upstream.
+    """
+
+    def __init__(self, store=None, ttl: Callable[[str], float] = source_ttl):
+        self.store = store
+        self.ttl = ttl
+
+    async def _lookup(self, key: str) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """
+        The stored entry and its compressed body opened for streaming, or
+        (None, None) if either is missing or unreadable. The caller closes
+        the body.
+        """
+        try:
+            metadata = await self.store.get(f"{key}.json")
+            if metadata is None:
+                return None, None
+            entry = json.loads(metadata)
+            body = await self.store.open(f"{key}.gz")
+            if body is None:
+                return None, None
+            if body.size != entry.get('size'):
+                body.close()
+                return None, None
+            return entry, body
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed for {key}: {e}")
+            return None, None
+
+    async def _save(self, key: str, entry: Dict[str, Any], body: Optional[BinaryIO] = None):
+        """Stores the entry, and the body first when it is new, so metadata never points at a missing body"""
+        try:
+            if body is not None:
+                await self.store.put(f"{key}.gz", body)
+            await self.store.put(f"{key}.json", json.dumps(entry).encode())
+        except Exception as e:
+            logger.warning(f"Response cache write failed for {key}: {e}")
+
+    @staticmethod
+    def _validators(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        headers = {}
+        if entry and entry['headers'].get('ETag'):
+            headers['If-None-Match'] = entry['headers']['ETag']
+        if entry and entry['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    @asynccontextmanager
+    async def fetch(self, source: str, url: str, params: Optional[Dict[str, Any]], send):
+        """
+        Yields the response to a GET of ``url`` with ``params``. ``send`` is
+        called with extra request headers only when upstream has to be
+        asked, and must return an async context manager yielding the aiohttp
+        response, so rate limiting and authentication stay with the caller.
+        Non-200 responses are yielded as they are, uncached.
+        """
+        if self.store is None:
+            async with send({}) as response:
+                yield response
+            return
+
+        key = cache_key(source, url, params)
+        entry, body = await self._lookup(key)
+        try:
+            if entry and time.time() - entry['stored_at'] < self.ttl(source):
+                metrics.record_cache('hit')
+                logger.info(f"Serving {source} response from cache ({body.size} bytes compressed)")
+                yield CachedResponse(entry, body)
+                return
+
+            async with send(self._validators(entry)) as response:
+                if response.status == 304 and entry:
+                    metrics.record_cache('revalidated')
+                    logger.info(f"Upstream {source} response unchanged, serving it from cache")
+                    entry['stored_at'] = time.time()
+                    await self._save(key, entry)
+                    yield CachedResponse(entry, body)
+                    return
+                if body is not None:
+                    # Not served, so don't hold the stored copy open during the download
+                    body.close()
+                if response.status != 200:
+                    yield response
+                    return
+
+                metrics.record_cache('miss')
+                recording = RecordingResponse(response)
+                try:
+                    yield recording
+                    # Only reached when the caller finished without an error
+                    await recording.drain()
+                except BaseException:
+                    recording.close()
+                    raise
+
+            try:
+                if recording.complete:
+                    compressed_body = recording.compressed_body()
+                    await self._save(key, {
+                        'url': url,
+                        'stored_at': time.time(),
+                        'size': recording.compressed_size,
+                        'headers': {
+                            name: response.headers[name] for name in STORED_HEADERS if name in response.headers
+                        },
+                    }, compressed_body)
+            finally:
+                recording.close()
+        finally:
+            if body is not None:
+                body.close()
+
+    async def close(self):
+        if self.store is not None:
+            await self.store.close()
+
+
+def create_store(url: str, max_bytes: Optional[int] = RESPONSE_CACHE_MAX_BYTES):
+    """An S3Store for s3://bucket/prefix, otherwise a DiskStore rooted at ``url``"""
+    if url.startswith('s3://'):
+        bucket, _, prefix = url[len('s3://'):].partition('/')
+        return S3Store(bucket, prefix)
+    return DiskStore(url, max_bytes)
+
+
+def create_cache(url: str = RESPONSE_CACHE_URL) -> ResponseCache:
+    """Builds the cache RESPONSE_CACHE_URL describes; an empty URL disables it"""
+    return ResponseCache(create_store(url)) if url else ResponseCache()
@@ -1,55 +1,423 @@
+import codecs
+import csv
+import functools
 import json
 import logging
 import os
 import asyncio
+import time
 import aiohttp
 import asyncpg
+import archive
+import cache
+from collections import deque
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from itertools import islice
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Awaitable, Callable, Optional, Tuple
 import sys
-from dotenv import load_dotenv
-from dateutil import parser
-import pytz
+import metrics
+import migrations
+import offload
+import partitions
+from migrations import CHILD_TABLE_NATURAL_KEYS
+from timestamps import parse_date, parse_utc
+from transforms import (
+    EXOPLANET_COLUMNS, EXOPLANET_CSV_FIELDS, GP_COLUMNS, SAT_CAT_COLUMNS, ConvertedBatch,
+    content_hash, convert_exoplanet_rows, convert_gp_batch, convert_gp_item, convert_satcat_batch,
+    convert_satcat_item, with_content_hash
+)
+
+# AWS sets this in every Lambda execution environment
+RUNNING_IN_LAMBDA = 'AWS_LAMBDA_FUNCTION_NAME' in os.environ
+
+# Load environment variables from .env when run locally; Lambda gets them from its configuration
+if not RUNNING_IN_LAMBDA:
+    from dotenv import load_dotenv
+    load_dotenv()
 
-# Configure logging
+# Configure logging. Lambda already captures the stream output and its filesystem
+# is read-only outside /tmp, so the log file is only written locally unless LOG_FILE is set.
+LOG_FILE = os.getenv('LOG_FILE', '' if RUNNING_IN_LAMBDA else 'nasa_data.log')
+log_handlers = [logging.StreamHandler()]
+if LOG_FILE:
+    log_handlers.insert(0, logging.FileHandler(LOG_FILE))
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('nasa_data.log'),
-        logging.StreamHandler()
-    ]
+    handlers=log_handlers
 )
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# Number of decoded array elements handed to the database writer at a time
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', '5000'))
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Batches buffered between pipeline stages before the upstream stage waits
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '2'))
+
+# Shared HTTP client tuning
+HTTP_CONNECTION_LIMIT = int(os.getenv('HTTP_CONNECTION_LIMIT', '32'))
+HTTP_CONNECTION_LIMIT_PER_HOST = int(os.getenv('HTTP_CONNECTION_LIMIT_PER_HOST', '4'))
+HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL', '300'))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '30'))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '15'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '120'))
+HTTP_TOTAL_TIMEOUT = float(os.getenv('HTTP_TOTAL_TIMEOUT', '840'))
+
+# Space-Track.org request limits as (requests, seconds) windows
+SPACE_TRACK_RATE_LIMITS = [
+    (int(os.getenv('SPACE_TRACK_REQUESTS_PER_MINUTE', '30')), 60),
+    (int(os.getenv('SPACE_TRACK_REQUESTS_PER_HOUR', '300')), 3600),
+]
+
+# SATCAT is downloaded as NORAD_CAT_ID ranges of this many ids, this many at a time
+SATCAT_PAGE_SIZE = int(os.getenv('SATCAT_PAGE_SIZE', '10000'))
+SATCAT_FETCH_CONCURRENCY = int(os.getenv('SATCAT_FETCH_CONCURRENCY', '3'))
+# Quarantined SATCAT records are purged this many days after they were first
+# rejected; one still failing is quarantined again on its next run. 0 keeps them.
+SAT_CAT_REJECTS_RETENTION_DAYS = int(os.getenv('SAT_CAT_REJECTS_RETENTION_DAYS', '30'))
+
+# api.nasa.gov request limits per API key as (requests, seconds) windows, shared by NeoWs and DONKI
+NASA_RATE_LIMITS = [
+    (int(os.getenv('NASA_REQUESTS_PER_HOUR', '1000')), 3600),
+]
+
+# Days of close approaches a NeoWs run covers, and how many 7-day feed windows are fetched at once
+NEOWS_REFRESH_DAYS = int(os.getenv('NEOWS_REFRESH_DAYS', '7'))
+NEOWS_FETCH_CONCURRENCY = int(os.getenv('NEOWS_FETCH_CONCURRENCY', '4'))
+
+# DONKI sources are re-fetched from their last watermark minus this overlap
+DONKI_WATERMARK_OVERLAP = timedelta(days=int(os.getenv('DONKI_WATERMARK_OVERLAP_DAYS', '3')))
+
+# Seconds a warm Lambda invocation waits for the cached pool to answer
+HEALTH_CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT', '5'))
+
+# Ignore the stored GP watermark and download the whole catalog
+GP_FULL_RESYNC = os.getenv('GP_FULL_RESYNC', '').lower() in ('1', 'true', 'yes')
+
+# 'csv' streams the Exoplanet Archive result as CSV and converts it column by
+# column (see process_exoplanet_csv); 'json' decodes one dict per planet
+EXOPLANET_FORMAT = os.getenv('EXOPLANET_FORMAT', 'json')
 
 # Utility Functions
-def parse_datetime(date_string):
-    """Parse datetime with or without microseconds."""
+async def iter_json_array(response: aiohttp.ClientResponse,
+                          batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[Any]]:
+    """
+    Incrementally decodes a top-level JSON array from a response body.
+
+    Elements are decoded as chunks arrive and yielded in lists of at most
+    ``batch_size``, so the full body is never held in memory. Bytes are
+    counted as received unless the body comes from the response cache.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    position = 0
+    started = finished = False
+    batch = []
+
+    from_cache = getattr(response, 'from_cache', False)
+    chunks = response.content.iter_chunked(STREAM_CHUNK_SIZE)
+    at_eof = False
+    while not finished:
+        try:
+            chunk = await chunks.__anext__()
+            if not from_cache:
+                metrics.record_bytes(len(chunk))
+            buffer = buffer[position:] + text_decoder.decode(chunk)
+        except StopAsyncIteration:
+            at_eof = True
+            buffer = buffer[position:] + text_decoder.decode(b'', final=True)
+        position = 0
+
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position >= len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError(f"Expected a JSON array, got: {buffer[position:position + 200]!r}")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                finished = True
+                break
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if at_eof:
+                    raise
+                break
+            # An element must be followed by a delimiter: a number cut at the
+            # buffer edge ('-0.' of '-0.5') decodes as a shorter number
+            if end == len(buffer) or buffer[end] not in ' \t\r\n,]':
+                if not at_eof:
+                    break
+                if end < len(buffer):
+                    raise ValueError(f"Unexpected data after JSON array element: {buffer[end:end + 200]!r}")
+            position = end
+            batch.append(element)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if at_eof and not finished:
+            raise ValueError("Unexpected end of JSON array")
+
+    if batch:
+        yield batch
+
+async def iter_csv_rows(response: aiohttp.ClientResponse, expected_header: Optional[List[str]] = None,
+                        batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[List[str]]]:
+    """
+    Incrementally parses a CSV response body into lists of at most
+    ``batch_size`` rows of strings, excluding the header line. Raises
+    ValueError if the header isn't ``expected_header``.
+
+    Lines are only handed to the csv module once their quotes balance, so a
+    quoted field spanning lines is never split between batches. As in
+    iter_json_array, bytes from the response cache aren't counted.
+    """
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    pending = ''
+    # Complete lines of the batch being collected, and the quote count of its unfinished record
+    lines = []
+    quotes = 0
+    header = None
+
+    def parse(batch_lines):
+        nonlocal header
+        rows = [row for row in csv.reader(batch_lines) if row]
+        if header is None and rows:
+            header = [name.strip() for name in rows.pop(0)]
+            if expected_header is not None and header != expected_header:
+                raise ValueError(f"Unexpected CSV header: {header}")
+        return rows
+
+    from_cache = getattr(response, 'from_cache', False)
+    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+        if not from_cache:
+            metrics.record_bytes(len(chunk))
+        *complete, pending = (pending + text_decoder.decode(chunk)).split('\n')
+        for line in complete:
+            # Kept terminated, so the csv module keeps newlines inside quoted fields
+            lines.append(line + '\n')
+            quotes += line.count('"')
+            if quotes % 2 == 0:
+                quotes = 0
+                if len(lines) >= batch_size:
+                    if rows := parse(lines):
+                        yield rows
+                    lines = []
+    pending += text_decoder.decode(b'', final=True)
+    if pending:
+        lines.append(pending)
+        quotes += pending.count('"')
+    if quotes % 2:
+        raise ValueError("Unexpected end of CSV inside a quoted field")
+    if rows := parse(lines):
+        yield rows
+
+def cached_get(response_cache: cache.ResponseCache, source: str, session: aiohttp.ClientSession, url: str,
+               params: Optional[Dict[str, Any]] = None, rate_limiter: Optional['RateLimiter'] = None):
+    """
+    GETs ``url`` through ``response_cache`` (see cache.py), as an async
+    context manager yielding the response. ``rate_limiter`` is only waited on
+    when a request is actually sent upstream.
+    """
+    @asynccontextmanager
+    async def send(headers: Dict[str, str]):
+        if rate_limiter:
+            await rate_limiter.acquire()
+        async with session.get(url, params=params, headers=headers) as response:
+            yield response
+
+    return response_cache.fetch(source, url, params, send)
+
+def create_http_session(trace_configs: Optional[List[aiohttp.TraceConfig]] = None) -> aiohttp.ClientSession:
+    """
+    Creates the HTTP session shared by every API client in a run.
+
+    Connections are pooled per host and kept alive, and DNS lookups are
+    cached, so concurrent fetchers reuse sockets and TLS sessions instead of
+    each paying for its own handshakes. Must be called from a running loop.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_CONNECTION_LIMIT,
+        limit_per_host=HTTP_CONNECTION_LIMIT_PER_HOST,
+        use_dns_cache=True,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=HTTP_TOTAL_TIMEOUT,
+        sock_connect=HTTP_CONNECT_TIMEOUT,
+        sock_read=HTTP_READ_TIMEOUT
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=trace_configs)
+
+class RateLimiter:
+    """
+    Token-bucket request scheduler enforcing several (requests, seconds) limits.
+
+    Each window starts with a full bucket and every token is returned exactly
+    one window after it was spent, so requests are released as fast as every
+    limit allows and never faster. Waiters are served in arrival order.
+    """
+    def __init__(self, limits: List[Tuple[int, float]]):
+        self.limits = limits
+        self._spent = [deque() for _ in limits]
+        self._lock = None
+
+    async def acquire(self):
+        """Waits until a request may be sent and spends a token from every bucket"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = 0.0
+                for (capacity, period), spent in zip(self.limits, self._spent):
+                    while spent and spent[0] <= now - period:
+                        spent.popleft()
+                    if len(spent) >= capacity:
+                        wait = max(wait, spent[0] + period - now)
+                if wait <= 0:
+                    for spent in self._spent:
+                        spent.append(now)
+                    return
+                logger.debug(f"Rate limit reached, waiting {wait:.1f}s")
+                await asyncio.sleep(wait)
+
+class _PipelineDone:
+    """Queue marker sent downstream when a stage ends; carries its error, if any"""
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+async def run_pipeline(batches: AsyncIterator[List[Any]],
+                       transform: Callable[[List[Any]], Any],
+                       write: Callable[[Any], Awaitable[int]],
+                       queue_size: int = PIPELINE_QUEUE_SIZE,
+                       executor: Optional[Executor] = None) -> int:
+    """
+    Runs fetch, transform and write as concurrent stages joined by bounded
+    queues, so a batch is written while the next ones are still downloading
+    and being converted. A full queue blocks the stage feeding it, which in
+    turn stops reading from the socket. A failure in any stage stops the
+    pipeline and is raised here. Returns the sum of ``write`` results.
+
+    With an ``executor`` (see offload.py) up to TRANSFORM_WORKERS batches are
+    transformed at once off the event loop, and handed to the writer in fetch
+    order. ``transform`` must then be picklable and only use its argument.
+    """
+    raw_queue = asyncio.Queue(maxsize=queue_size)
+    ready_queue = asyncio.Queue(maxsize=queue_size)
+
+    async def fetch_stage():
+        iterator = batches.__aiter__()
+        while True:
+            try:
+                with metrics.stage('fetch') as fetch_metrics:
+                    batch = await iterator.__anext__()
+                    fetch_metrics.rows_out += len(batch)
+            except StopAsyncIteration:
+                await raw_queue.put(_PipelineDone())
+                return
+            except Exception as e:
+                await raw_queue.put(_PipelineDone(e))
+                return
+            await raw_queue.put(batch)
+
+    async def transform_stage():
+        loop = asyncio.get_running_loop()
+        # (batch size, future) for batches handed to the executor, oldest first
+        in_flight = deque()
+
+        async def transform_inline(batch):
+            return transform(batch)
+
+        async def converted(batch_size, result: Awaitable):
+            # With an executor this is the time the pipeline waited on the oldest batch
+            with metrics.stage('transform') as transform_metrics:
+                ready = await result
+                transform_metrics.rows_in += batch_size
+                transform_metrics.rows_out += len(ready)
+                # Rows merged away as duplicates aren't rejects
+                transform_metrics.rows_rejected += len(getattr(ready, 'rejected', ()))
+            return ready
+
+        try:
+            while True:
+                while in_flight and (in_flight[0][1].done() or len(in_flight) >= offload.TRANSFORM_WORKERS):
+                    await ready_queue.put(await converted(*in_flight.popleft()))
+                if isinstance(batch := await raw_queue.get(), _PipelineDone):
+                    break
+                if executor:
+                    in_flight.append((len(batch), loop.run_in_executor(executor, transform, batch)))
+                else:
+                    await ready_queue.put(await converted(len(batch), transform_inline(batch)))
+            while in_flight:
+                await ready_queue.put(await converted(*in_flight.popleft()))
+        except Exception as e:
+            await ready_queue.put(_PipelineDone(e))
+            return
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+        await ready_queue.put(batch)
+
+    stages = [asyncio.create_task(fetch_stage()), asyncio.create_task(transform_stage())]
+    written = 0
     try:
-        # Try parsing with microseconds
-        return datetime.strptime(date_string, '%Y-%m-%dT%H:%M:%S.%f')
-    except ValueError:
-        # Fallback to parsing without microseconds
-        return datetime.strptime(date_string, '%Y-%m-%dT%H:%M:%S')
-
-def get_date_range():
-    """Returns start date and end date for API queries (30 day range)"""
+        while not isinstance(item := await ready_queue.get(), _PipelineDone):
+            with metrics.stage('write') as write_metrics:
+                batch_written = await write(item)
+                write_metrics.rows_in += len(item)
+                write_metrics.rows_out += batch_written
+            written += batch_written
+        if item.error:
+            raise item.error
+    finally:
+        # Unblocks upstream stages when the writer stops early
+        for stage in stages:
+            stage.cancel()
+        await asyncio.gather(*stages, return_exceptions=True)
+        aclose = getattr(batches, 'aclose', None)
+        if aclose:
+            await aclose()
+    return written
+
+def get_date_range(start_date: str = None):
+    """
+    Returns start date and end date for API queries. Without an explicit
+    start date the range covers the last 30 days.
+    """
     end_date = datetime.now()
+    if start_date:
+        return start_date, end_date.strftime('%Y-%m-%d')
     start_date = end_date - timedelta(days=30)
     return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
 
 class NASANeoWsAPI:
     """NASA Near Earth Objects Web Service API implementation"""
-    def __init__(self):
+    # The feed endpoint rejects ranges longer than this
+    FEED_WINDOW_DAYS = 7
+
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[cache.ResponseCache] = None):
         self.api_key = os.getenv('NASA_API_KEY')
         if not self.api_key:
             raise ValueError("NASA_API_KEY environment variable not set.")
         self.base_url = "https://api.nasa.gov/neo/rest/v1/feed"
+        self.rate_limiter = rate_limiter or RateLimiter(NASA_RATE_LIMITS)
+        self.response_cache = response_cache or cache.ResponseCache()
 
-    async def fetch_data(self, session: aiohttp.ClientSession, start_date: str = None) -> Dict[str, Any]:
+    async def fetch_data(self, session: aiohttp.ClientSession, start_date: str = None,
+                         end_date: str = None) -> Dict[str, Any]:
         """Fetches NEO data from NASA API asynchronously"""
         if not start_date:
             start_date = datetime.now().strftime('%Y-%m-%d')
@@ -57,8 +425,11 @@ class NASANeoWsAPI:
             'start_date': start_date,
             'api_key': self.api_key
         }
+        if end_date:
+            params['end_date'] = end_date
         try:
-            async with session.get(self.base_url, params=params) as response:
+            async with cached_get(self.response_cache, 'neows', session, self.base_url, params,
+                                  self.rate_limiter) as response:
                 response.raise_for_status()
                 data = await response.json()
                 logger.info(f"Fetched NEO data for date: {start_date}")
@@ -67,29 +438,74 @@ class NASANeoWsAPI:
             logger.error(f"Error fetching NEO data: {str(e)}")
             raise
 
+    @classmethod
+    def feed_windows(cls, start_date: str, end_date: str) -> List[Tuple[str, str]]:
+        """Splits an inclusive date range into the (start, end) windows the feed accepts"""
+        start, end = parse_date(start_date), parse_date(end_date)
+        windows = []
+        while start <= end:
+            window_end = min(start + timedelta(days=cls.FEED_WINDOW_DAYS - 1), end)
+            windows.append((start.isoformat(), window_end.isoformat()))
+            start = window_end + timedelta(days=1)
+        return windows
+
+    async def stream_range(self, session: aiohttp.ClientSession, start_date: str, end_date: str,
+                           concurrency: int = NEOWS_FETCH_CONCURRENCY) -> AsyncIterator[List[Tuple[str, Dict[str, Any]]]]:
+        """
+        Fetches an inclusive date range of any length as 7-day feed windows,
+        up to ``concurrency`` at a time, and yields each window's
+        (date, raw NEO) pairs as soon as it arrives. A new window is only
+        requested once a finished one has been handed on and the consumer
+        asks for the next, so at most ``concurrency`` windows are fetching or
+        waiting to be consumed at any time.
+        """
+        windows = iter(self.feed_windows(start_date, end_date))
+
+        async def fetch_window(window_start, window_end):
+            data = await self.fetch_data(session, window_start, window_end)
+            return [(date, neo) for date, neo_list in data.get('near_earth_objects', {}).items() for neo in neo_list]
+
+        pending = {asyncio.create_task(fetch_window(*window)) for window in islice(windows, concurrency)}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+                    # Refilled only now, so at most ``concurrency`` windows are in flight or held
+                    for window in islice(windows, 1):
+                        pending.add(asyncio.create_task(fetch_window(*window)))
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def sanitize_neo(self, date: str, neo: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Sanitizes one NEO listed under ``date``; None if it has no close approach data"""
+        if not neo.get('close_approach_data'):
+            logger.warning(f"No close approach data for NEO {neo['id']}")
+            return None
+        return {
+            'id': neo['id'],
+            'name': neo['name'],
+            'date': date,
+            'estimated_diameter_km': neo['estimated_diameter']['kilometers']['estimated_diameter_max'],
+            'is_potentially_hazardous': neo['is_potentially_hazardous_asteroid'],
+            'close_approach_data': [{
+                'close_approach_date': approach['close_approach_date'],
+                'relative_velocity_kph': float(approach['relative_velocity']['kilometers_per_hour']),
+                'miss_distance_km': float(approach['miss_distance']['kilometers'])
+            } for approach in neo['close_approach_data']]
+        }
+
     def sanitize_data(self, raw_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Sanitizes and transforms NEO data"""
-        sanitized_data = []
         try:
+            sanitized_data = []
             for date, neo_list in raw_data.get('near_earth_objects', {}).items():
                 for neo in neo_list:
-                    estimated_diameter_km = neo['estimated_diameter']['kilometers']['estimated_diameter_max']
-                    if not neo.get('close_approach_data'):
-                        logger.warning(f"No close approach data for NEO {neo['id']}")
-                        continue
-                    sanitized_neo = {
-                        'id': neo['id'],
-                        'name': neo['name'],
-                        'date': date,
-                        'estimated_diameter_km': estimated_diameter_km,
-                        'is_potentially_hazardous': neo['is_potentially_hazardous_asteroid'],
-                        'close_approach_data': [{
-                            'close_approach_date': approach['close_approach_date'],
-                            'relative_velocity_kph': float(approach['relative_velocity']['kilometers_per_hour']),
-                            'miss_distance_km': float(approach['miss_distance']['kilometers'])
-                        } for approach in neo['close_approach_data']]
-                    }
-                    sanitized_data.append(sanitized_neo)
+                    sanitized_neo = self.sanitize_neo(date, neo)
+                    if sanitized_neo:
+                        sanitized_data.append(sanitized_neo)
             return sanitized_data
         except Exception as e:
             logger.error(f"Error sanitizing NEO data: {str(e)}")
@@ -97,22 +513,26 @@ class NASANeoWsAPI:
 
 class DONKICMEAPI:
     """NASA DONKI CME API implementation"""
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[cache.ResponseCache] = None):
         self.api_key = os.getenv('NASA_API_KEY')
         if not self.api_key:
             raise ValueError("NASA_API_KEY environment variable not set.")
         self.base_url = "https://api.nasa.gov/DONKI/CME"
+        self.rate_limiter = rate_limiter or RateLimiter(NASA_RATE_LIMITS)
+        self.response_cache = response_cache or cache.ResponseCache()
 
     async def fetch_data(self, session: aiohttp.ClientSession, start_date: str = None) -> List[Dict[str, Any]]:
         """Fetches CME data from NASA DONKI API asynchronously"""
-        start_date, end_date = get_date_range()
+        start_date, end_date = get_date_range(start_date)
         params = {
             'startDate': start_date,
             'endDate': end_date,
             'api_key': self.api_key
         }
         try:
-            async with session.get(self.base_url, params=params) as response:
+            async with cached_get(self.response_cache, DONKI_CME_SOURCE, session, self.base_url, params,
+                                  self.rate_limiter) as response:
                 response.raise_for_status()
                 data = await response.json()
                 logger.info(f"Fetched DONKI CME data for date: {start_date}")
@@ -156,26 +576,29 @@ class DONKICMEAPI:
     
 class GeostormAPI:
     """NASA DONKI Geomagnetic Storm API implementation"""
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[cache.ResponseCache] = None):
         self.api_key = os.getenv('NASA_API_KEY')
         if not self.api_key:
             raise ValueError("NASA_API_KEY environment variable not set.")
         self.base_url = "https://api.nasa.gov/DONKI/GST"
+        self.rate_limiter = rate_limiter or RateLimiter(NASA_RATE_LIMITS)
+        self.response_cache = response_cache or cache.ResponseCache()
 
     async def fetch_data(self, session: aiohttp.ClientSession, start_date: str = None) -> List[Dict[str, Any]]:
         """Fetches Geomagnetic Storm data from NASA DONKI API asynchronously"""
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = "2010-01-01"  # Fixed start date
+        start_date, end_date = get_date_range(start_date)
         params = {
             'startDate': start_date,
             'endDate': end_date,
             'api_key': self.api_key
         }
         try:
-            async with session.get(self.base_url, params=params) as response:
+            async with cached_get(self.response_cache, DONKI_GST_SOURCE, session, self.base_url, params,
+                                  self.rate_limiter) as response:
                 response.raise_for_status()
                 data = await response.json()
-                logger.info(f"Fetched DONKI Geostorm data from 2010 to {end_date}")
+                logger.info(f"Fetched DONKI Geostorm data from {start_date} to {end_date}")
                 return data
         except Exception as e:
             logger.error(f"Error fetching DONKI Geostorm data: {str(e)}")
@@ -238,22 +661,26 @@ class GeostormAPI:
 
 class SolarFlareAPI:
     """NASA DONKI Solar Flare API implementation"""
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[cache.ResponseCache] = None):
         self.api_key = os.getenv('NASA_API_KEY')
         if not self.api_key:
             raise ValueError("NASA_API_KEY environment variable not set.")
         self.base_url = "https://api.nasa.gov/DONKI/FLR"
+        self.rate_limiter = rate_limiter or RateLimiter(NASA_RATE_LIMITS)
+        self.response_cache = response_cache or cache.ResponseCache()
 
     async def fetch_data(self, session: aiohttp.ClientSession, start_date: str = None) -> List[Dict[str, Any]]:
         """Fetches Solar Flare data from NASA DONKI API asynchronously"""
-        start_date, end_date = get_date_range()
+        start_date, end_date = get_date_range(start_date)
         params = {
             'startDate': start_date,
             'endDate': end_date,
             'api_key': self.api_key
         }
         try:
-            async with session.get(self.base_url, params=params) as response:
+            async with cached_get(self.response_cache, DONKI_FLR_SOURCE, session, self.base_url, params,
+                                  self.rate_limiter) as response:
                 response.raise_for_status()
                 data = await response.json()
                 logger.info(f"Fetched DONKI Solar Flare data for date: {start_date}")
@@ -315,22 +742,26 @@ class SolarFlareAPI:
 
 class HighSpeedStreamAPI:
     """NASA DONKI High Speed Stream API implementation"""
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[cache.ResponseCache] = None):
         self.api_key = os.getenv('NASA_API_KEY')
         if not self.api_key:
             raise ValueError("NASA_API_KEY environment variable not set.")
         self.base_url = "https://api.nasa.gov/DONKI/HSS"
+        self.rate_limiter = rate_limiter or RateLimiter(NASA_RATE_LIMITS)
+        self.response_cache = response_cache or cache.ResponseCache()
 
     async def fetch_data(self, session: aiohttp.ClientSession, start_date: str = None) -> List[Dict[str, Any]]:
         """Fetches High Speed Stream data from NASA DONKI API asynchronously"""
-        start_date, end_date = get_date_range()
+        start_date, end_date = get_date_range(start_date)
         params = {
             'startDate': start_date,
             'endDate': end_date,
             'api_key': self.api_key
         }
         try:
-            async with session.get(self.base_url, params=params) as response:
+            async with cached_get(self.response_cache, DONKI_HSS_SOURCE, session, self.base_url, params,
+                                  self.rate_limiter) as response:
                 response.raise_for_status()
                 data = await response.json()
                 logger.info(f"Fetched DONKI HSS data for date: {start_date}")
@@ -368,8 +799,9 @@ class HighSpeedStreamAPI:
 class NASAExoplanetAPI:
     """NASA Exoplanet Archive API implementation."""
 
-    def __init__(self):
+    def __init__(self, response_cache: Optional[cache.ResponseCache] = None):
         self.base_url = "https://exoplanetarchive.ipac.caltech.edu/TAP/sync"
+        self.response_cache = response_cache or cache.ResponseCache()
 
     async def fetch_data(self, session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
         """
@@ -392,7 +824,7 @@ class NASAExoplanetAPI:
         }
 
         try:
-            async with session.get(self.base_url, params=params) as response:
+            async with cached_get(self.response_cache, 'exoplanets', session, self.base_url, params) as response:
                 response.raise_for_status()
                 if 'application/json' in response.headers.get('Content-Type', ''):
                     data = await response.json()
@@ -404,6 +836,31 @@ class NASAExoplanetAPI:
             logger.error(f"Error fetching Exoplanet data: {str(e)}")
             raise
 
+    async def stream_csv_rows(self, session: aiohttp.ClientSession,
+                              batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[List[str]]]:
+        """
+        Streams the same query as CSV, in batches of rows with one string per
+        EXOPLANET_CSV_FIELDS column, as the response arrives.
+        """
+        params = {
+            'query': f"SELECT {', '.join(EXOPLANET_CSV_FIELDS)} FROM pscomppars",
+            'format': 'csv'
+        }
+        try:
+            async with cached_get(self.response_cache, 'exoplanets', session, self.base_url, params) as response:
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '')
+                if 'csv' not in content_type and 'text/plain' not in content_type:
+                    raise ValueError(f"Unexpected content type: {content_type}.")
+                total = 0
+                async for rows in iter_csv_rows(response, EXOPLANET_CSV_FIELDS, batch_size):
+                    total += len(rows)
+                    yield rows
+                logger.info(f"Streamed {total} Exoplanet records as CSV.")
+        except Exception as e:
+            logger.error(f"Error streaming Exoplanet data: {str(e)}")
+            raise
+
     def sanitize_data(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Sanitize and transform Exoplanet data.
@@ -460,59 +917,127 @@ class NASAExoplanetAPI:
 
 
 class SpaceTrackAPI:
-    """Space-Track.org API implementation"""
-    def __init__(self):
+    """
+    Space-Track.org API implementation.
+
+    Logs in once per HTTP session and keeps the session cookie, re-authenticating
+    only when it expires. Every request, including the login, is scheduled
+    through a RateLimiter configured with Space-Track's published limits.
+    Queries go through a ResponseCache, so one answered from it costs neither
+    a request nor a login.
+    """
+    def __init__(self, rate_limiter: RateLimiter = None, response_cache: Optional[cache.ResponseCache] = None):
         self.username = os.getenv('SPACE_TRACK_USERNAME')
         self.password = os.getenv('SPACE_TRACK_PASSWORD')
         if not all([self.username, self.password]):
             raise ValueError("SPACE_TRACK credentials not set in environment variables.")
         self.base_url = "https://www.space-track.org"
+        self.rate_limiter = rate_limiter or RateLimiter(SPACE_TRACK_RATE_LIMITS)
+        self.response_cache = response_cache or cache.ResponseCache()
+        self._authenticated_session = None
+        self._auth_lock = None
 
-    async def fetch_satcat_data(self, session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
-        """Fetches satellite catalog data asynchronously"""
+    async def _login(self, session: aiohttp.ClientSession):
+        """Authenticates the session with Space-Track.org"""
         auth_url = f"{self.base_url}/ajaxauth/login"
-        query_url = f"{self.base_url}/basicspacedata/query/class/satcat"
         credentials = {
             'identity': self.username,
             'password': self.password
         }
-
+        await self.rate_limiter.acquire()
+        async with session.post(auth_url, data=credentials) as auth_response:
+            auth_response.raise_for_status()
+            # A rejected login still answers 200 with a JSON failure notice
+            if 'Failed' in await auth_response.text():
+                raise ValueError("Space-Track.org rejected the supplied credentials.")
+            logger.info("Authenticated with Space-Track.org")
+
+    async def _ensure_authenticated(self, session: aiohttp.ClientSession, stale: bool = False):
+        """Logs in unless this session already holds a valid cookie"""
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        async with self._auth_lock:
+            if stale and self._authenticated_session is session:
+                self._authenticated_session = None
+            if self._authenticated_session is not session:
+                await self._login(session)
+                self._authenticated_session = session
+
+    def _query(self, session: aiohttp.ClientSession, query_url: str, source: str):
+        """Yields the response to a query, from the response cache or a rate-limited, authenticated GET"""
+        return self.response_cache.fetch(source, query_url, None, functools.partial(self._send, session, query_url))
+
+    @asynccontextmanager
+    async def _send(self, session: aiohttp.ClientSession, query_url: str, headers: Dict[str, str]):
+        """Issues a rate-limited, authenticated GET and yields the response"""
+        await self._ensure_authenticated(session)
+        await self.rate_limiter.acquire()
+        response = await session.get(query_url, headers=headers)
         try:
-            async with session.post(auth_url, data=credentials) as auth_response:
-                auth_response.raise_for_status()
-                logger.info("Authenticated with Space-Track.org")
+            if response.status == 401:
+                # Session cookie expired; log in again and retry once
+                response.release()
+                await self._ensure_authenticated(session, stale=True)
+                await self.rate_limiter.acquire()
+                response = await session.get(query_url, headers=headers)
+            response.raise_for_status()
+            yield response
+        finally:
+            response.release()
 
-            async with session.get(query_url) as response:
-                response.raise_for_status()
-                data = await response.json()
-                logger.info("Fetched satellite catalog data")
-                return data
+    async def _stream_query(self, session: aiohttp.ClientSession, query_url: str, source: str, label: str,
+                            batch_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Streams a Space-Track query result in batches of decoded records"""
+        try:
+            async with self._query(session, query_url, source) as response:
+                total = 0
+                async for batch in iter_json_array(response, batch_size):
+                    total += len(batch)
+                    yield batch
+                logger.info(f"Streamed {total} {label} records")
         except Exception as e:
-            logger.error(f"Error fetching SatCat data: {str(e)}")
+            logger.error(f"Error streaming {label} data: {str(e)}")
             raise
 
-    async def fetch_gp_data(self, session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
-        """Fetches GP data asynchronously"""
-        auth_url = f"{self.base_url}/ajaxauth/login"
-        query_url = f"{self.base_url}/basicspacedata/query/class/gp"
-        credentials = {
-            'identity': self.username,
-            'password': self.password
-        }
+    async def fetch_max_norad_cat_id(self, session: aiohttp.ClientSession) -> int:
+        """Highest NORAD_CAT_ID in the satellite catalog, 0 if it is empty"""
+        query_url = (f"{self.base_url}/basicspacedata/query/class/satcat"
+                     f"/orderby/NORAD_CAT_ID desc/limit/1/predicates/NORAD_CAT_ID/format/json")
+        async with self._query(session, query_url, 'satcat') as response:
+            data = await response.json()
+        return int(data[0]['NORAD_CAT_ID']) if data else 0
 
-        try:
-            async with session.post(auth_url, data=credentials) as auth_response:
-                auth_response.raise_for_status()
-                logger.info("Authenticated with Space-Track.org")
+    @staticmethod
+    def satcat_pages(max_norad_cat_id: int, page_size: int = SATCAT_PAGE_SIZE) -> List[Tuple[int, int]]:
+        """Inclusive NORAD_CAT_ID ranges of ``page_size`` ids covering 0..max_norad_cat_id"""
+        return [
+            (first, min(first + page_size - 1, max_norad_cat_id))
+            for first in range(0, max_norad_cat_id + 1, page_size)
+        ]
+
+    def stream_satcat_page(self, session: aiohttp.ClientSession, first_id: int, last_id: int,
+                           batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Streams the catalog entries with NORAD_CAT_ID in [first_id, last_id] in batches"""
+        query_url = (f"{self.base_url}/basicspacedata/query/class/satcat"
+                     f"/NORAD_CAT_ID/{first_id}--{last_id}/orderby/NORAD_CAT_ID asc/format/json")
+        return self._stream_query(session, query_url, 'satcat', f"SatCat {first_id}-{last_id}", batch_size)
+
+    def stream_gp_data(self, session: aiohttp.ClientSession,
+                       batch_size: int = STREAM_BATCH_SIZE,
+                       since_gp_id: Optional[int] = None,
+                       since_creation_date: Optional[datetime] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Streams GP data in batches as the response arrives.
 
-            async with session.get(query_url) as response:
-                response.raise_for_status()
-                data = await response.json()
-                logger.info("Fetched GP data")
-                return data
-        except Exception as e:
-            logger.error(f"Error fetching GP data: {str(e)}")
-            raise
+        When a watermark is given only element sets newer than it are
+        requested; GP_ID is preferred because it increases monotonically.
+        """
+        query_url = f"{self.base_url}/basicspacedata/query/class/gp"
+        if since_gp_id is not None:
+            query_url += f"/GP_ID/>{since_gp_id}/orderby/GP_ID asc"
+        elif since_creation_date is not None:
+            query_url += f"/CREATION_DATE/>{since_creation_date.strftime('%Y-%m-%dT%H:%M:%S')}/orderby/GP_ID asc"
+        return self._stream_query(session, query_url + "/format/json", GP_WATERMARK_SOURCE, 'GP', batch_size)
 
 class DatabaseConnection:
     """Manages PostgreSQL database connections and operations using asyncpg"""
@@ -538,7 +1063,8 @@ class DatabaseConnection:
                 host=self.host,
                 port=self.port,
                 min_size=1,
-                max_size=10
+                max_size=10,
+                connection_class=metrics.InstrumentedConnection
             )
             logger.info(f"Successfully connected to database at {self.host}")
             return pool
@@ -547,298 +1073,330 @@ class DatabaseConnection:
             raise
 
     async def setup_database(self, pool):
-        """Creates necessary database tables if they don't exist"""
-        create_enum_sql = """
-        DO $$ 
-        BEGIN
-            IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'current_enum') THEN
-                CREATE TYPE current_enum AS ENUM ('Y', 'N');
-            END IF;
-        END $$;
-        """
-        
-        create_tables_sql = """
-        CREATE TABLE IF NOT EXISTS neo_objects (
-            id VARCHAR(50) PRIMARY KEY,
-            name VARCHAR(255),
-            observation_date DATE,
-            estimated_diameter_km DOUBLE PRECISION,
-            is_potentially_hazardous BOOLEAN,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS neo_approaches (
-            id SERIAL PRIMARY KEY,
-            neo_id VARCHAR(50) REFERENCES neo_objects(id),
-            close_approach_date DATE,
-            relative_velocity_kph DOUBLE PRECISION,
-            miss_distance_km DOUBLE PRECISION,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS donki_cme (
-            id SERIAL PRIMARY KEY,
-            activity_id VARCHAR(50) UNIQUE,
-            catalog VARCHAR(50),
-            start_time TIMESTAMP,
-            source_location VARCHAR(50),
-            active_region_num VARCHAR(50),
-            link TEXT,
-            note TEXT,
-            latitude FLOAT,
-            longitude FLOAT,
-            half_angle FLOAT,
-            speed FLOAT,
-            type VARCHAR(50),
-            level_of_data INTEGER,
-            completion_time TIMESTAMP,
-            is_most_accurate BOOLEAN,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS donki_geostorm (
-            id SERIAL PRIMARY KEY,
-            gst_id VARCHAR(50) UNIQUE,
-            start_time TIMESTAMP,
-            link TEXT,
-            submission_time TIMESTAMP,
-            version_id INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS geostorm_kp_index (
-            id SERIAL PRIMARY KEY,
-            gst_id VARCHAR(50) REFERENCES donki_geostorm(gst_id),
-            observed_time TIMESTAMP,
-            kp_index FLOAT,
-            source VARCHAR(50),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS donki_solar_flare (
-            id SERIAL PRIMARY KEY,
-            flare_id VARCHAR(50) UNIQUE,
-            begin_time TIMESTAMP,
-            peak_time TIMESTAMP,
-            end_time TIMESTAMP,
-            class_type VARCHAR(10),
-            source_location VARCHAR(50),
-            active_region_num INTEGER,
-            link TEXT,
-            note TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS solar_flare_instruments (
-            id SERIAL PRIMARY KEY,
-            flare_id VARCHAR(50) REFERENCES donki_solar_flare(flare_id),
-            instrument_name VARCHAR(100),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS donki_hss (
-            id SERIAL PRIMARY KEY,
-            hss_id VARCHAR(50) UNIQUE,
-            event_time TIMESTAMP,
-            link TEXT,
-            submission_time TIMESTAMP,
-            version_id INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS hss_instruments (
-            id SERIAL PRIMARY KEY,
-            hss_id VARCHAR(50) REFERENCES donki_hss(hss_id),
-            instrument_name VARCHAR(100),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS exoplanets (
-            planet_name VARCHAR(255) UNIQUE NOT NULL,
-            host_star VARCHAR(255),
-            discovery_method VARCHAR(255),
-            orbital_period DOUBLE PRECISION,
-            planet_radius DOUBLE PRECISION,
-            mass DOUBLE PRECISION,
-            semi_major_axis DOUBLE PRECISION,
-            discovery_year INTEGER,
-            orbital_eccentricity DOUBLE PRECISION,
-            insolation_flux DOUBLE PRECISION,
-            equilibrium_temp DOUBLE PRECISION,
-            density DOUBLE PRECISION,
-            star_temp DOUBLE PRECISION,
-            star_radius DOUBLE PRECISION,
-            star_mass DOUBLE PRECISION,
-            star_metallicity DOUBLE PRECISION,
-            facility VARCHAR(255),
-            telescope VARCHAR(255),
-            instrument VARCHAR(255),
-            ra_str VARCHAR(50),
-            dec_str VARCHAR(50),
-            controversial BOOLEAN,
-            reference TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS linked_events (
-            id SERIAL PRIMARY KEY,
-            source_id VARCHAR(50),
-            source_type VARCHAR(20),
-            linked_activity_id VARCHAR(50),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS sat_cat (
-            INTLDES char(12) NOT NULL,
-            NORAD_CAT_ID int PRIMARY KEY CHECK (NORAD_CAT_ID >= 0),
-            OBJECT_TYPE varchar(12),
-            SATNAME char(25) NOT NULL,
-            COUNTRY char(6) NOT NULL,
-            LAUNCH_DATE date,
-            SITE char(5),
-            DECAY_DATE date,
-            PERIOD decimal(12,2),
-            INCLINATION decimal(12,2),
-            APOGEE bigint CHECK (APOGEE >= 0),
-            PERIGEE bigint CHECK (PERIGEE >= 0),
-            RCS_VALUE int NOT NULL DEFAULT 0,
-            RCS_SIZE varchar(6),
-            LAUNCH_YEAR smallint NOT NULL DEFAULT 0 CHECK (LAUNCH_YEAR >= 0),
-            LAUNCH_NUM smallint NOT NULL DEFAULT 0 CHECK (LAUNCH_NUM >= 0),
-            LAUNCH_PIECE varchar(3) NOT NULL,
-            CURRENT current_enum NOT NULL DEFAULT 'N',
-            OBJECT_NAME char(25) NOT NULL,
-            OBJECT_ID char(12) NOT NULL,
-            OBJECT_NUMBER int CHECK (OBJECT_NUMBER >= 0),
-            created_at timestamp DEFAULT CURRENT_TIMESTAMP,
-            updated_at timestamp DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS gp (
-            NORAD_CAT_ID character varying PRIMARY KEY,
-            OBJECT_NAME character(1),
-            OBJECT_ID character(1),
-            MEAN_ELEMENT_THEORY character varying,
-            CREATION_DATE timestamp without time zone,
-            EPOCH timestamp without time zone,
-            MEAN_MOTION double precision,
-            ECCENTRICITY double precision,
-            INCLINATION double precision,
-            RA_OF_ASC_NODE double precision,
-            ARG_OF_PERICENTER double precision,
-            MEAN_ANOMALY double precision,
-            BSTAR double precision,
-            MEAN_MOTION_DOT double precision,
-            MEAN_MOTION_DDOT double precision,
-            SEMIMAJOR_AXIS double precision,
-            PERIOD double precision,
-            APOAPSIS double precision,
-            PERIAPSIS double precision,
-            REV_AT_EPOCH bigint,
-            OBJECT_TYPE character varying,
-            COUNTRY_CODE char,
-            RCS_SIZE character varying,
-            LAUNCH_DATE date,
-            DECAY_DATE date,
-            GP_ID integer,
-            TLE_LINE0 character varying,
-            TLE_LINE1 character varying,
-            TLE_LINE2 character varying,
-            created_at timestamp DEFAULT CURRENT_TIMESTAMP,
-            updated_at timestamp DEFAULT CURRENT_TIMESTAMP
-        );
-        """
-
-        create_trigger_sql = """
-        DO $$
-        BEGIN
-            IF NOT EXISTS (
-                SELECT 1
-                FROM pg_trigger
-                WHERE tgname = 'set_updated_at'
-            ) THEN
-                CREATE OR REPLACE FUNCTION update_updated_at_column()
-                RETURNS TRIGGER AS $func$
-                BEGIN
-                    NEW.updated_at = CURRENT_TIMESTAMP;
-                    RETURN NEW;
-                END;
-                $func$ LANGUAGE plpgsql;
-
-                CREATE TRIGGER set_updated_at
-                BEFORE UPDATE ON gp
-                FOR EACH ROW
-                EXECUTE FUNCTION update_updated_at_column();
-            END IF;
-        END;
-        $$ LANGUAGE plpgsql;
-        """
-
+        """Applies any pending schema migrations; a single version check when the schema is current"""
         try:
-            async with pool.acquire() as conn:
-                async with conn.transaction():
-                    await conn.execute(create_enum_sql)
-                    logger.info("Created or verified current_enum type")
-                    await conn.execute(create_tables_sql)
-                    logger.info("Created or verified all required tables")
-                    await conn.execute(create_trigger_sql)
-                    logger.info("Created or verified updated_at trigger")
+            applied = await migrations.migrate(pool)
+            if applied:
+                logger.info(f"Migrated database schema to version {migrations.LATEST_VERSION}")
         except Exception as e:
             logger.error(f"Error setting up database: {str(e)}")
             raise
-async def process_nasa_data(pool, api, date=None):
-    async with aiohttp.ClientSession() as session:
-        raw_data = await api.fetch_data(session, date)
+
+# Ingestion state helpers
+async def get_watermark(connection, source: str) -> Optional[asyncpg.Record]:
+    """Returns the stored (last_timestamp, last_id) watermark for a source, if any"""
+    return await connection.fetchrow(
+        "SELECT last_timestamp, last_id FROM ingestion_state WHERE source = $1", source
+    )
+
+async def set_watermark(connection, source: str, last_timestamp: Optional[datetime], last_id: Optional[int],
+                        force: bool = False):
+    """
+    Advances a source watermark; it never moves backwards unless ``force`` is
+    set, which stores the given values as they are. Runs that read a whole
+    source again (a full resync or a replay) force theirs, so a row they
+    failed to write is fetched again even if an earlier run went past it.
+    """
+    if force:
+        await connection.execute("""
+        INSERT INTO ingestion_state (source, last_timestamp, last_id, updated_at)
+        VALUES ($1, $2, $3, CURRENT_TIMESTAMP)
+        ON CONFLICT (source) DO UPDATE SET
+            last_timestamp = EXCLUDED.last_timestamp,
+            last_id = EXCLUDED.last_id,
+            updated_at = CURRENT_TIMESTAMP
+        """, source, last_timestamp, last_id)
+        return
+    await connection.execute("""
+    INSERT INTO ingestion_state (source, last_timestamp, last_id, updated_at)
+    VALUES ($1, $2, $3, CURRENT_TIMESTAMP)
+    ON CONFLICT (source) DO UPDATE SET
+        last_timestamp = GREATEST(ingestion_state.last_timestamp, EXCLUDED.last_timestamp),
+        last_id = GREATEST(ingestion_state.last_id, EXCLUDED.last_id),
+        updated_at = CURRENT_TIMESTAMP
+    """, source, last_timestamp, last_id)
+
+DONKI_CME_SOURCE = 'donki_cme'
+DONKI_GST_SOURCE = 'donki_gst'
+DONKI_FLR_SOURCE = 'donki_flr'
+DONKI_HSS_SOURCE = 'donki_hss'
+
+async def get_donki_start_date(pool, source: str) -> Optional[str]:
+    """
+    Returns the start date for an incremental DONKI fetch: the last watermark
+    minus an overlap so revised events are picked up again. Returns None when
+    the source has no watermark yet, which selects the default 30 day window.
+    """
+    async with pool.acquire() as connection:
+        with metrics.stage('fetch'):
+            watermark = await get_watermark(connection, source)
+    if watermark and watermark['last_timestamp']:
+        return (watermark['last_timestamp'] - DONKI_WATERMARK_OVERLAP).strftime('%Y-%m-%d')
+    return None
+
+async def advance_donki_watermark(connection, source: str, event_times: List[Optional[datetime]]):
+    """Moves a DONKI watermark to the latest event time written in this run"""
+    latest = max((event_time for event_time in event_times if event_time), default=None)
+    if latest:
+        await set_watermark(connection, source, latest, None)
+
+# Bulk write helpers
+async def count_unchanged(connection, table: str, key_column: str, rows: List[tuple]) -> int:
+    """
+    Counts the rows (key first, content hash last) whose stored content_hash
+    already matches, i.e. the ones an upsert guarded on content_hash will
+    skip, and records them in the write metrics. Call it in the upsert's
+    transaction, before the upsert.
+    """
+    if not rows:
+        return 0
+    unchanged = await connection.fetchval(f"""
+    SELECT count(*)
+    FROM {table} t
+    JOIN unnest($1::varchar[], $2::bytea[]) AS n(key, content_hash)
+        ON t.{key_column} = n.key AND t.content_hash = n.content_hash
+    """, [row[0] for row in rows], [row[-1] for row in rows]) or 0
+    metrics.record_unchanged(unchanged)
+    return unchanged
+
+async def copy_upsert(connection, table: str, columns: List[str], records: List[tuple],
+                      conflict_columns: List[str], touch_columns: List[str] = ()) -> int:
+    """
+    Upserts records through a transaction-scoped staging table.
+
+    Rows are loaded with binary COPY and merged into ``table`` with a single
+    INSERT ... ON CONFLICT statement. Must be called inside a transaction.
+    When the records carry a content_hash column, existing rows with the
+    same hash are left untouched and counted as unchanged. Returns the
+    number of rows inserted or updated.
+    """
+    if not records:
+        return 0
+
+    # asyncpg quotes identifiers for COPY, so names must match the folded catalog names
+    columns = [column.lower() for column in columns]
+    conflict_columns = [column.lower() for column in conflict_columns]
+    staging_table = f"{table}_staging"
+
+    update_assignments = [
+        f"{column} = EXCLUDED.{column}"
+        for column in columns if column not in conflict_columns
+    ]
+    update_assignments.extend(f"{column.lower()} = CURRENT_TIMESTAMP" for column in touch_columns)
+    column_list = ', '.join(columns)
+
+    merge_query = f"""
+    INSERT INTO {table} ({column_list})
+    SELECT {column_list} FROM {staging_table}
+    ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE SET
+        {', '.join(update_assignments)}
+    """
+    if 'content_hash' in columns:
+        merge_query += f"WHERE {table}.content_hash IS DISTINCT FROM EXCLUDED.content_hash"
+
+    await connection.execute(f"""
+    DROP TABLE IF EXISTS {staging_table};
+    CREATE TEMP TABLE {staging_table} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP;
+    """)
+    await connection.copy_records_to_table(staging_table, records=records, columns=columns)
+    status = await connection.execute(merge_query)
+    changed = int(status.split()[-1])
+    metrics.record_unchanged(len(records) - changed)
+    return changed
+
+# Child table columns as (name, array element type) pairs for insert_unnest
+KP_INDEX_COLUMNS = [
+    ('gst_id', 'varchar'), ('observed_time', 'timestamp'), ('kp_index', 'float8'), ('source', 'varchar')
+]
+FLARE_INSTRUMENT_COLUMNS = [('flare_id', 'varchar'), ('instrument_name', 'varchar')]
+HSS_INSTRUMENT_COLUMNS = [('hss_id', 'varchar'), ('instrument_name', 'varchar')]
+LINKED_EVENT_COLUMNS = [('source_id', 'varchar'), ('source_type', 'varchar'), ('linked_activity_id', 'varchar')]
+
+async def insert_unnest(connection, table: str, columns: List[Tuple[str, str]], rows: List[tuple],
+                        update_columns: List[str] = ()) -> int:
+    """
+    Inserts all rows in one statement by passing each column as a typed
+    array parameter and expanding them server-side with unnest().
+
+    Rows whose natural key (CHILD_TABLE_NATURAL_KEYS) already exists are
+    skipped, or, for ``update_columns``, updated only when a value differs;
+    either way they are counted as unchanged in the write metrics. Rows
+    missing part of their key are dropped: NULLs never conflict, so they
+    would be inserted again on every run. Returns the number of rows
+    inserted or changed.
+    """
+    column_names = [name for name, _ in columns]
+    key_columns = CHILD_TABLE_NATURAL_KEYS[table]
+    key_positions = [column_names.index(column) for column in key_columns]
+
+    complete_rows = [row for row in rows if all(row[i] is not None for i in key_positions)]
+    if len(complete_rows) < len(rows):
+        logger.warning(f"Skipped {len(rows) - len(complete_rows)} {table} rows missing part of ({', '.join(key_columns)})")
+        rows = complete_rows
+    if not rows:
+        return 0
+
+    # A statement may not update the same row twice, so the last duplicate wins
+    unique_rows = {tuple(row[i] for i in key_positions): row for row in rows}
+
+    if update_columns:
+        conflict_action = f"""DO UPDATE SET
+        {', '.join(f"{column} = EXCLUDED.{column}" for column in update_columns)}
+    WHERE ({', '.join(f"{table}.{column}" for column in update_columns)})
+        IS DISTINCT FROM ({', '.join(f"EXCLUDED.{column}" for column in update_columns)})"""
+    else:
+        conflict_action = "DO NOTHING"
+
+    arrays = ', '.join(f"${i}::{type_name}[]" for i, (_, type_name) in enumerate(columns, start=1))
+    query = f"""
+    INSERT INTO {table} ({', '.join(column_names)})
+    SELECT * FROM unnest({arrays})
+    ON CONFLICT ({', '.join(key_columns)}) {conflict_action}
+    """
+    status = await connection.execute(query, *(list(values) for values in zip(*unique_rows.values())))
+    changed = int(status.split()[-1])
+    metrics.record_unchanged(len(unique_rows) - changed)
+    return changed
+
+async def execute_per_row(connection, query: str, records: List[tuple], label: str,
+                          failed: Optional[List[Tuple[tuple, Exception]]] = None) -> int:
+    """
+    Executes ``query`` once per record, each in its own transaction, so a
+    failing row is logged and skipped without aborting the rest; (record,
+    error) pairs are appended to ``failed`` if given. Returns the number of
+    rows written; rows the upsert left alone because nothing changed are
+    counted as unchanged in the write metrics.
+    """
+    successful = unchanged = 0
+    for record in records:
+        try:
+            async with connection.transaction():
+                status = await connection.execute(query, *record)
+        except asyncpg.exceptions.PostgresError as e:
+            logger.error(f"Database error processing {label} {record[0]}: {e}")
+            if failed is not None:
+                failed.append((record, e))
+            continue
+        if status.endswith(' 0'):
+            unchanged += 1
+        else:
+            successful += 1
+    metrics.record_unchanged(unchanged)
+    return successful
+
+async def fetch_and_sanitize(api, session: aiohttp.ClientSession, *fetch_args) -> List[Dict[str, Any]]:
+    """Fetches and sanitizes one API response, recording each step as its own stage"""
+    with metrics.stage('fetch') as fetch_metrics:
+        raw_data = await api.fetch_data(session, *fetch_args)
+        fetch_metrics.rows_out += len(raw_data or [])
+    with metrics.stage('transform') as transform_metrics:
         processed_data = api.sanitize_data(raw_data)
+        transform_metrics.rows_in += len(raw_data or [])
+        transform_metrics.rows_out += len(processed_data)
+        transform_metrics.rows_rejected += len(raw_data or []) - len(processed_data)
+    return processed_data
+
+async def process_nasa_data(pool, api, session: aiohttp.ClientSession, date=None, end_date=None):
+    """
+    Loads close approaches from ``date`` (default today) through ``end_date``
+    (default NEOWS_REFRESH_DAYS in total). The range is fetched as concurrent
+    7-day feed windows and each window is written as it arrives.
+    """
+    start = parse_date(date) if date else datetime.now().date()
+    end = parse_date(end_date) if end_date else start + timedelta(days=NEOWS_REFRESH_DAYS - 1)
 
     insert_neo_query = """
     INSERT INTO neo_objects 
-    (id, name, observation_date, estimated_diameter_km, is_potentially_hazardous)
-    VALUES ($1, $2, $3, $4, $5)
+    (id, name, observation_date, estimated_diameter_km, is_potentially_hazardous, content_hash)
+    VALUES ($1, $2, $3, $4, $5, $6)
     ON CONFLICT (id) DO UPDATE SET
         name = EXCLUDED.name,
         observation_date = EXCLUDED.observation_date,
         estimated_diameter_km = EXCLUDED.estimated_diameter_km,
-        is_potentially_hazardous = EXCLUDED.is_potentially_hazardous
+        is_potentially_hazardous = EXCLUDED.is_potentially_hazardous,
+        content_hash = EXCLUDED.content_hash
+    WHERE neo_objects.content_hash IS DISTINCT FROM EXCLUDED.content_hash
     """
 
     insert_approach_query = """
     INSERT INTO neo_approaches 
     (neo_id, close_approach_date, relative_velocity_kph, miss_distance_km)
     VALUES ($1, $2, $3, $4)
+    ON CONFLICT (neo_id, close_approach_date) DO UPDATE SET
+        relative_velocity_kph = EXCLUDED.relative_velocity_kph,
+        miss_distance_km = EXCLUDED.miss_distance_km
+    WHERE (neo_approaches.relative_velocity_kph, neo_approaches.miss_distance_km)
+        IS DISTINCT FROM (EXCLUDED.relative_velocity_kph, EXCLUDED.miss_distance_km)
     """
 
-    async with pool.acquire() as connection:
-        async with connection.transaction():
-            await connection.executemany(insert_neo_query, [
-                (item['id'], item['name'], datetime.strptime(item['date'], '%Y-%m-%d').date(),
-                 float(item['estimated_diameter_km']), bool(item['is_potentially_hazardous']))
-                for item in processed_data
-            ])
+    # Windows can finish in any order and list the same NEO; a NEO keeps its
+    # latest observation date and each approach is written once per run
+    observation_dates = {}
+    seen_approaches = set()
 
-            approach_params = [
-                (item['id'], datetime.strptime(approach['close_approach_date'], '%Y-%m-%d').date(),
-                 float(approach['relative_velocity_kph']), float(approach['miss_distance_km']))
-                for item in processed_data for approach in item['close_approach_data']
-            ]
+    def convert_window(entries):
+        """
+        (NEO row or None, new approach rows) for each NEO with something new
+        to write; the ids of NEOs without close approach data are rejected
+        """
+        converted = ConvertedBatch()
+        for feed_date, neo in entries:
+            item = api.sanitize_neo(feed_date, neo)
+            if item is None:
+                converted.rejected.append(neo['id'])
+                continue
+            observation_date = parse_date(item['date'])
+            neo_row = None
+            if item['id'] not in observation_dates or observation_dates[item['id']] < observation_date:
+                observation_dates[item['id']] = observation_date
+                neo_row = with_content_hash((item['id'], item['name'], observation_date,
+                                             float(item['estimated_diameter_km']),
+                                             bool(item['is_potentially_hazardous'])))
+            approach_rows = []
+            for approach in item['close_approach_data']:
+                approach_row = (item['id'], parse_date(approach['close_approach_date']),
+                                float(approach['relative_velocity_kph']), float(approach['miss_distance_km']))
+                if approach_row[:2] not in seen_approaches:
+                    seen_approaches.add(approach_row[:2])
+                    approach_rows.append(approach_row)
+            if neo_row or approach_rows:
+                converted.append((neo_row, approach_rows))
+        return converted
+
+    unchanged = 0
 
-            if approach_params:
-                await connection.executemany(insert_approach_query, approach_params)
+    async with pool.acquire() as connection:
+        async def write_window(converted):
+            nonlocal unchanged
+            neo_params = [neo_row for neo_row, _ in converted if neo_row]
+            approach_params = [row for _, approach_rows in converted for row in approach_rows]
+            async with connection.transaction():
+                window_unchanged = await count_unchanged(connection, 'neo_objects', 'id', neo_params)
+                if neo_params:
+                    await connection.executemany(insert_neo_query, neo_params)
+                if approach_params:
+                    await connection.executemany(insert_approach_query, approach_params)
+            unchanged += window_unchanged
+            return len(neo_params) - window_unchanged
+
+        changed = await run_pipeline(
+            api.stream_range(session, start.isoformat(), end.isoformat()), convert_window, write_window
+        )
 
-    logger.info(f"Inserted {len(processed_data)} NEO records into the database.")
+    logger.info(f"Upserted NEO records from {start} to {end}: {changed} new or changed, {unchanged} unchanged.")
 
-async def process_donki_cme_data(pool, api, date=None):
-    async with aiohttp.ClientSession() as session:
-        raw_data = await api.fetch_data(session, date)
-        processed_data = api.sanitize_data(raw_data)
+async def process_donki_cme_data(pool, api, session: aiohttp.ClientSession, date=None):
+    """Process CME data from the given start date, or incrementally from the stored watermark"""
+    if date is None:
+        date = await get_donki_start_date(pool, DONKI_CME_SOURCE)
+    processed_data = await fetch_and_sanitize(api, session, date)
 
     insert_cme_query = """
     INSERT INTO donki_cme 
     (activity_id, catalog, start_time, source_location, active_region_num,
      link, note, latitude, longitude, half_angle, speed, type,
-     level_of_data, completion_time, is_most_accurate)
-    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
+     level_of_data, completion_time, is_most_accurate, content_hash)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16)
     ON CONFLICT (activity_id) DO UPDATE SET
         catalog = EXCLUDED.catalog,
         start_time = EXCLUDED.start_time,
@@ -853,115 +1411,124 @@ async def process_donki_cme_data(pool, api, date=None):
         type = EXCLUDED.type,
         level_of_data = EXCLUDED.level_of_data,
         completion_time = EXCLUDED.completion_time,
-        is_most_accurate = EXCLUDED.is_most_accurate
+        is_most_accurate = EXCLUDED.is_most_accurate,
+        content_hash = EXCLUDED.content_hash
+    WHERE donki_cme.content_hash IS DISTINCT FROM EXCLUDED.content_hash
     """
 
     async with pool.acquire() as connection:
         try:
-            await connection.executemany(insert_cme_query, [
-                (
-                    item['activity_id'],
-                    item['catalog'],
-                    parser.parse(item['start_time']).astimezone(pytz.UTC).replace(tzinfo=None),
-                    item['source_location'],
-                    str(item['active_region_num']) if item.get('active_region_num') is not None else None,
-                    item['link'],
-                    item['note'],
-                    item['latitude'],
-                    item['longitude'],
-                    item['half_angle'],
-                    item['speed'],
-                    item['type'],
-                    item['level_of_data'],
-                    parser.parse(item['completion_time']).astimezone(pytz.UTC).replace(tzinfo=None) if item.get('completion_time') else None,
-                    item['is_most_accurate']
-                )
-                for item in processed_data
-            ])
-            logger.info(f"Inserted {len(processed_data)} CME records into the database.")
+            with metrics.stage('transform'):
+                cme_params = [
+                    with_content_hash((
+                        item['activity_id'],
+                        item['catalog'],
+                        parse_utc(item['start_time'], 'cme.startTime'),
+                        item['source_location'],
+                        str(item['active_region_num']) if item.get('active_region_num') is not None else None,
+                        item['link'],
+                        item['note'],
+                        item['latitude'],
+                        item['longitude'],
+                        item['half_angle'],
+                        item['speed'],
+                        item['type'],
+                        item['level_of_data'],
+                        parse_utc(item.get('completion_time'), 'cme.completionTime'),
+                        item['is_most_accurate']
+                    ))
+                    for item in processed_data
+                ]
+            with metrics.stage('write') as write_metrics:
+                async with connection.transaction():
+                    unchanged = await count_unchanged(connection, 'donki_cme', 'activity_id', cme_params)
+                    await connection.executemany(insert_cme_query, cme_params)
+                    await advance_donki_watermark(connection, DONKI_CME_SOURCE, [row[2] for row in cme_params])
+                write_metrics.rows_in += len(cme_params)
+                write_metrics.rows_out += len(cme_params) - unchanged
+            logger.info(
+                f"Upserted {len(processed_data)} CME records into the database "
+                f"({len(cme_params) - unchanged} new or changed, {unchanged} unchanged)."
+            )
         except Exception as e:
             logger.error(f"Error inserting CME data: {e}")
             raise
 
-async def process_geostorm_data(pool, api, date=None):
-    """Process Geomagnetic Storm data"""
-    async with aiohttp.ClientSession() as session:
-        raw_data = await api.fetch_data(session, date)
-        processed_data = api.sanitize_data(raw_data)
+async def process_geostorm_data(pool, api, session: aiohttp.ClientSession, date=None):
+    """Process Geomagnetic Storm data from the given start date, or incrementally from the stored watermark"""
+    if date is None:
+        date = await get_donki_start_date(pool, DONKI_GST_SOURCE)
+    processed_data = await fetch_and_sanitize(api, session, date)
 
     insert_storm_query = """
     INSERT INTO donki_geostorm 
-    (gst_id, start_time, link, submission_time, version_id)
-    VALUES ($1, $2, $3, $4, $5)
+    (gst_id, start_time, link, submission_time, version_id, content_hash)
+    VALUES ($1, $2, $3, $4, $5, $6)
     ON CONFLICT (gst_id) DO UPDATE SET
         start_time = EXCLUDED.start_time,
         link = EXCLUDED.link,
         submission_time = EXCLUDED.submission_time,
-        version_id = EXCLUDED.version_id
-    RETURNING gst_id;
+        version_id = EXCLUDED.version_id,
+        content_hash = EXCLUDED.content_hash
+    WHERE donki_geostorm.content_hash IS DISTINCT FROM EXCLUDED.content_hash
     """
 
-    insert_kp_query = """
-    INSERT INTO geostorm_kp_index 
-    (gst_id, observed_time, kp_index, source)
-    VALUES ($1, $2, $3, $4)
-    """
-
-    insert_linked_events_query = """
-    INSERT INTO linked_events 
-    (source_id, source_type, linked_activity_id)
-    VALUES ($1, $2, $3)
-    """
+    with metrics.stage('transform'):
+        storm_rows, kp_rows, linked_event_rows = [], [], []
+        for storm in processed_data:
+            storm_rows.append(with_content_hash((
+                storm['gst_id'],
+                parse_utc(storm['start_time'], 'gst.startTime'),
+                storm['link'],
+                parse_utc(storm['submission_time'], 'gst.submissionTime'),
+                storm['version_id']
+            )))
+            kp_rows.extend(
+                (
+                    storm['gst_id'],
+                    parse_utc(kp_data['observed_time'], 'gst.observedTime'),
+                    kp_data['kp_index'],
+                    kp_data['source']
+                )
+                for kp_data in storm['kp_index_data']
+                # observed_time is the partition key, so readings without one can't be stored
+                if kp_data['observed_time']
+            )
+            linked_event_rows.extend((storm['gst_id'], 'GST', event_id) for event_id in storm['linked_events'])
 
     async with pool.acquire() as connection:
         try:
-            async with connection.transaction():
-                for storm in processed_data:
-                    # Insert main storm data
-                    storm_record = await connection.fetchrow(
-                        insert_storm_query,
-                        storm['gst_id'],
-                        parser.parse(storm['start_time']).astimezone(pytz.UTC).replace(tzinfo=None),
-                        storm['link'],
-                        parser.parse(storm['submission_time']).astimezone(pytz.UTC).replace(tzinfo=None),
-                        storm['version_id']
-                    )
-
-                    # Insert KP index data
-                    for kp_data in storm['kp_index_data']:
-                        await connection.execute(
-                            insert_kp_query,
-                            storm['gst_id'],
-                            parser.parse(kp_data['observed_time']).astimezone(pytz.UTC).replace(tzinfo=None),
-                            kp_data['kp_index'],
-                            kp_data['source']
-                        )
-
-                    # Insert linked events
-                    for event_id in storm['linked_events']:
-                        await connection.execute(
-                            insert_linked_events_query,
-                            storm['gst_id'],
-                            'GST',
-                            event_id
-                        )
-
-            logger.info(f"Inserted {len(processed_data)} geostorm records into the database.")
+            with metrics.stage('write') as write_metrics:
+                async with connection.transaction():
+                    unchanged = await count_unchanged(connection, 'donki_geostorm', 'gst_id', storm_rows)
+                    await connection.executemany(insert_storm_query, storm_rows)
+                    new_kp = await insert_unnest(connection, 'geostorm_kp_index', KP_INDEX_COLUMNS, kp_rows,
+                                                 update_columns=['kp_index'])
+                    new_links = await insert_unnest(connection, 'linked_events', LINKED_EVENT_COLUMNS, linked_event_rows)
+                    await advance_donki_watermark(connection, DONKI_GST_SOURCE, [row[1] for row in storm_rows])
+                write_metrics.rows_in += len(storm_rows) + len(kp_rows) + len(linked_event_rows)
+                write_metrics.rows_out += len(storm_rows) - unchanged + new_kp + new_links
+
+            logger.info(
+                f"Upserted {len(processed_data)} geostorm records into the database "
+                f"({len(storm_rows) - unchanged} new or changed, {unchanged} unchanged; "
+                f"{new_kp} new or changed Kp readings, {new_links} new linked events)."
+            )
         except Exception as e:
             logger.error(f"Error inserting geostorm data: {e}")
             raise
 
-async def process_solar_flare_data(pool, api, date=None):
-    """Process Solar Flare data"""
-    async with aiohttp.ClientSession() as session:
-        raw_data = await api.fetch_data(session, date)
-        processed_data = api.sanitize_data(raw_data)
+async def process_solar_flare_data(pool, api, session: aiohttp.ClientSession, date=None):
+    """Process Solar Flare data from the given start date, or incrementally from the stored watermark"""
+    if date is None:
+        date = await get_donki_start_date(pool, DONKI_FLR_SOURCE)
+    processed_data = await fetch_and_sanitize(api, session, date)
 
     insert_flare_query = """
     INSERT INTO donki_solar_flare 
     (flare_id, begin_time, peak_time, end_time, class_type, 
-     source_location, active_region_num, link, note)
-    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+     source_location, active_region_num, link, note, content_hash)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
     ON CONFLICT (flare_id) DO UPDATE SET
         begin_time = EXCLUDED.begin_time,
         peak_time = EXCLUDED.peak_time,
@@ -970,133 +1537,130 @@ async def process_solar_flare_data(pool, api, date=None):
         source_location = EXCLUDED.source_location,
         active_region_num = EXCLUDED.active_region_num,
         link = EXCLUDED.link,
-        note = EXCLUDED.note
-    RETURNING flare_id;
-    """
-
-    insert_instrument_query = """
-    INSERT INTO solar_flare_instruments 
-    (flare_id, instrument_name)
-    VALUES ($1, $2)
+        note = EXCLUDED.note,
+        content_hash = EXCLUDED.content_hash
+    WHERE donki_solar_flare.content_hash IS DISTINCT FROM EXCLUDED.content_hash
     """
 
-    insert_linked_events_query = """
-    INSERT INTO linked_events 
-    (source_id, source_type, linked_activity_id)
-    VALUES ($1, $2, $3)
-    """
+    with metrics.stage('transform'):
+        flare_rows, instrument_rows, linked_event_rows = [], [], []
+        for flare in processed_data:
+            flare_rows.append(with_content_hash((
+                flare['flare_id'],
+                parse_utc(flare['begin_time'], 'flr.beginTime'),
+                parse_utc(flare['peak_time'], 'flr.peakTime'),
+                parse_utc(flare['end_time'], 'flr.endTime'),
+                flare['class_type'],
+                flare['source_location'],
+                flare['active_region_num'],
+                flare['link'],
+                flare['note']
+            )))
+            instrument_rows.extend((flare['flare_id'], instrument) for instrument in flare['instruments'])
+            linked_event_rows.extend((flare['flare_id'], 'FLR', event_id) for event_id in flare['linked_events'])
 
     async with pool.acquire() as connection:
         try:
-            async with connection.transaction():
-                for flare in processed_data:
-                    # Insert main flare data
-                    flare_record = await connection.fetchrow(
-                        insert_flare_query,
-                        flare['flare_id'],
-                        parser.parse(flare['begin_time']).astimezone(pytz.UTC).replace(tzinfo=None) if flare['begin_time'] else None,
-                        parser.parse(flare['peak_time']).astimezone(pytz.UTC).replace(tzinfo=None) if flare['peak_time'] else None,
-                        parser.parse(flare['end_time']).astimezone(pytz.UTC).replace(tzinfo=None) if flare['end_time'] else None,
-                        flare['class_type'],
-                        flare['source_location'],
-                        flare['active_region_num'],
-                        flare['link'],
-                        flare['note']
-                    )
-
-                    # Insert instruments
-                    for instrument in flare['instruments']:
-                        await connection.execute(
-                            insert_instrument_query,
-                            flare['flare_id'],
-                            instrument
-                        )
-
-                    # Insert linked events
-                    for event_id in flare['linked_events']:
-                        await connection.execute(
-                            insert_linked_events_query,
-                            flare['flare_id'],
-                            'FLR',
-                            event_id
-                        )
-
-            logger.info(f"Inserted {len(processed_data)} solar flare records into the database.")
+            with metrics.stage('write') as write_metrics:
+                async with connection.transaction():
+                    unchanged = await count_unchanged(connection, 'donki_solar_flare', 'flare_id', flare_rows)
+                    await connection.executemany(insert_flare_query, flare_rows)
+                    new_instruments = await insert_unnest(connection, 'solar_flare_instruments',
+                                                          FLARE_INSTRUMENT_COLUMNS, instrument_rows)
+                    new_links = await insert_unnest(connection, 'linked_events', LINKED_EVENT_COLUMNS, linked_event_rows)
+                    await advance_donki_watermark(connection, DONKI_FLR_SOURCE, [row[1] for row in flare_rows])
+                write_metrics.rows_in += len(flare_rows) + len(instrument_rows) + len(linked_event_rows)
+                write_metrics.rows_out += len(flare_rows) - unchanged + new_instruments + new_links
+
+            logger.info(
+                f"Upserted {len(processed_data)} solar flare records into the database "
+                f"({len(flare_rows) - unchanged} new or changed, {unchanged} unchanged; "
+                f"{new_instruments} new instruments, {new_links} new linked events)."
+            )
         except Exception as e:
             logger.error(f"Error inserting solar flare data: {e}")
             raise
 
-async def process_hss_data(pool, api, date=None):
-    """Process High Speed Stream data"""
-    async with aiohttp.ClientSession() as session:
-        raw_data = await api.fetch_data(session, date)
-        processed_data = api.sanitize_data(raw_data)
+async def process_hss_data(pool, api, session: aiohttp.ClientSession, date=None):
+    """Process High Speed Stream data from the given start date, or incrementally from the stored watermark"""
+    if date is None:
+        date = await get_donki_start_date(pool, DONKI_HSS_SOURCE)
+    processed_data = await fetch_and_sanitize(api, session, date)
 
     insert_hss_query = """
     INSERT INTO donki_hss 
-    (hss_id, event_time, link, submission_time, version_id)
-    VALUES ($1, $2, $3, $4, $5)
+    (hss_id, event_time, link, submission_time, version_id, content_hash)
+    VALUES ($1, $2, $3, $4, $5, $6)
     ON CONFLICT (hss_id) DO UPDATE SET
         event_time = EXCLUDED.event_time,
         link = EXCLUDED.link,
         submission_time = EXCLUDED.submission_time,
-        version_id = EXCLUDED.version_id
-    RETURNING hss_id;
+        version_id = EXCLUDED.version_id,
+        content_hash = EXCLUDED.content_hash
+    WHERE donki_hss.content_hash IS DISTINCT FROM EXCLUDED.content_hash
     """
 
-    insert_instrument_query = """
-    INSERT INTO hss_instruments 
-    (hss_id, instrument_name)
-    VALUES ($1, $2)
-    """
-
-    insert_linked_events_query = """
-    INSERT INTO linked_events 
-    (source_id, source_type, linked_activity_id)
-    VALUES ($1, $2, $3)
-    """
+    with metrics.stage('transform'):
+        hss_rows, instrument_rows, linked_event_rows = [], [], []
+        for hss in processed_data:
+            hss_rows.append(with_content_hash((
+                hss['hss_id'],
+                parse_utc(hss['event_time'], 'hss.eventTime'),
+                hss['link'],
+                parse_utc(hss['submission_time'], 'hss.submissionTime'),
+                hss['version_id']
+            )))
+            instrument_rows.extend((hss['hss_id'], instrument) for instrument in hss['instruments'])
+            linked_event_rows.extend((hss['hss_id'], 'HSS', event_id) for event_id in hss['linked_events'])
 
     async with pool.acquire() as connection:
         try:
-            async with connection.transaction():
-                for hss in processed_data:
-                    # Insert main HSS data
-                    hss_record = await connection.fetchrow(
-                        insert_hss_query,
-                        hss['hss_id'],
-                        parser.parse(hss['event_time']).astimezone(pytz.UTC).replace(tzinfo=None),
-                        hss['link'],
-                        parser.parse(hss['submission_time']).astimezone(pytz.UTC).replace(tzinfo=None),
-                        hss['version_id']
-                    )
-
-                    # Insert instruments
-                    for instrument in hss['instruments']:
-                        await connection.execute(
-                            insert_instrument_query,
-                            hss['hss_id'],
-                            instrument
-                        )
-
-                    # Insert linked events
-                    for event_id in hss['linked_events']:
-                        await connection.execute(
-                            insert_linked_events_query,
-                            hss['hss_id'],
-                            'HSS',
-                            event_id
-                        )
-
-            logger.info(f"Inserted {len(processed_data)} HSS records into the database.")
+            with metrics.stage('write') as write_metrics:
+                async with connection.transaction():
+                    unchanged = await count_unchanged(connection, 'donki_hss', 'hss_id', hss_rows)
+                    await connection.executemany(insert_hss_query, hss_rows)
+                    new_instruments = await insert_unnest(connection, 'hss_instruments',
+                                                          HSS_INSTRUMENT_COLUMNS, instrument_rows)
+                    new_links = await insert_unnest(connection, 'linked_events', LINKED_EVENT_COLUMNS, linked_event_rows)
+                    await advance_donki_watermark(connection, DONKI_HSS_SOURCE, [row[1] for row in hss_rows])
+                write_metrics.rows_in += len(hss_rows) + len(instrument_rows) + len(linked_event_rows)
+                write_metrics.rows_out += len(hss_rows) - unchanged + new_instruments + new_links
+
+            logger.info(
+                f"Upserted {len(processed_data)} HSS records into the database "
+                f"({len(hss_rows) - unchanged} new or changed, {unchanged} unchanged; "
+                f"{new_instruments} new instruments, {new_links} new linked events)."
+            )
         except Exception as e:
             logger.error(f"Error inserting HSS data: {e}")
             raise
 
-async def process_exoplanet_data(pool, api):
-    """Process Exoplanet Archive data."""
-    async with aiohttp.ClientSession() as session:
-        raw_data = await api.fetch_data(session)
-        processed_data = api.sanitize_data(raw_data)
+async def process_exoplanet_csv(pool, api, session: aiohttp.ClientSession) -> int:
+    """
+    Process Exoplanet Archive data streamed as CSV. Each batch is converted
+    by columns (convert_exoplanet_rows) and merged into exoplanets with a
+    COPY upsert while the next one downloads (see run_pipeline), so no
+    per-planet dict is ever built.
+    """
+    async with pool.acquire() as connection:
+        async def write_batch(rows: List[tuple]) -> int:
+            async with connection.transaction():
+                return await copy_upsert(connection, 'exoplanets', EXOPLANET_COLUMNS, rows,
+                                         conflict_columns=['planet_name'])
+
+        written = await run_pipeline(api.stream_csv_rows(session), convert_exoplanet_rows, write_batch)
+    logger.info(f"Inserted/Updated {written} new or changed exoplanet records from CSV.")
+    return written
+
+async def process_exoplanet_data(pool, api, session: aiohttp.ClientSession):
+    """Process Exoplanet Archive data in the EXOPLANET_FORMAT mode."""
+    if EXOPLANET_FORMAT == 'csv':
+        return await process_exoplanet_csv(pool, api, session)
+    return await process_exoplanet_json(pool, api, session)
+
+async def process_exoplanet_json(pool, api, session: aiohttp.ClientSession):
+    """Process Exoplanet Archive data fetched as JSON."""
+    processed_data = await fetch_and_sanitize(api, session)
 
     insert_exoplanet_query = """
         INSERT INTO exoplanets (
@@ -1105,10 +1669,10 @@ async def process_exoplanet_data(pool, api):
             orbital_eccentricity, insolation_flux, equilibrium_temp, density,
             star_temp, star_radius, star_mass, star_metallicity,
             facility, telescope, instrument, ra_str, dec_str,
-            controversial, reference
+            controversial, reference, content_hash
         ) VALUES (
             $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12,
-            $13, $14, $15, $16, $17, $18, $19, $20, $21, $22, $23
+            $13, $14, $15, $16, $17, $18, $19, $20, $21, $22, $23, $24
         )
         ON CONFLICT (planet_name) DO UPDATE SET
             host_star = EXCLUDED.host_star,
@@ -1132,288 +1696,588 @@ async def process_exoplanet_data(pool, api):
             ra_str = EXCLUDED.ra_str,
             dec_str = EXCLUDED.dec_str,
             controversial = EXCLUDED.controversial,
-            reference = EXCLUDED.reference;
+            reference = EXCLUDED.reference,
+            content_hash = EXCLUDED.content_hash
+        WHERE exoplanets.content_hash IS DISTINCT FROM EXCLUDED.content_hash;
     """
 
+    with metrics.stage('transform'):
+        exoplanet_params = [
+            with_content_hash((
+                item['planet_name'],
+                item['host_star'],
+                item['discovery_method'],
+                item['orbital_period'],
+                item['planet_radius'],
+                item['mass'],
+                item['semi_major_axis'],
+                item['discovery_year'],
+                item['orbital_eccentricity'],
+                item['insolation_flux'],
+                item['equilibrium_temp'],
+                item['density'],
+                item['star_temp'],
+                item['star_radius'],
+                item['star_mass'],
+                item['star_metallicity'],
+                item['facility'],
+                item['telescope'],
+                item['instrument'],
+                item['ra_str'],
+                item['dec_str'],
+                item['controversial'],
+                item['reference']
+            ))
+            for item in processed_data
+        ]
+
     async with pool.acquire() as connection:
-        async with connection.transaction():
-           await connection.executemany(insert_exoplanet_query, [
-                (
-                    item['planet_name'],
-                    item['host_star'],
-                    item['discovery_method'],
-                    item['orbital_period'],
-                    item['planet_radius'],
-                    item['mass'],
-                    item['semi_major_axis'],
-                    item['discovery_year'],
-                    item['orbital_eccentricity'],
-                    item['insolation_flux'],
-                    item['equilibrium_temp'],
-                    item['density'],
-                    item['star_temp'],
-                    item['star_radius'],
-                    item['star_mass'],
-                    item['star_metallicity'],
-                    item['facility'],
-                    item['telescope'],
-                    item['instrument'],
-                    item['ra_str'],
-                    item['dec_str'],
-                    item['controversial'],
-                    item['reference']
-                )
-                for item in processed_data
-            ])
-    logger.info(f"Inserted/Updated {len(processed_data)} exoplanet records.")
+        with metrics.stage('write') as write_metrics:
+            async with connection.transaction():
+                unchanged = await count_unchanged(connection, 'exoplanets', 'planet_name', exoplanet_params)
+                await connection.executemany(insert_exoplanet_query, exoplanet_params)
+            write_metrics.rows_in += len(exoplanet_params)
+            write_metrics.rows_out += len(exoplanet_params) - unchanged
+    logger.info(
+        f"Inserted/Updated {len(processed_data)} exoplanet records "
+        f"({len(exoplanet_params) - unchanged} new or changed, {unchanged} unchanged)."
+    )
   
-async def process_satellite_data(pool, api):
-    """Process satellite catalog data"""
-    async with aiohttp.ClientSession() as session:
-        raw_data = await api.fetch_satcat_data(session)
-
-    insert_sat_query = """
-    INSERT INTO sat_cat 
-    (INTLDES, NORAD_CAT_ID, OBJECT_TYPE, SATNAME, COUNTRY,
-    LAUNCH_DATE, SITE, DECAY_DATE, PERIOD, INCLINATION,
-    APOGEE, PERIGEE, RCS_VALUE, RCS_SIZE, LAUNCH_YEAR,
-    LAUNCH_NUM, LAUNCH_PIECE, CURRENT, OBJECT_NAME, OBJECT_ID,
-    OBJECT_NUMBER, CREATED_AT, UPDATED_AT)
-    VALUES 
-    ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10,
-    $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-    ON CONFLICT (NORAD_CAT_ID) DO UPDATE SET
-    INTLDES = EXCLUDED.INTLDES,
-    OBJECT_TYPE = EXCLUDED.OBJECT_TYPE,
-    SATNAME = EXCLUDED.SATNAME,
-    COUNTRY = EXCLUDED.COUNTRY,
-    LAUNCH_DATE = EXCLUDED.LAUNCH_DATE,
-    SITE = EXCLUDED.SITE,
-    DECAY_DATE = EXCLUDED.DECAY_DATE,
-    PERIOD = EXCLUDED.PERIOD,
-    INCLINATION = EXCLUDED.INCLINATION,
-    APOGEE = EXCLUDED.APOGEE,
-    PERIGEE = EXCLUDED.PERIGEE,
-    RCS_VALUE = EXCLUDED.RCS_VALUE,
-    RCS_SIZE = EXCLUDED.RCS_SIZE,
-    LAUNCH_YEAR = EXCLUDED.LAUNCH_YEAR,
-    LAUNCH_NUM = EXCLUDED.LAUNCH_NUM,
-    LAUNCH_PIECE = EXCLUDED.LAUNCH_PIECE,
-    CURRENT = EXCLUDED.CURRENT,
-    OBJECT_NAME = EXCLUDED.OBJECT_NAME,
-    OBJECT_ID = EXCLUDED.OBJECT_ID,
-    OBJECT_NUMBER = EXCLUDED.OBJECT_NUMBER,
-    UPDATED_AT = CURRENT_TIMESTAMP;
+INSERT_SAT_CAT_QUERY = """
+INSERT INTO sat_cat 
+(INTLDES, NORAD_CAT_ID, OBJECT_TYPE, SATNAME, COUNTRY,
+LAUNCH_DATE, SITE, DECAY_DATE, PERIOD, INCLINATION,
+APOGEE, PERIGEE, RCS_VALUE, RCS_SIZE, LAUNCH_YEAR,
+LAUNCH_NUM, LAUNCH_PIECE, CURRENT, OBJECT_NAME, OBJECT_ID,
+OBJECT_NUMBER, CONTENT_HASH, CREATED_AT, UPDATED_AT)
+VALUES 
+($1, $2, $3, $4, $5, $6, $7, $8, $9, $10,
+$11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21, $22, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+ON CONFLICT (NORAD_CAT_ID) DO UPDATE SET
+INTLDES = EXCLUDED.INTLDES,
+OBJECT_TYPE = EXCLUDED.OBJECT_TYPE,
+SATNAME = EXCLUDED.SATNAME,
+COUNTRY = EXCLUDED.COUNTRY,
+LAUNCH_DATE = EXCLUDED.LAUNCH_DATE,
+SITE = EXCLUDED.SITE,
+DECAY_DATE = EXCLUDED.DECAY_DATE,
+PERIOD = EXCLUDED.PERIOD,
+INCLINATION = EXCLUDED.INCLINATION,
+APOGEE = EXCLUDED.APOGEE,
+PERIGEE = EXCLUDED.PERIGEE,
+RCS_VALUE = EXCLUDED.RCS_VALUE,
+RCS_SIZE = EXCLUDED.RCS_SIZE,
+LAUNCH_YEAR = EXCLUDED.LAUNCH_YEAR,
+LAUNCH_NUM = EXCLUDED.LAUNCH_NUM,
+LAUNCH_PIECE = EXCLUDED.LAUNCH_PIECE,
+CURRENT = EXCLUDED.CURRENT,
+OBJECT_NAME = EXCLUDED.OBJECT_NAME,
+OBJECT_ID = EXCLUDED.OBJECT_ID,
+OBJECT_NUMBER = EXCLUDED.OBJECT_NUMBER,
+CONTENT_HASH = EXCLUDED.CONTENT_HASH,
+UPDATED_AT = CURRENT_TIMESTAMP
+WHERE sat_cat.CONTENT_HASH IS DISTINCT FROM EXCLUDED.CONTENT_HASH
+"""
+
+async def quarantine_satcat_rejects(connection, rejects: List[Tuple[Any, str, Dict[str, Any]]]):
+    """
+    Stores (NORAD_CAT_ID, reason, record) rejects in sat_cat_rejects for
+    inspection. A reject already stored (same content_hash, see migration 8)
+    is skipped, so the records that fail on every run are kept only once.
     """
+    if not rejects:
+        return
+    status = await connection.execute("""
+    INSERT INTO sat_cat_rejects (norad_cat_id, reason, record)
+    SELECT norad_cat_id, reason, record::jsonb
+    FROM unnest($1::text[], $2::text[], $3::text[]) AS r(norad_cat_id, reason, record)
+    ON CONFLICT (content_hash) DO NOTHING
+    """,
+        [str(norad_cat_id) if norad_cat_id is not None else None for norad_cat_id, _, _ in rejects],
+        [reason for _, reason, _ in rejects],
+        [json.dumps(record, default=str) for _, _, record in rejects]
+    )
+    quarantined = int(status.split()[-1])
+    logger.warning(
+        f"Rejected {len(rejects)} SATCAT records ({quarantined} newly quarantined in sat_cat_rejects), "
+        f"e.g. {rejects[0][1]}"
+    )
 
-    successful_inserts = 0
-    async with pool.acquire() as connection:
-        for sat in raw_data:
-            try:
-                launch_date = (
-                    datetime.strptime(sat['LAUNCH'], '%Y-%m-%d').date()
-                    if 'LAUNCH' in sat and sat['LAUNCH']
-                    else None
-                )
-                decay_date = (
-                    datetime.strptime(sat['DECAY'], '%Y-%m-%d').date()
-                    if 'DECAY' in sat and sat['DECAY']
-                    else None
-                )
+async def purge_satcat_rejects(connection, retention_days: int = SAT_CAT_REJECTS_RETENTION_DAYS) -> int:
+    """Deletes sat_cat_rejects rows first rejected more than ``retention_days`` ago; 0 keeps them all"""
+    if not retention_days:
+        return 0
+    status = await connection.execute(
+        "DELETE FROM sat_cat_rejects WHERE rejected_at < CURRENT_TIMESTAMP - make_interval(days => $1)",
+        retention_days
+    )
+    purged = int(status.split()[-1])
+    if purged:
+        logger.info(f"Purged {purged} sat_cat_rejects rows older than {retention_days} days")
+    return purged
 
-                params = [
-                    sat.get('INTLDES', ''),
-                    str(sat.get('NORAD_CAT_ID')) if sat.get('NORAD_CAT_ID') else None,
-                    sat.get('OBJECT_TYPE'),
-                    sat.get('SATNAME', ''),
-                    sat.get('COUNTRY', ''),
-                    launch_date,
-                    sat.get('SITE'),
-                    decay_date,
-                    float(sat.get('PERIOD')) if sat.get('PERIOD') else None,
-                    float(sat.get('INCLINATION')) if sat.get('INCLINATION') else None,
-                    int(sat.get('APOGEE')) if sat.get('APOGEE') else None,
-                    int(sat.get('PERIGEE')) if sat.get('PERIGEE') else None,
-                    int(sat.get('RCSVALUE', 0)),
-                    sat.get('RCS_SIZE'),
-                    int(sat.get('LAUNCH_YEAR', 0)),
-                    int(sat.get('LAUNCH_NUM', 0)),
-                    sat.get('LAUNCH_PIECE', ''),
-                    sat.get('CURRENT') == 'Y',  # Convert 'Y'/'N' to boolean
-                    sat.get('OBJECT_NAME', ''),
-                    sat.get('OBJECT_ID', ''),
-                    int(sat.get('OBJECT_NUMBER')) if sat.get('OBJECT_NUMBER') else None
-                ]
+async def upsert_satcat_records(connection, rows: ConvertedBatch) -> int:
+    """
+    Quarantines the batch's rejects and merges its valid rows into sat_cat
+    with one COPY into staging, in a single transaction. If the merge still
+    fails, the rows are replayed one at a time and the ones PostgreSQL
+    refuses are quarantined with its error message.
+    """
+    try:
+        async with connection.transaction():
+            await quarantine_satcat_rejects(connection, rows.rejected)
+            return await copy_upsert(
+                connection, 'sat_cat', SAT_CAT_COLUMNS, rows,
+                conflict_columns=['NORAD_CAT_ID'], touch_columns=['UPDATED_AT']
+            )
+    except asyncpg.exceptions.PostgresError as e:
+        logger.warning(f"Bulk SATCAT upsert failed, falling back to per-row upserts: {e}")
+        failed = []
+        written = await execute_per_row(connection, INSERT_SAT_CAT_QUERY, rows, 'satellite', failed)
+        async with connection.transaction():
+            await quarantine_satcat_rejects(connection, rows.rejected + [
+                (row[1], str(error), dict(zip(SAT_CAT_COLUMNS[:-1], row))) for row, error in failed
+            ])
+        return written
 
-                async with connection.transaction():
-                    await connection.execute(insert_sat_query, *params)
-                    successful_inserts += 1
-                    logger.debug(f"Successfully processed satellite {params[1]}")
+async def process_satellite_data(pool, api, session: aiohttp.ClientSession, executor: Optional[Executor] = None):
+    """
+    Process satellite catalog data. The catalog is split into NORAD_CAT_ID
+    ranges (see SpaceTrackAPI.satcat_pages) that are downloaded up to
+    SATCAT_FETCH_CONCURRENCY at a time, within the shared Space-Track rate
+    limits. Each range streams into its own pipeline and pooled connection,
+    so a batch is written while later ones are still downloading (see
+    run_pipeline). Batches are converted in ``executor`` when one is given.
+    Records that can't be stored are quarantined in sat_cat_rejects, whose
+    rows past SAT_CAT_REJECTS_RETENTION_DAYS are purged at the end.
+    """
+    semaphore = asyncio.Semaphore(SATCAT_FETCH_CONCURRENCY)
 
-            except (ValueError, TypeError) as e:
-                logger.error(f"Data conversion error for satellite {sat.get('NORAD_CAT_ID', 'unknown')}: {e}")
-                continue
-            except asyncpg.exceptions.PostgresError as e:
-                logger.error(f"Database error processing satellite {sat.get('NORAD_CAT_ID', 'unknown')}: {e}")
-                continue
+    async def load_page(first_id: int, last_id: int) -> int:
+        async with semaphore, pool.acquire() as connection:
+            received = 0
 
-    logger.info(f"Completed satellite processing. Successfully inserted/updated {successful_inserts} records.")
-    return successful_inserts
+            async def write_batch(rows: ConvertedBatch) -> int:
+                nonlocal received
+                received += len(rows) + len(rows.rejected)
+                return await upsert_satcat_records(connection, rows)
 
-async def process_gp_data(pool, api):
-    """Process GP (General Perturbations) data"""
-    async with aiohttp.ClientSession() as session:
-        raw_data = await api.fetch_gp_data(session)
-
-    insert_gp_query = """
-    INSERT INTO gp (
-        NORAD_CAT_ID, OBJECT_NAME, OBJECT_ID, MEAN_ELEMENT_THEORY, CREATION_DATE,
-        EPOCH, MEAN_MOTION, ECCENTRICITY, INCLINATION, RA_OF_ASC_NODE,
-        ARG_OF_PERICENTER, MEAN_ANOMALY, BSTAR, MEAN_MOTION_DOT, MEAN_MOTION_DDOT,
-        SEMIMAJOR_AXIS, PERIOD, APOAPSIS, PERIAPSIS, REV_AT_EPOCH,
-        OBJECT_TYPE, COUNTRY_CODE, RCS_SIZE, LAUNCH_DATE, DECAY_DATE,
-        GP_ID, TLE_LINE0, TLE_LINE1, TLE_LINE2, CREATED_AT
-    ) VALUES (
-        $1, $2, $3, $4, $5, $6, $7, $8, $9, $10,
-        $11, $12, $13, $14, $15, $16, $17, $18, $19, $20,
-        $21, $22, $23, $24, $25, $26, $27, $28, $29, CURRENT_TIMESTAMP
-    )
-    ON CONFLICT (NORAD_CAT_ID) DO UPDATE SET
-        OBJECT_NAME = EXCLUDED.OBJECT_NAME,
-        OBJECT_ID = EXCLUDED.OBJECT_ID,
-        MEAN_ELEMENT_THEORY = EXCLUDED.MEAN_ELEMENT_THEORY,
-        CREATION_DATE = EXCLUDED.CREATION_DATE,
-        EPOCH = EXCLUDED.EPOCH,
-        MEAN_MOTION = EXCLUDED.MEAN_MOTION,
-        ECCENTRICITY = EXCLUDED.ECCENTRICITY,
-        INCLINATION = EXCLUDED.INCLINATION,
-        RA_OF_ASC_NODE = EXCLUDED.RA_OF_ASC_NODE,
-        ARG_OF_PERICENTER = EXCLUDED.ARG_OF_PERICENTER,
-        MEAN_ANOMALY = EXCLUDED.MEAN_ANOMALY,
-        BSTAR = EXCLUDED.BSTAR,
-        MEAN_MOTION_DOT = EXCLUDED.MEAN_MOTION_DOT,
-        MEAN_MOTION_DDOT = EXCLUDED.MEAN_MOTION_DDOT,
-        SEMIMAJOR_AXIS = EXCLUDED.SEMIMAJOR_AXIS,
-        PERIOD = EXCLUDED.PERIOD,
-        APOAPSIS = EXCLUDED.APOAPSIS,
-        PERIAPSIS = EXCLUDED.PERIAPSIS,
-        REV_AT_EPOCH = EXCLUDED.REV_AT_EPOCH,
-        OBJECT_TYPE = EXCLUDED.OBJECT_TYPE,
-        COUNTRY_CODE = EXCLUDED.COUNTRY_CODE,
-        RCS_SIZE = EXCLUDED.RCS_SIZE,
-        LAUNCH_DATE = EXCLUDED.LAUNCH_DATE,
-        DECAY_DATE = EXCLUDED.DECAY_DATE,
-        GP_ID = EXCLUDED.GP_ID,
-        TLE_LINE0 = EXCLUDED.TLE_LINE0,
-        TLE_LINE1 = EXCLUDED.TLE_LINE1,
-        TLE_LINE2 = EXCLUDED.TLE_LINE2,
-        UPDATED_AT = CURRENT_TIMESTAMP
-    """
+            started = time.perf_counter()
+            written = await run_pipeline(
+                api.stream_satcat_page(session, first_id, last_id), convert_satcat_batch, write_batch,
+                executor=executor
+            )
+            elapsed = time.perf_counter() - started
+        logger.info(
+            f"SatCat page {first_id}-{last_id}: {received} records ({written} new or changed) "
+            f"in {elapsed:.1f}s, {received / elapsed if elapsed else 0:.0f} records/s"
+        )
+        return written
 
-    successful_inserts = 0
+    started = time.perf_counter()
+    pages = api.satcat_pages(await api.fetch_max_norad_cat_id(session))
+    tasks = [asyncio.create_task(load_page(first_id, last_id)) for first_id, last_id in pages]
+    try:
+        successful_inserts = sum(await asyncio.gather(*tasks))
+    finally:
+        # A failed page stops the others rather than leaving them running
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
     async with pool.acquire() as connection:
-        for item in raw_data:
-            try:
-                creation_date = parse_datetime(item['CREATION_DATE']) if 'CREATION_DATE' in item else None
-                epoch = parse_datetime(item['EPOCH']) if 'EPOCH' in item else None
-                launch_date = (
-                    datetime.strptime(item['LAUNCH_DATE'], '%Y-%m-%d').date()
-                    if 'LAUNCH_DATE' in item and item['LAUNCH_DATE']
-                    else None
-                )
-                decay_date = (
-                    datetime.strptime(item['DECAY_DATE'], '%Y-%m-%d').date()
-                    if 'DECAY_DATE' in item and item['DECAY_DATE']
-                    else None
-                )
+        await purge_satcat_rejects(connection)
 
-                params = [
-                    str(item.get('NORAD_CAT_ID', 0)),  # Cast to string
-                    item.get('OBJECT_NAME'),
-                    item.get('OBJECT_ID'),
-                    item.get('MEAN_ELEMENT_THEORY'),
-                    creation_date,
-                    epoch,
-                    float(item.get('MEAN_MOTION', 0)),
-                    float(item.get('ECCENTRICITY', 0)),
-                    float(item.get('INCLINATION', 0)),
-                    float(item.get('RA_OF_ASC_NODE', 0)),
-                    float(item.get('ARG_OF_PERICENTER', 0)),
-                    float(item.get('MEAN_ANOMALY', 0)),
-                    float(item.get('BSTAR', 0)),
-                    float(item.get('MEAN_MOTION_DOT', 0)),
-                    float(item.get('MEAN_MOTION_DDOT', 0)),
-                    float(item.get('SEMIMAJOR_AXIS', 0)),
-                    float(item.get('PERIOD', 0)),
-                    float(item.get('APOAPSIS', 0)),
-                    float(item.get('PERIAPSIS', 0)),
-                    int(item.get('REV_AT_EPOCH', 0)),
-                    item.get('OBJECT_TYPE'),
-                    item.get('COUNTRY_CODE'),
-                    item.get('RCS_SIZE'),
-                    launch_date,
-                    decay_date,
-                    int(item.get('GP_ID', 0)),
-                    item.get('TLE_LINE0'),
-                    item.get('TLE_LINE1'),
-                    item.get('TLE_LINE2'),
-                ]
-
-                async with connection.transaction():
-                    await connection.execute(insert_gp_query, *params)
-                    successful_inserts += 1
+    logger.info(
+        f"Completed satellite processing over {len(pages)} pages in {time.perf_counter() - started:.1f}s. "
+        f"Successfully inserted/updated {successful_inserts} records."
+    )
+    return successful_inserts
 
-            except (ValueError, TypeError) as e:
-                logger.error(f"Data conversion error for GP item {item.get('NORAD_CAT_ID', 'unknown')}: {e}")
-                continue
-            except asyncpg.exceptions.PostgresError as e:
-                logger.error(f"Database error processing GP item {item.get('NORAD_CAT_ID', 'unknown')}: {e}")
-                continue
+GP_WATERMARK_SOURCE = 'spacetrack_gp'
+
+INSERT_GP_QUERY = """
+INSERT INTO gp (
+    NORAD_CAT_ID, OBJECT_NAME, OBJECT_ID, MEAN_ELEMENT_THEORY, CREATION_DATE,
+    EPOCH, MEAN_MOTION, ECCENTRICITY, INCLINATION, RA_OF_ASC_NODE,
+    ARG_OF_PERICENTER, MEAN_ANOMALY, BSTAR, MEAN_MOTION_DOT, MEAN_MOTION_DDOT,
+    SEMIMAJOR_AXIS, PERIOD, APOAPSIS, PERIAPSIS, REV_AT_EPOCH,
+    OBJECT_TYPE, COUNTRY_CODE, RCS_SIZE, LAUNCH_DATE, DECAY_DATE,
+    GP_ID, TLE_LINE0, TLE_LINE1, TLE_LINE2, CONTENT_HASH, CREATED_AT
+) VALUES (
+    $1, $2, $3, $4, $5, $6, $7, $8, $9, $10,
+    $11, $12, $13, $14, $15, $16, $17, $18, $19, $20,
+    $21, $22, $23, $24, $25, $26, $27, $28, $29, $30, CURRENT_TIMESTAMP
+)
+ON CONFLICT (NORAD_CAT_ID) DO UPDATE SET
+    OBJECT_NAME = EXCLUDED.OBJECT_NAME,
+    OBJECT_ID = EXCLUDED.OBJECT_ID,
+    MEAN_ELEMENT_THEORY = EXCLUDED.MEAN_ELEMENT_THEORY,
+    CREATION_DATE = EXCLUDED.CREATION_DATE,
+    EPOCH = EXCLUDED.EPOCH,
+    MEAN_MOTION = EXCLUDED.MEAN_MOTION,
+    ECCENTRICITY = EXCLUDED.ECCENTRICITY,
+    INCLINATION = EXCLUDED.INCLINATION,
+    RA_OF_ASC_NODE = EXCLUDED.RA_OF_ASC_NODE,
+    ARG_OF_PERICENTER = EXCLUDED.ARG_OF_PERICENTER,
+    MEAN_ANOMALY = EXCLUDED.MEAN_ANOMALY,
+    BSTAR = EXCLUDED.BSTAR,
+    MEAN_MOTION_DOT = EXCLUDED.MEAN_MOTION_DOT,
+    MEAN_MOTION_DDOT = EXCLUDED.MEAN_MOTION_DDOT,
+    SEMIMAJOR_AXIS = EXCLUDED.SEMIMAJOR_AXIS,
+    PERIOD = EXCLUDED.PERIOD,
+    APOAPSIS = EXCLUDED.APOAPSIS,
+    PERIAPSIS = EXCLUDED.PERIAPSIS,
+    REV_AT_EPOCH = EXCLUDED.REV_AT_EPOCH,
+    OBJECT_TYPE = EXCLUDED.OBJECT_TYPE,
+    COUNTRY_CODE = EXCLUDED.COUNTRY_CODE,
+    RCS_SIZE = EXCLUDED.RCS_SIZE,
+    LAUNCH_DATE = EXCLUDED.LAUNCH_DATE,
+    DECAY_DATE = EXCLUDED.DECAY_DATE,
+    GP_ID = EXCLUDED.GP_ID,
+    TLE_LINE0 = EXCLUDED.TLE_LINE0,
+    TLE_LINE1 = EXCLUDED.TLE_LINE1,
+    TLE_LINE2 = EXCLUDED.TLE_LINE2,
+    CONTENT_HASH = EXCLUDED.CONTENT_HASH,
+    UPDATED_AT = CURRENT_TIMESTAMP
+WHERE gp.CONTENT_HASH IS DISTINCT FROM EXCLUDED.CONTENT_HASH
+"""
+
+def advance_gp_watermark(watermark: Dict[str, Any], records: List[tuple]):
+    """Raises ``watermark`` to the highest CREATION_DATE and GP_ID in ``records``"""
+    for record in records:
+        creation_date, gp_id = record[4], record[25]
+        if creation_date and (watermark['last_timestamp'] is None or creation_date > watermark['last_timestamp']):
+            watermark['last_timestamp'] = creation_date
+        if watermark['last_id'] is None or gp_id > watermark['last_id']:
+            watermark['last_id'] = gp_id
+
+def hold_gp_watermark(watermark: Dict[str, Any], gp_ids: List[Optional[int]]):
+    """
+    Records the GP_IDs of element sets that were fetched but not written, so
+    the stored watermark stops below the lowest of them and the next run
+    fetches them again. An item whose GP_ID can't be read can't be asked for
+    by GP_ID either, so it doesn't hold the watermark.
+    """
+    for gp_id in gp_ids:
+        if gp_id is not None and (watermark['held_below'] is None or gp_id < watermark['held_below']):
+            watermark['held_below'] = gp_id
+
+def final_gp_watermark(watermark: Dict[str, Any]) -> Tuple[Optional[datetime], Optional[int]]:
+    """The (last_timestamp, last_id) to store once the stream has been written"""
+    last_timestamp, last_id, held_below = watermark['last_timestamp'], watermark['last_id'], watermark['held_below']
+    if held_below is not None and last_id is not None and last_id >= held_below:
+        # Rows written past the first unwritten one say nothing about the
+        # CREATION_DATE that is safe to resume from, so only GP_ID advances
+        # (set_watermark keeps the stored timestamp when given None)
+        return None, held_below - 1
+    return last_timestamp, last_id
+
+async def upsert_gp_records(connection, records: List[tuple],
+                            failed: Optional[List[Tuple[tuple, Exception]]] = None) -> int:
+    """
+    Upserts one batch of converted GP rows in a single transaction. Rows the
+    per-row fallback couldn't write are appended to ``failed`` with their
+    errors, as in execute_per_row.
+    """
+    try:
+        async with connection.transaction():
+            return await copy_upsert(
+                connection, 'gp', GP_COLUMNS, records,
+                conflict_columns=['NORAD_CAT_ID'], touch_columns=['UPDATED_AT']
+            )
+    except asyncpg.exceptions.PostgresError as e:
+        # Isolate the offending rows by replaying the batch one row at a time
+        logger.warning(f"Bulk GP upsert failed, falling back to per-row upserts: {e}")
+        return await execute_per_row(connection, INSERT_GP_QUERY, records, 'GP item', failed)
 
+async def process_gp_data(pool, api, session: aiohttp.ClientSession, full_resync: bool = False,
+                          executor: Optional[Executor] = None):
+    """
+    Process GP (General Perturbations) data, writing each streamed batch while
+    later ones are still downloading (see run_pipeline). Batches are converted
+    in ``executor`` when one is given.
+
+    Only element sets newer than the stored watermark are fetched unless
+    ``full_resync`` is set. The watermark advances once the stream completes,
+    but never past an element set that was rejected or failed to write; after
+    a full resync it replaces the stored one, even if that means going back.
+    """
+    rejected = []
+    watermark = {'last_timestamp': None, 'last_id': None, 'held_below': None}
+    async with pool.acquire() as connection:
+        previous = None if full_resync else await get_watermark(connection, GP_WATERMARK_SOURCE)
+        if previous and (previous['last_id'] is not None or previous['last_timestamp'] is not None):
+            logger.info(
+                f"Fetching GP element sets newer than GP_ID {previous['last_id']} "
+                f"/ CREATION_DATE {previous['last_timestamp']}"
+            )
+            batches = api.stream_gp_data(
+                session, since_gp_id=previous['last_id'], since_creation_date=previous['last_timestamp']
+            )
+        else:
+            logger.info("Fetching the full GP catalog")
+            batches = api.stream_gp_data(session)
+
+        async def write_batch(records: ConvertedBatch) -> int:
+            rejected.extend(records.rejected)
+            failed = []
+            written = await upsert_gp_records(connection, records, failed)
+            hold_gp_watermark(watermark, [gp_id for _, gp_id in records.rejected])
+            hold_gp_watermark(watermark, [record[25] for record, _ in failed])
+            advance_gp_watermark(watermark, records)
+            return written
+
+        successful_inserts = await run_pipeline(batches, convert_gp_batch, write_batch, executor=executor)
+
+        last_timestamp, last_id = final_gp_watermark(watermark)
+        if last_id is not None:
+            if last_id != watermark['last_id']:
+                logger.warning(f"Holding the GP watermark at GP_ID {last_id} so unwritten element sets are fetched again")
+            # A full resync read the whole catalog, so its watermark replaces the stored one
+            await set_watermark(connection, GP_WATERMARK_SOURCE, last_timestamp, last_id, force=full_resync)
+
+    if rejected:
+        logger.warning(f"Rejected {len(rejected)} GP items during conversion: {[norad_id for norad_id, _ in rejected[:20]]}")
     logger.info(f"Completed GP processing. Successfully inserted/updated {successful_inserts} records.")
     return successful_inserts
 
-async def main():
+DONKI_BACKFILL_SOURCES = {
+    'cme': (DONKICMEAPI, process_donki_cme_data),
+    'gst': (GeostormAPI, process_geostorm_data),
+    'flr': (SolarFlareAPI, process_solar_flare_data),
+    'hss': (HighSpeedStreamAPI, process_hss_data),
+}
+
+async def backfill_donki(sources: List[str], since: str):
+    """
+    Loads DONKI history from ``since`` for the given sources. Scheduled runs
+    only fetch from each source's watermark, so this is how older events are
+    brought in. Watermarks never move backwards, so a backfill is safe to run
+    at any time. The responses are archived as one run when
+    PAYLOAD_ARCHIVE_URL is set.
+    """
+    db_conn = DatabaseConnection()
+    db_pool = await db_conn.connect()
+    payload_archive = archive.create_archive()
+    response_cache = cache.ResponseCache()
+    if payload_archive:
+        response_cache = archive.ArchivingCache(response_cache, payload_archive)
+        payload_archive.start_run()
+    try:
+        await db_conn.setup_database(db_pool)
+        async with create_http_session() as http_session:
+            for source in sources:
+                api_class, processor = DONKI_BACKFILL_SOURCES[source]
+                logger.info(f"Backfilling DONKI {source.upper()} data since {since}")
+                await processor(db_pool, api_class(response_cache=response_cache), http_session, since)
+        # Backfilled Kp readings land in the default partition until moved into their months
+        await partitions.maintain(db_pool)
+    finally:
+        if payload_archive:
+            await payload_archive.finish_run()
+        await response_cache.close()
+        await db_pool.close()
+        logger.info("Database connection closed")
+
+# Archived source -> (API class, call processing one archived response of it).
+# Each call fetches exactly once per response, except satcat, whose id query
+# and pages are all matched by URL (see archive.ReplayCache)
+REPLAY_SOURCES = {
+    'neows': (NASANeoWsAPI, lambda pool, api, session, entry, executor: process_nasa_data(
+        pool, api, session, entry['params']['start_date'], entry['params'].get('end_date'))),
+    DONKI_CME_SOURCE: (DONKICMEAPI, lambda pool, api, session, entry, executor: process_donki_cme_data(
+        pool, api, session, entry['params']['startDate'])),
+    DONKI_GST_SOURCE: (GeostormAPI, lambda pool, api, session, entry, executor: process_geostorm_data(
+        pool, api, session, entry['params']['startDate'])),
+    DONKI_FLR_SOURCE: (SolarFlareAPI, lambda pool, api, session, entry, executor: process_solar_flare_data(
+        pool, api, session, entry['params']['startDate'])),
+    DONKI_HSS_SOURCE: (HighSpeedStreamAPI, lambda pool, api, session, entry, executor: process_hss_data(
+        pool, api, session, entry['params']['startDate'])),
+    'exoplanets': (NASAExoplanetAPI, lambda pool, api, session, entry, executor: (
+        process_exoplanet_csv if entry['params'].get('format') == 'csv' else process_exoplanet_json
+    )(pool, api, session)),
+    'satcat': (SpaceTrackAPI, lambda pool, api, session, entry, executor: process_satellite_data(
+        pool, api, session, executor)),
+    GP_WATERMARK_SOURCE: (SpaceTrackAPI, lambda pool, api, session, entry, executor: process_gp_data(
+        pool, api, session, True, executor)),
+}
+
+async def replay_run(pool, payload_archive: archive.PayloadArchive, run_id: str, session: aiohttp.ClientSession,
+                     executor: Optional[Executor] = None):
+    """Processes every response archived in one run, source by source, with nothing requested upstream"""
+    replay_cache = archive.ReplayCache(payload_archive, await payload_archive.load_run(run_id))
+    started = time.perf_counter()
+    for source in dict.fromkeys(entry['source'] for entry in replay_cache.pending):
+        api_class, replay = REPLAY_SOURCES[source]
+        api = api_class(response_cache=replay_cache)
+        while remaining := replay_cache.remaining(source):
+            await replay(pool, api, session, remaining[0], executor)
+            if len(replay_cache.remaining(source)) == len(remaining):
+                raise RuntimeError(f"Replaying {source} from run {run_id} consumed no payload")
+    logger.info(f"Replayed archive run {run_id} in {time.perf_counter() - started:.1f} s")
+
+async def replay_archive(run_ids: Optional[List[str]] = None):
+    """
+    Rebuilds or backfills the database from archived payloads (see
+    archive.py) instead of the APIs: every response of the given runs, or
+    of all runs oldest first, goes through the same sanitize_data and
+    process_* paths as when it was fetched. Nothing is requested upstream,
+    but the API clients still read their credentials from the environment.
+    """
+    payload_archive = archive.create_archive()
+    if payload_archive is None:
+        raise ValueError("PAYLOAD_ARCHIVE_URL is not set.")
+    # First, as in IngestionRuntime.start, so its workers are up before the replay needs them
+    transform_executor = offload.create_executor()
+    db_pool = None
     try:
         db_conn = DatabaseConnection()
         db_pool = await db_conn.connect()
-        nasa_api = NASANeoWsAPI()
-        donki_cme_api = DONKICMEAPI()
-        geostorm_api = GeostormAPI()
-        solar_flare_api = SolarFlareAPI()
-        hss_api = HighSpeedStreamAPI()
-        space_track_api = SpaceTrackAPI()
-        exoplanet_api = NASAExoplanetAPI()
+        await db_conn.setup_database(db_pool)
+        run_ids = run_ids or await payload_archive.list_runs()
+        async with create_http_session() as http_session:
+            for run_id in run_ids:
+                await replay_run(db_pool, payload_archive, run_id, http_session, transform_executor)
+        # Replayed Kp readings land in the default partition until moved into their months
+        await partitions.maintain(db_pool)
+    finally:
+        if db_pool is not None:
+            await db_pool.close()
+        await payload_archive.close()
+        if transform_executor is not None:
+            transform_executor.shutdown(cancel_futures=True)
+        logger.info("Database connection closed")
+
+class IngestionRuntime:
+    """
+    The long-lived resources of an ingestion run: the database pool, the
+    shared HTTP session and response cache, the payload archive, the API
+    clients and the transform executor.
 
+    main() builds one per run. lambda_handler keeps one at module level so
+    warm invocations reuse open connections, the Space-Track login and the
+    already verified schema, and rebuilds it only after a failure.
+    """
+    def __init__(self):
+        self.db_conn = None
+        self.db_pool = None
+        self.http_session = None
+        self.response_cache = None
+        self.payload_archive = None
+        self.transform_executor = None
+
+    async def start(self):
+        """Connects to the database, verifies the schema and opens the HTTP session"""
+        # First, so the transform workers are already up when the first pipeline starts
+        self.transform_executor = offload.create_executor()
         try:
-            await db_conn.setup_database(db_pool)
+            self.db_conn = DatabaseConnection()
+            self.db_pool = await self.db_conn.connect()
+            self.response_cache = cache.create_cache()
+            self.payload_archive = archive.create_archive()
+            if self.payload_archive:
+                self.response_cache = archive.ArchivingCache(self.response_cache, self.payload_archive)
+            # NeoWs and DONKI draw on the same api.nasa.gov key quota
+            nasa_rate_limiter = RateLimiter(NASA_RATE_LIMITS)
+            self.nasa_api = NASANeoWsAPI(nasa_rate_limiter, self.response_cache)
+            self.donki_cme_api = DONKICMEAPI(nasa_rate_limiter, self.response_cache)
+            self.geostorm_api = GeostormAPI(nasa_rate_limiter, self.response_cache)
+            self.solar_flare_api = SolarFlareAPI(nasa_rate_limiter, self.response_cache)
+            self.hss_api = HighSpeedStreamAPI(nasa_rate_limiter, self.response_cache)
+            self.space_track_api = SpaceTrackAPI(response_cache=self.response_cache)
+            self.exoplanet_api = NASAExoplanetAPI(self.response_cache)
+            await self.db_conn.setup_database(self.db_pool)
+            self.http_session = create_http_session(trace_configs=[metrics.http_trace_config()])
+        except Exception:
+            await self.close()
+            raise
 
+    async def is_healthy(self) -> bool:
+        """Checks that the pool answers and the HTTP session is still open"""
+        if self.db_pool is None or self.db_pool.is_closing():
+            return False
+        if self.http_session is None or self.http_session.closed:
+            return False
+        try:
+            async with self.db_pool.acquire(timeout=HEALTH_CHECK_TIMEOUT) as connection:
+                await connection.fetchval("SELECT 1", timeout=HEALTH_CHECK_TIMEOUT)
+            return True
+        except (asyncpg.exceptions.PostgresError, OSError, asyncio.TimeoutError) as e:
+            logger.warning(f"Database health check failed: {e}")
+            return False
+
+    async def close(self):
+        if self.http_session is not None:
+            await self.http_session.close()
+            self.http_session = None
+        if self.response_cache is not None:
+            # Also closes the payload archive it feeds
+            await self.response_cache.close()
+            self.response_cache = None
+            self.payload_archive = None
+        if self.db_pool is not None:
+            await self.db_pool.close()
+            self.db_pool = None
+            logger.info("Database connection closed")
+        if self.transform_executor is not None:
+            self.transform_executor.shutdown(cancel_futures=True)
+            self.transform_executor = None
+
+    async def run(self) -> Dict[str, Any]:
+        """Runs every source concurrently and returns the result dict for the caller"""
+        run_metrics = metrics.start_run()
+        if self.payload_archive:
+            self.payload_archive.start_run()
+        try:
+            db_pool, http_session = self.db_pool, self.http_session
+            await partitions.maintain(db_pool)
+            sources = {
+                'neows': process_nasa_data(db_pool, self.nasa_api, http_session, None),
+                DONKI_CME_SOURCE: process_donki_cme_data(db_pool, self.donki_cme_api, http_session, None),
+                'satcat': process_satellite_data(db_pool, self.space_track_api, http_session,
+                                                 self.transform_executor),
+                GP_WATERMARK_SOURCE: process_gp_data(db_pool, self.space_track_api, http_session, GP_FULL_RESYNC,
+                                                     self.transform_executor),
+                DONKI_GST_SOURCE: process_geostorm_data(db_pool, self.geostorm_api, http_session, None),
+                DONKI_FLR_SOURCE: process_solar_flare_data(db_pool, self.solar_flare_api, http_session, None),
+                DONKI_HSS_SOURCE: process_hss_data(db_pool, self.hss_api, http_session, None),
+                'exoplanets': process_exoplanet_data(db_pool, self.exoplanet_api, http_session)
+            }
             tasks = [
-                asyncio.create_task(process_nasa_data(db_pool, nasa_api, None)),
-                asyncio.create_task(process_donki_cme_data(db_pool, donki_cme_api, None)),
-                asyncio.create_task(process_satellite_data(db_pool, space_track_api)),
-                asyncio.create_task(process_gp_data(db_pool, space_track_api)),
-                asyncio.create_task(process_geostorm_data(db_pool, geostorm_api, None)),
-                asyncio.create_task(process_solar_flare_data(db_pool, solar_flare_api, None)),
-                asyncio.create_task(process_hss_data(db_pool, hss_api, None)),
-                asyncio.create_task(process_exoplanet_data(db_pool, exoplanet_api))
+                asyncio.create_task(metrics.measure_source(name, processor))
+                for name, processor in sources.items()
             ]
-
             results = await asyncio.gather(*tasks, return_exceptions=True)
-            
+
             errors = [r for r in results if isinstance(r, Exception)]
             if errors:
                 raise Exception(f"Errors occurred during processing: {errors}")
-            
+
             logger.info("All data processing completed successfully")
             return {
                 'statusCode': 200,
                 'message': 'Successfully processed all data',
+                'metrics': run_metrics.as_dict(),
+                'timestamp': datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"Error in main execution: {str(e)}")
+            return {
+                'statusCode': 500,
+                'error': str(e),
+                'metrics': run_metrics.as_dict(),
                 'timestamp': datetime.now().isoformat()
             }
         finally:
-            await db_pool.close()
-            logger.info("Database connection closed")
+            if self.payload_archive:
+                await self.payload_archive.finish_run()
+            run_metrics.emit()
+
+async def main():
+    runtime = IngestionRuntime()
+    try:
+        await runtime.start()
+        return await runtime.run()
     except Exception as e:
         logger.error(f"Error in main execution: {str(e)}")
         return {
@@ -1421,9 +2285,74 @@ async def main():
             'error': str(e),
             'timestamp': datetime.now().isoformat()
         }
+    finally:
+        await runtime.close()
+
+# Kept across warm invocations of the same Lambda execution environment
+_event_loop = None
+_runtime = None
+
+async def handle_invocation() -> Dict[str, Any]:
+    """Runs one ingestion on the cached runtime, rebuilding it if it is missing or unhealthy"""
+    global _runtime
+    if _runtime is not None and not await _runtime.is_healthy():
+        logger.info("Cached runtime failed its health check, rebuilding")
+        await _runtime.close()
+        _runtime = None
+
+    if _runtime is None:
+        runtime = IngestionRuntime()
+        try:
+            await runtime.start()
+        except Exception as e:
+            logger.error(f"Error starting ingestion runtime: {str(e)}")
+            return {
+                'statusCode': 500,
+                'error': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+        _runtime = runtime
+    else:
+        logger.info("Reusing warm ingestion runtime")
+
+    result = await _runtime.run()
+    if result['statusCode'] != 200:
+        # Don't carry connections of unknown state into the next invocation
+        await _runtime.close()
+        _runtime = None
+    return result
+
+def lambda_handler(event, context):
+    """AWS Lambda entry point. The event loop and runtime outlive the invocation."""
+    global _event_loop
+    if _event_loop is None or _event_loop.is_closed():
+        _event_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_event_loop)
+    return _event_loop.run_until_complete(handle_invocation())
 
 if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="NASA and Space-Track data ingestion")
+    arg_parser.add_argument('--backfill', nargs='+', choices=sorted(DONKI_BACKFILL_SOURCES),
+                            help="load DONKI history for these sources instead of running the regular ingestion")
+    arg_parser.add_argument('--since', default='2010-01-01',
+                            help="start date (YYYY-MM-DD) for --backfill, defaults to 2010-01-01")
+    arg_parser.add_argument('--replay', nargs='*', metavar='RUN',
+                            help="load the payloads archived under PAYLOAD_ARCHIVE_URL for these runs, "
+                                 "or all runs if none are given, instead of fetching them")
+    args = arg_parser.parse_args()
+
     try:
+        if args.backfill:
+            asyncio.run(backfill_donki(args.backfill, args.since))
+            logger.info("Backfill completed successfully")
+            sys.exit(0)
+        if args.replay is not None:
+            asyncio.run(replay_archive(args.replay))
+            logger.info("Replay completed successfully")
+            sys.exit(0)
+
         result = asyncio.run(main())
         if result['statusCode'] != 200:
             logger.error(f"Process failed: {result.get('error', 'Unknown error')}")
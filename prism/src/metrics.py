@@ -0,0 +1,233 @@
+"""
+Per-source, per-stage run metrics for the ingestion Lambda.
+
+A run is started with start_run(). Each source runs inside source(), and the
+fetch, transform and write steps inside stage(). Bytes received and database
+round trips are attributed to the source and stage that are current when
+they happen, through context variables, so concurrent sources don't mix.
+Outside a run every call is a no-op.
+
+At the end of a run the metrics are returned as a dict and written to stdout
+as CloudWatch Embedded Metric Format (EMF) lines, one per source and stage.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+import aiohttp
+import asyncpg
+
+METRICS_NAMESPACE = os.getenv('METRICS_NAMESPACE', 'Prism/Ingestion')
+
+# Emitted metric names and CloudWatch units, keyed by StageMetrics attribute
+METRIC_UNITS = {
+    'wall_time_ms': ('WallTime', 'Milliseconds'),
+    'bytes_received': ('BytesReceived', 'Bytes'),
+    'rows_in': ('RowsIn', 'Count'),
+    'rows_out': ('RowsOut', 'Count'),
+    'rows_rejected': ('RowsRejected', 'Count'),
+    'rows_unchanged': ('RowsUnchanged', 'Count'),
+    'round_trips': ('DbRoundTrips', 'Count'),
+    'cache_hits': ('CacheHits', 'Count'),
+    'cache_revalidations': ('CacheRevalidations', 'Count'),
+    'cache_misses': ('CacheMisses', 'Count'),
+}
+
+# record_cache outcome -> StageMetrics attribute
+CACHE_OUTCOMES = {'hit': 'cache_hits', 'revalidated': 'cache_revalidations', 'miss': 'cache_misses'}
+
+
+class StageMetrics:
+    """Counters for one stage of one source"""
+    def __init__(self):
+        self.wall_time_ms = 0.0
+        self.bytes_received = 0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.rows_rejected = 0
+        self.rows_unchanged = 0
+        self.round_trips = 0
+        self.cache_hits = 0
+        self.cache_revalidations = 0
+        self.cache_misses = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in METRIC_UNITS}
+
+
+class RunMetrics:
+    """All stage metrics recorded during one ingestion run"""
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, StageMetrics]] = {}
+
+    def get(self, source: str, stage: str) -> StageMetrics:
+        return self.stages.setdefault(source, {}).setdefault(stage, StageMetrics())
+
+    def as_dict(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        return {
+            source: {stage: metrics.as_dict() for stage, metrics in stages.items()}
+            for source, stages in self.stages.items()
+        }
+
+    def emf_records(self) -> List[Dict[str, Any]]:
+        """One EMF document per source and stage"""
+        timestamp = int(time.time() * 1000)
+        definitions = [{'Name': name, 'Unit': unit} for name, unit in METRIC_UNITS.values()]
+        records = []
+        for source, stages in self.stages.items():
+            for stage, metrics in stages.items():
+                record = {
+                    '_aws': {
+                        'Timestamp': timestamp,
+                        'CloudWatchMetrics': [{
+                            'Namespace': METRICS_NAMESPACE,
+                            'Dimensions': [['Source', 'Stage']],
+                            'Metrics': definitions,
+                        }],
+                    },
+                    'Source': source,
+                    'Stage': stage,
+                }
+                for attribute, (name, _) in METRIC_UNITS.items():
+                    record[name] = getattr(metrics, attribute)
+                records.append(record)
+        return records
+
+    def emit(self, stream=None):
+        """Writes the EMF documents as single-line JSON, which CloudWatch Logs extracts as metrics"""
+        stream = stream or sys.stdout
+        for record in self.emf_records():
+            stream.write(json.dumps(record) + '\n')
+        stream.flush()
+
+
+_run: ContextVar[Optional[RunMetrics]] = ContextVar('metrics_run', default=None)
+_source: ContextVar[Optional[str]] = ContextVar('metrics_source', default=None)
+_stage: ContextVar[Optional[str]] = ContextVar('metrics_stage', default=None)
+
+
+def start_run() -> RunMetrics:
+    """Starts collecting metrics for the current context and the tasks it creates"""
+    run = RunMetrics()
+    _run.set(run)
+    return run
+
+
+def _current(default_stage: str) -> Optional[StageMetrics]:
+    run, source = _run.get(), _source.get()
+    if run is None or source is None:
+        return None
+    return run.get(source, _stage.get() or default_stage)
+
+
+@contextmanager
+def source(name: str) -> Iterator[StageMetrics]:
+    """Attributes everything recorded inside the block to ``name``; its own wall time is stage 'total'"""
+    source_token = _source.set(name)
+    stage_token = _stage.set(None)
+    run = _run.get()
+    total = run.get(name, 'total') if run else StageMetrics()
+    started = time.perf_counter()
+    try:
+        yield total
+    finally:
+        total.wall_time_ms += (time.perf_counter() - started) * 1000
+        _stage.reset(stage_token)
+        _source.reset(source_token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[StageMetrics]:
+    """
+    Times the block as stage ``name`` of the current source. Time and counters
+    accumulate, so a stage entered once per batch reports the sum.
+    """
+    token = _stage.set(name)
+    run, current_source = _run.get(), _source.get()
+    metrics = run.get(current_source, name) if run and current_source else StageMetrics()
+    started = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.wall_time_ms += (time.perf_counter() - started) * 1000
+        _stage.reset(token)
+
+
+def record_bytes(count: int):
+    """Adds response bytes to the current stage, or to 'fetch' outside one"""
+    metrics = _current('fetch')
+    if metrics:
+        metrics.bytes_received += count
+
+
+def record_round_trip():
+    """Counts one database round trip against the current stage, or 'write' outside one"""
+    metrics = _current('write')
+    if metrics:
+        metrics.round_trips += 1
+
+
+def record_unchanged(count: int):
+    """Counts rows an upsert skipped because their content hash matched, against the current stage or 'write'"""
+    metrics = _current('write')
+    if metrics:
+        metrics.rows_unchanged += count
+
+
+def record_cache(outcome: str):
+    """
+    Counts one response cache lookup against the current stage, or 'fetch'
+    outside one: 'hit' (served without a request), 'revalidated' (upstream
+    answered 304) or 'miss' (downloaded)
+    """
+    metrics = _current('fetch')
+    if metrics:
+        setattr(metrics, CACHE_OUTCOMES[outcome], getattr(metrics, CACHE_OUTCOMES[outcome]) + 1)
+
+
+def http_trace_config() -> aiohttp.TraceConfig:
+    """Counts bytes of fully read response bodies (streamed bodies call record_bytes themselves)"""
+    async def on_response_chunk_received(session, ctx, params):
+        record_bytes(len(params.chunk))
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_response_chunk_received.append(on_response_chunk_received)
+    return trace_config
+
+
+class InstrumentedConnection(asyncpg.Connection):
+    """asyncpg connection that counts round trips; pass as create_pool(connection_class=...)"""
+
+    async def execute(self, query, *args, **kwargs):
+        record_round_trip()
+        return await super().execute(query, *args, **kwargs)
+
+    async def executemany(self, command, args, **kwargs):
+        record_round_trip()
+        return await super().executemany(command, args, **kwargs)
+
+    async def fetch(self, query, *args, **kwargs):
+        record_round_trip()
+        return await super().fetch(query, *args, **kwargs)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        record_round_trip()
+        return await super().fetchrow(query, *args, **kwargs)
+
+    async def fetchval(self, query, *args, **kwargs):
+        record_round_trip()
+        return await super().fetchval(query, *args, **kwargs)
+
+    async def copy_records_to_table(self, table_name, **kwargs):
+        record_round_trip()
+        return await super().copy_records_to_table(table_name, **kwargs)
+
+
+async def measure_source(name: str, awaitable):
+    """Awaits one source's processor with its metrics attributed to ``name``"""
+    with source(name):
+        return await awaitable
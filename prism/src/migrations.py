@@ -0,0 +1,564 @@
+"""
+Versioned schema migrations for the ingestion database.
+
+Each step in MIGRATIONS runs once, in order, and is recorded in the
+schema_version table. When the database is already at LATEST_VERSION a run
+costs a single SELECT; otherwise the missing steps are applied in one
+transaction under an advisory lock, so concurrent invocations don't race.
+
+Add new steps to the end of MIGRATIONS and never edit one that has shipped.
+Step 1 is written with IF NOT EXISTS guards so databases created before
+versioning existed adopt it without changes.
+"""
+import logging
+from typing import List, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_advisory_xact_lock
+MIGRATION_LOCK_ID = 4_170_551_203
+
+# Natural keys of the child tables that only have serial ids
+CHILD_TABLE_NATURAL_KEYS = {
+    'neo_approaches': ('neo_id', 'close_approach_date'),
+    'geostorm_kp_index': ('gst_id', 'observed_time', 'source'),
+    'solar_flare_instruments': ('flare_id', 'instrument_name'),
+    'hss_instruments': ('hss_id', 'instrument_name'),
+    'linked_events': ('source_id', 'source_type', 'linked_activity_id'),
+}
+
+def natural_key_compaction_sql(table: str, key_columns: Tuple[str, ...]) -> str:
+    """
+    One-time migration for tables created before the natural key existed:
+    deletes duplicate rows, keeping the most recently ingested copy, then
+    adds the unique constraint. Does nothing once the constraint is present.
+    """
+    constraint = f"{table}_natural_key"
+    keys = ', '.join(key_columns)
+    return f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1
+            FROM pg_constraint
+            WHERE conname = '{constraint}'
+        ) THEN
+            DELETE FROM {table}
+            WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, row_number() OVER (PARTITION BY {keys} ORDER BY id DESC) AS copy_number
+                    FROM {table}
+                ) copies
+                WHERE copy_number > 1
+            );
+
+            ALTER TABLE {table} ADD CONSTRAINT {constraint} UNIQUE ({keys});
+        END IF;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+
+def null_key_compaction_sql(table: str, key_columns: Tuple[str, ...]) -> str:
+    """
+    Deletes duplicate rows whose natural key has a NULL part, keeping the
+    most recently ingested copy. The unique constraint never treats such
+    keys as equal, so every run used to add another copy; insert_unnest now
+    drops those rows instead.
+    """
+    keys = ', '.join(key_columns)
+    null_key = ' OR '.join(f"{column} IS NULL" for column in key_columns)
+    return f"""
+    DELETE FROM {table}
+    WHERE id IN (
+        SELECT id FROM (
+            SELECT id, row_number() OVER (PARTITION BY {keys} ORDER BY id DESC) AS copy_number
+            FROM {table}
+            WHERE {null_key}
+        ) copies
+        WHERE copy_number > 1
+    );
+    """
+
+CREATE_ENUM_SQL = """
+DO $$ 
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'current_enum') THEN
+        CREATE TYPE current_enum AS ENUM ('Y', 'N');
+    END IF;
+END $$;
+"""
+
+CREATE_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS neo_objects (
+    id VARCHAR(50) PRIMARY KEY,
+    name VARCHAR(255),
+    observation_date DATE,
+    estimated_diameter_km DOUBLE PRECISION,
+    is_potentially_hazardous BOOLEAN,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS neo_approaches (
+    id SERIAL PRIMARY KEY,
+    neo_id VARCHAR(50) REFERENCES neo_objects(id),
+    close_approach_date DATE,
+    relative_velocity_kph DOUBLE PRECISION,
+    miss_distance_km DOUBLE PRECISION,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT neo_approaches_natural_key UNIQUE (neo_id, close_approach_date)
+);
+
+CREATE TABLE IF NOT EXISTS donki_cme (
+    id SERIAL PRIMARY KEY,
+    activity_id VARCHAR(50) UNIQUE,
+    catalog VARCHAR(50),
+    start_time TIMESTAMP,
+    source_location VARCHAR(50),
+    active_region_num VARCHAR(50),
+    link TEXT,
+    note TEXT,
+    latitude FLOAT,
+    longitude FLOAT,
+    half_angle FLOAT,
+    speed FLOAT,
+    type VARCHAR(50),
+    level_of_data INTEGER,
+    completion_time TIMESTAMP,
+    is_most_accurate BOOLEAN,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS donki_geostorm (
+    id SERIAL PRIMARY KEY,
+    gst_id VARCHAR(50) UNIQUE,
+    start_time TIMESTAMP,
+    link TEXT,
+    submission_time TIMESTAMP,
+    version_id INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS geostorm_kp_index (
+    id SERIAL PRIMARY KEY,
+    gst_id VARCHAR(50) REFERENCES donki_geostorm(gst_id),
+    observed_time TIMESTAMP,
+    kp_index FLOAT,
+    source VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT geostorm_kp_index_natural_key UNIQUE (gst_id, observed_time, source)
+);
+
+CREATE TABLE IF NOT EXISTS donki_solar_flare (
+    id SERIAL PRIMARY KEY,
+    flare_id VARCHAR(50) UNIQUE,
+    begin_time TIMESTAMP,
+    peak_time TIMESTAMP,
+    end_time TIMESTAMP,
+    class_type VARCHAR(10),
+    source_location VARCHAR(50),
+    active_region_num INTEGER,
+    link TEXT,
+    note TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS solar_flare_instruments (
+    id SERIAL PRIMARY KEY,
+    flare_id VARCHAR(50) REFERENCES donki_solar_flare(flare_id),
+    instrument_name VARCHAR(100),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT solar_flare_instruments_natural_key UNIQUE (flare_id, instrument_name)
+);
+
+CREATE TABLE IF NOT EXISTS donki_hss (
+    id SERIAL PRIMARY KEY,
+    hss_id VARCHAR(50) UNIQUE,
+    event_time TIMESTAMP,
+    link TEXT,
+    submission_time TIMESTAMP,
+    version_id INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS hss_instruments (
+    id SERIAL PRIMARY KEY,
+    hss_id VARCHAR(50) REFERENCES donki_hss(hss_id),
+    instrument_name VARCHAR(100),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT hss_instruments_natural_key UNIQUE (hss_id, instrument_name)
+);
+
+CREATE TABLE IF NOT EXISTS exoplanets (
+    planet_name VARCHAR(255) UNIQUE NOT NULL,
+    host_star VARCHAR(255),
+    discovery_method VARCHAR(255),
+    orbital_period DOUBLE PRECISION,
+    planet_radius DOUBLE PRECISION,
+    mass DOUBLE PRECISION,
+    semi_major_axis DOUBLE PRECISION,
+    discovery_year INTEGER,
+    orbital_eccentricity DOUBLE PRECISION,
+    insolation_flux DOUBLE PRECISION,
+    equilibrium_temp DOUBLE PRECISION,
+    density DOUBLE PRECISION,
+    star_temp DOUBLE PRECISION,
+    star_radius DOUBLE PRECISION,
+    star_mass DOUBLE PRECISION,
+    star_metallicity DOUBLE PRECISION,
+    facility VARCHAR(255),
+    telescope VARCHAR(255),
+    instrument VARCHAR(255),
+    ra_str VARCHAR(50),
+    dec_str VARCHAR(50),
+    controversial BOOLEAN,
+    reference TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS linked_events (
+    id SERIAL PRIMARY KEY,
+    source_id VARCHAR(50),
+    source_type VARCHAR(20),
+    linked_activity_id VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT linked_events_natural_key UNIQUE (source_id, source_type, linked_activity_id)
+);
+
+CREATE TABLE IF NOT EXISTS sat_cat (
+    INTLDES char(12) NOT NULL,
+    NORAD_CAT_ID int PRIMARY KEY CHECK (NORAD_CAT_ID >= 0),
+    OBJECT_TYPE varchar(12),
+    SATNAME char(25) NOT NULL,
+    COUNTRY char(6) NOT NULL,
+    LAUNCH_DATE date,
+    SITE char(5),
+    DECAY_DATE date,
+    PERIOD decimal(12,2),
+    INCLINATION decimal(12,2),
+    APOGEE bigint CHECK (APOGEE >= 0),
+    PERIGEE bigint CHECK (PERIGEE >= 0),
+    RCS_VALUE int NOT NULL DEFAULT 0,
+    RCS_SIZE varchar(6),
+    LAUNCH_YEAR smallint NOT NULL DEFAULT 0 CHECK (LAUNCH_YEAR >= 0),
+    LAUNCH_NUM smallint NOT NULL DEFAULT 0 CHECK (LAUNCH_NUM >= 0),
+    LAUNCH_PIECE varchar(3) NOT NULL,
+    CURRENT current_enum NOT NULL DEFAULT 'N',
+    OBJECT_NAME char(25) NOT NULL,
+    OBJECT_ID char(12) NOT NULL,
+    OBJECT_NUMBER int CHECK (OBJECT_NUMBER >= 0),
+    created_at timestamp DEFAULT CURRENT_TIMESTAMP,
+    updated_at timestamp DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS ingestion_state (
+    source VARCHAR(50) PRIMARY KEY,
+    last_timestamp TIMESTAMP,
+    last_id BIGINT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS gp (
+    NORAD_CAT_ID character varying PRIMARY KEY,
+    OBJECT_NAME character(1),
+    OBJECT_ID character(1),
+    MEAN_ELEMENT_THEORY character varying,
+    CREATION_DATE timestamp without time zone,
+    EPOCH timestamp without time zone,
+    MEAN_MOTION double precision,
+    ECCENTRICITY double precision,
+    INCLINATION double precision,
+    RA_OF_ASC_NODE double precision,
+    ARG_OF_PERICENTER double precision,
+    MEAN_ANOMALY double precision,
+    BSTAR double precision,
+    MEAN_MOTION_DOT double precision,
+    MEAN_MOTION_DDOT double precision,
+    SEMIMAJOR_AXIS double precision,
+    PERIOD double precision,
+    APOAPSIS double precision,
+    PERIAPSIS double precision,
+    REV_AT_EPOCH bigint,
+    OBJECT_TYPE character varying,
+    COUNTRY_CODE char,
+    RCS_SIZE character varying,
+    LAUNCH_DATE date,
+    DECAY_DATE date,
+    GP_ID integer,
+    TLE_LINE0 character varying,
+    TLE_LINE1 character varying,
+    TLE_LINE2 character varying,
+    created_at timestamp DEFAULT CURRENT_TIMESTAMP,
+    updated_at timestamp DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+CREATE_TRIGGER_SQL = """
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM pg_trigger
+        WHERE tgname = 'set_updated_at'
+    ) THEN
+        CREATE OR REPLACE FUNCTION update_updated_at_column()
+        RETURNS TRIGGER AS $func$
+        BEGIN
+            NEW.updated_at = CURRENT_TIMESTAMP;
+            RETURN NEW;
+        END;
+        $func$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER set_updated_at
+        BEFORE UPDATE ON gp
+        FOR EACH ROW
+        EXECUTE FUNCTION update_updated_at_column();
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+# Indexes for the frontend's read paths (projectoasis/src/app/api/*/route.ts).
+# The debris view filters gp on "decay_date IS NULL OR decay_date > CURRENT_DATE";
+# the planner answers that with a BitmapOr over the two partial gp indexes.
+# geostorm_kp_index lookups by gst_id already use its natural key.
+CREATE_READ_INDEXES_SQL = """
+CREATE INDEX IF NOT EXISTS gp_active_updated_at_idx ON gp (updated_at) WHERE decay_date IS NULL;
+CREATE INDEX IF NOT EXISTS gp_decayed_idx ON gp (decay_date, updated_at) WHERE decay_date IS NOT NULL;
+CREATE INDEX IF NOT EXISTS donki_solar_flare_begin_time_idx ON donki_solar_flare (begin_time);
+CREATE INDEX IF NOT EXISTS donki_cme_start_time_idx ON donki_cme (start_time);
+CREATE INDEX IF NOT EXISTS geostorm_kp_index_observed_time_idx ON geostorm_kp_index (observed_time);
+CREATE INDEX IF NOT EXISTS neo_objects_observation_date_idx ON neo_objects (observation_date);
+CREATE INDEX IF NOT EXISTS neo_approaches_close_approach_date_idx ON neo_approaches (close_approach_date);
+
+-- environmental_scores belongs to the Predictor, which creates the same
+-- indexes when it creates the table
+DO $$
+BEGIN
+    IF to_regclass('environmental_scores') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS environmental_scores_region_timestamp_idx ON environmental_scores (region, timestamp);
+        CREATE INDEX IF NOT EXISTS environmental_scores_timestamp_idx ON environmental_scores (timestamp);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+def partition_conversion_sql(table: str, column: str, create_sql: str, columns: str) -> str:
+    """
+    One-time migration turning a plain table into one range-partitioned by
+    month on ``column``. The existing table is renamed, its indexes dropped so
+    the new table can take their names, and its rows copied into one
+    partition per month present plus a DEFAULT partition for the rest.
+    ``create_sql`` creates the partitioned table using the old id sequence.
+    Does nothing if the table is missing or already partitioned.
+    Rows without a ``column`` value can't be partitioned and are dropped.
+    """
+    old_table = f"{table}_unpartitioned"
+    return f"""
+    DO $$
+    DECLARE
+        index_name text;
+        constraint_name text;
+        month date;
+    BEGIN
+        IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('{table}')) = 'r' THEN
+            ALTER TABLE {table} RENAME TO {old_table};
+            FOR index_name, constraint_name IN
+                SELECT i.relname, c.conname
+                FROM pg_index x
+                JOIN pg_class i ON i.oid = x.indexrelid
+                LEFT JOIN pg_constraint c ON c.conindid = x.indexrelid AND c.conrelid = x.indrelid
+                WHERE x.indrelid = '{old_table}'::regclass
+            LOOP
+                IF constraint_name IS NOT NULL THEN
+                    EXECUTE format('ALTER TABLE {old_table} DROP CONSTRAINT %I', constraint_name);
+                ELSE
+                    EXECUTE format('DROP INDEX %I', index_name);
+                END IF;
+            END LOOP;
+
+            {create_sql};
+            ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id;
+
+            -- Named like partitions.partition_name()
+            FOR month IN SELECT DISTINCT date_trunc('month', "{column}")::date FROM {old_table} WHERE "{column}" IS NOT NULL LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                    '{table}_' || to_char(month, 'YYYY_MM'), month, month + interval '1 month'
+                );
+            END LOOP;
+            CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;
+
+            INSERT INTO {table} ({columns})
+            SELECT {columns} FROM {old_table} WHERE "{column}" IS NOT NULL;
+            DROP TABLE {old_table};
+        END IF;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+
+# Both keep the id sequence of the tables they replace. The partition key
+# has to be part of every unique constraint, so it joins the primary key.
+PARTITIONED_KP_INDEX_SQL = """
+CREATE TABLE geostorm_kp_index (
+    id INTEGER NOT NULL DEFAULT nextval('geostorm_kp_index_id_seq'),
+    gst_id VARCHAR(50) REFERENCES donki_geostorm(gst_id),
+    observed_time TIMESTAMP NOT NULL,
+    kp_index FLOAT,
+    source VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT geostorm_kp_index_pkey PRIMARY KEY (id, observed_time),
+    CONSTRAINT geostorm_kp_index_natural_key UNIQUE (gst_id, observed_time, source)
+) PARTITION BY RANGE (observed_time)
+"""
+
+PARTITIONED_ENVIRONMENTAL_SCORES_SQL = """
+CREATE TABLE environmental_scores (
+    id INTEGER NOT NULL DEFAULT nextval('environmental_scores_id_seq'),
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    region VARCHAR(2) NOT NULL,
+    risk_score DECIMAL(10,6) NOT NULL,
+    flare_risk DECIMAL(10,6),
+    cme_risk DECIMAL(10,6),
+    storm_risk DECIMAL(10,6),
+    debris_risk DECIMAL(10,6),
+    data_status VARCHAR(20) NOT NULL,
+    confidence_score DECIMAL(10,6),
+    model_version VARCHAR(10),
+    CONSTRAINT environmental_scores_pkey PRIMARY KEY (id, timestamp),
+    CONSTRAINT region_check CHECK (region ~ '^[1-3][A-D]$')
+) PARTITION BY RANGE (timestamp)
+"""
+
+PARTITION_TIME_SERIES_SQL = (
+    partition_conversion_sql(
+        'geostorm_kp_index', 'observed_time', PARTITIONED_KP_INDEX_SQL,
+        'id, gst_id, observed_time, kp_index, source, created_at'
+    )
+    + partition_conversion_sql(
+        'environmental_scores', 'timestamp', PARTITIONED_ENVIRONMENTAL_SCORES_SQL,
+        'id, timestamp, region, risk_score, flare_risk, cme_risk, storm_risk, debris_risk, '
+        'data_status, confidence_score, model_version'
+    )
+    + """
+    CREATE INDEX IF NOT EXISTS geostorm_kp_index_observed_time_idx ON geostorm_kp_index (observed_time);
+
+    DO $$
+    BEGIN
+        IF to_regclass('environmental_scores') IS NOT NULL THEN
+            CREATE INDEX IF NOT EXISTS environmental_scores_region_timestamp_idx ON environmental_scores (region, timestamp);
+            CREATE INDEX IF NOT EXISTS environmental_scores_timestamp_idx ON environmental_scores (timestamp);
+        END IF;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+)
+
+# Tables upserted from API payloads; each row stores a digest of its ingested
+# values so unchanged rows are skipped instead of rewritten (see content_hash
+# in lambda_function). Existing rows start out NULL and are hashed on their
+# next upsert.
+CONTENT_HASH_TABLES = [
+    'neo_objects', 'donki_cme', 'donki_geostorm', 'donki_solar_flare', 'donki_hss', 'exoplanets', 'sat_cat', 'gp'
+]
+
+ADD_CONTENT_HASH_SQL = ''.join(
+    f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS content_hash BYTEA;\n" for table in CONTENT_HASH_TABLES
+)
+
+# SATCAT records that failed conversion, a sat_cat constraint, or the upsert
+# itself, kept with the reason and the raw record for inspection instead of
+# being dropped with only a log line (see upsert_satcat_records)
+CREATE_SAT_CAT_REJECTS_SQL = """
+CREATE TABLE IF NOT EXISTS sat_cat_rejects (
+    id SERIAL PRIMARY KEY,
+    norad_cat_id TEXT,
+    reason TEXT NOT NULL,
+    record JSONB NOT NULL,
+    rejected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS sat_cat_rejects_rejected_at_idx ON sat_cat_rejects (rejected_at);
+"""
+
+# A reject is stored once: every run meets the same malformed records again,
+# so each row is identified by a digest of its id, reason and record (jsonb
+# text is normalised, so key order and spacing don't matter). Copies stored
+# before the digest existed are compacted to the first one.
+SAT_CAT_REJECTS_CONTENT_HASH_SQL = """
+ALTER TABLE sat_cat_rejects ADD COLUMN IF NOT EXISTS content_hash BYTEA
+    GENERATED ALWAYS AS (
+        decode(md5(coalesce(norad_cat_id, '') || E'\\n' || reason || E'\\n' || record::text), 'hex')
+    ) STORED;
+DELETE FROM sat_cat_rejects
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, row_number() OVER (PARTITION BY content_hash ORDER BY id) AS copy_number
+        FROM sat_cat_rejects
+    ) copies
+    WHERE copy_number > 1
+);
+CREATE UNIQUE INDEX IF NOT EXISTS sat_cat_rejects_content_hash_idx ON sat_cat_rejects (content_hash);
+"""
+
+# (version, description, SQL), applied in ascending version order
+MIGRATIONS: List[Tuple[int, str, str]] = [
+    (1, 'baseline schema', CREATE_ENUM_SQL + CREATE_TABLES_SQL + CREATE_TRIGGER_SQL),
+    (2, 'child table natural keys', ''.join(
+        natural_key_compaction_sql(table, key_columns) for table, key_columns in CHILD_TABLE_NATURAL_KEYS.items()
+    )),
+    (3, 'read path indexes', CREATE_READ_INDEXES_SQL),
+    (4, 'monthly partitions for time series tables', PARTITION_TIME_SERIES_SQL),
+    (5, 'content hashes for upserted tables', ADD_CONTENT_HASH_SQL),
+    (6, 'sat_cat rejects quarantine', CREATE_SAT_CAT_REJECTS_SQL),
+    (7, 'compact child rows with NULL natural key parts', ''.join(
+        null_key_compaction_sql(table, key_columns) for table, key_columns in CHILD_TABLE_NATURAL_KEYS.items()
+    )),
+    (8, 'deduplicate sat_cat rejects', SAT_CAT_REJECTS_CONTENT_HASH_SQL),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+CREATE_SCHEMA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+async def current_version(connection) -> int:
+    """Highest applied migration, 0 for a database that predates schema_version"""
+    try:
+        return await connection.fetchval("SELECT max(version) FROM schema_version") or 0
+    except asyncpg.exceptions.UndefinedTableError:
+        return 0
+
+
+async def migrate(pool) -> int:
+    """
+    Brings the schema up to LATEST_VERSION and returns the number of steps
+    applied. Costs one query when nothing is pending.
+    """
+    async with pool.acquire() as conn:
+        if await current_version(conn) >= LATEST_VERSION:
+            return 0
+
+        async with conn.transaction():
+            # Serializes concurrent cold starts; the lock is released at commit
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_ID)
+            await conn.execute(CREATE_SCHEMA_VERSION_SQL)
+            version = await current_version(conn)
+            pending = [step for step in MIGRATIONS if step[0] > version]
+            for step_version, description, sql in pending:
+                await conn.execute(sql)
+                await conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES ($1, $2)",
+                    step_version, description
+                )
+                logger.info(f"Applied migration {step_version}: {description}")
+
+    return len(pending)
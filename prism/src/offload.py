@@ -0,0 +1,69 @@
+"""
+Executor for the CPU-bound transform stage of the ingestion pipelines.
+
+Converting GP and SATCAT batches (float/int casts and timestamp parsing for
+tens of thousands of rows) would otherwise run on the event loop and stall
+every other source while it does. run_pipeline hands those batches to the
+executor built here instead:
+
+- 'process' (the default when more than one CPU is available): a
+  ProcessPoolExecutor of TRANSFORM_WORKERS workers, so conversion runs on
+  the other cores. Workers come from the 'forkserver' start method, never
+  a plain fork: the pool is rebuilt inside the running loop after a failed
+  warm invocation, when the HTTP session's resolver threads and the
+  executor's own threads exist, and forking a process with threads can
+  deadlock the child on a lock one of them held.
+- 'thread': a ThreadPoolExecutor. Conversion still holds the GIL, but the
+  interpreter switches back to the event loop every few milliseconds, so
+  the loop keeps servicing sockets. This is the fallback when processes
+  can't be used: Lambda has no /dev/shm, so multiprocessing's semaphores
+  can't be created there.
+- 'inline': no executor; transforms run on the loop as before.
+
+Transforms run in a worker must be module-level functions of the batch
+alone, as their arguments and results are pickled, and live in transforms.py,
+the module the workers import.
+"""
+import logging
+import os
+from concurrent.futures import Executor
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TRANSFORM_EXECUTOR = os.getenv('TRANSFORM_EXECUTOR', 'process' if (os.cpu_count() or 1) > 1 else 'thread')
+TRANSFORM_WORKERS = int(os.getenv('TRANSFORM_WORKERS', str(os.cpu_count() or 1)))
+
+
+def create_process_executor() -> Executor:
+    # Imported on first use; multiprocessing is not needed at cold start
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # The fork server is a single-threaded process started once; it imports
+    # transforms up front, so the workers it forks unpickle transforms by
+    # reference without importing it each. Not lambda_function: its import
+    # configures logging, opens nasa_data.log and loads .env.
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(['transforms'])
+    executor = ProcessPoolExecutor(TRANSFORM_WORKERS, mp_context=context)
+    # Start the workers now rather than in the middle of the first pipeline
+    executor.submit(int).result()
+    return executor
+
+
+def create_executor(kind: str = TRANSFORM_EXECUTOR) -> Optional[Executor]:
+    """Builds the transform executor of the given kind; None means run transforms inline"""
+    if kind == 'inline':
+        return None
+    if kind == 'process':
+        try:
+            return create_process_executor()
+        except (OSError, ValueError, NotImplementedError) as e:
+            logger.warning(f"Process pool unavailable ({e}), converting batches in threads instead")
+    elif kind != 'thread':
+        raise ValueError(f"Unknown TRANSFORM_EXECUTOR: {kind!r}")
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(TRANSFORM_WORKERS, thread_name_prefix='transform')
@@ -0,0 +1,203 @@
+"""
+Monthly partition maintenance for the time-series tables.
+
+Migration 4 range-partitions geostorm_kp_index and environmental_scores by
+month, each with a DEFAULT partition for rows no monthly partition covers.
+maintain() runs at the start of every ingestion run and, per table:
+
+- creates the partitions for the current month and the PARTITION_MONTHS_AHEAD
+  months after it,
+- moves rows that landed in the default partition (backfills, or months
+  that were not created in time) into monthly partitions of their own,
+- detaches, or drops, partitions entirely older than the table's retention,
+  and does the same to default partition rows that old: they are deleted,
+  or moved into a standalone table named like the month's partition.
+
+New partitions are built as standalone tables and then attached, which
+only takes a SHARE UPDATE EXCLUSIVE lock on the parent, so frontend reads
+and concurrent writes are not blocked. ATTACH PARTITION would otherwise
+scan the whole default partition under an ACCESS EXCLUSIVE lock to check
+none of its rows belong to the new month, so the default partition is first
+given a CHECK constraint excluding the month, validated under a SHARE
+UPDATE EXCLUSIVE lock, and dropped again once the partition is attached.
+While the partition is being created, rows for its month can't be written
+to the default partition. When nothing is due a table costs one catalog
+query and one (usually empty) scan of its default partition.
+"""
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', '3'))
+
+# 'detach' keeps expired partitions as standalone tables to archive or drop by hand
+PARTITION_RETENTION_ACTION = os.getenv('PARTITION_RETENTION_ACTION', 'detach')
+
+# Partitioned table -> (partition key column, months kept including the current one; 0 keeps everything)
+PARTITIONED_TABLES = {
+    # The Predictor trains on the whole Kp history
+    'geostorm_kp_index': ('observed_time', int(os.getenv('KP_INDEX_RETENTION_MONTHS', '0'))),
+    'environmental_scores': ('timestamp', int(os.getenv('ENVIRONMENTAL_SCORES_RETENTION_MONTHS', '12'))),
+}
+
+
+def add_months(month: date, count: int) -> date:
+    """First day of the month ``count`` months after the one containing ``month``"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+async def monthly_partitions(connection, table: str) -> Optional[Dict[date, str]]:
+    """Attached monthly partitions of ``table`` by month; None if it isn't a partitioned table"""
+    row = await connection.fetchrow("""
+    SELECT p.relkind = 'p' AS partitioned, ARRAY(
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = p.oid
+    ) AS partitions
+    FROM pg_class p
+    WHERE p.oid = to_regclass($1)
+    """, table)
+    if row is None or not row['partitioned']:
+        return None
+    name_pattern = re.compile(rf'^{table}_(\d{{4}})_(\d{{2}})$')
+    partitions = {}
+    for name in row['partitions']:
+        match = name_pattern.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+async def move_default_rows(connection, table: str, column: str, month: date, name: str) -> int:
+    """
+    Moves the rows for ``month`` from the default partition into the table
+    ``name``, creating it if it doesn't exist. Returns the number moved.
+    """
+    upper = add_months(month, 1)
+    async with connection.transaction():
+        # The bounds check lets ATTACH PARTITION skip scanning the new table
+        await connection.execute(f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+            CONSTRAINT {name}_bounds CHECK ("{column}" >= '{month}' AND "{column}" < '{upper}')
+        )
+        """)
+        status = await connection.execute(f"""
+        WITH moved AS (
+            DELETE FROM {table}_default
+            WHERE "{column}" >= '{month}' AND "{column}" < '{upper}'
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """)
+    return int(status.split()[-1])
+
+
+async def create_partition(connection, table: str, column: str, month: date) -> int:
+    """
+    Creates and attaches the partition for ``month``, first moving any of its
+    rows out of the default partition. Returns the number of rows moved.
+
+    Each step is its own transaction. The row move and the constraint
+    validation scan the default partition without blocking reads or writes;
+    the constraint changes and the attach take ACCESS EXCLUSIVE locks but
+    scan nothing. A failed attempt leaves at most a standalone table holding
+    the moved rows, which the next run attaches.
+    """
+    name, upper = partition_name(table, month), add_months(month, 1)
+    excluded = f"{name}_excluded"
+    # NOT VALID skips the scan, but new rows for the month are refused from here on
+    await connection.execute(f"""
+    ALTER TABLE {table}_default DROP CONSTRAINT IF EXISTS {excluded};
+    ALTER TABLE {table}_default ADD CONSTRAINT {excluded}
+        CHECK (NOT ("{column}" >= '{month}' AND "{column}" < '{upper}')) NOT VALID
+    """)
+    try:
+        moved = await move_default_rows(connection, table, column, month, name)
+        await connection.execute(f"ALTER TABLE {table}_default VALIDATE CONSTRAINT {excluded}")
+        async with connection.transaction():
+            await connection.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{month}') TO ('{upper}')")
+            await connection.execute(f"ALTER TABLE {name} DROP CONSTRAINT IF EXISTS {name}_bounds")
+    finally:
+        await connection.execute(f"ALTER TABLE {table}_default DROP CONSTRAINT IF EXISTS {excluded}")
+    return moved
+
+
+async def expire_partition(connection, table: str, name: str):
+    if PARTITION_RETENTION_ACTION == 'drop':
+        await connection.execute(f"DROP TABLE {name}")
+    else:
+        await connection.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+
+
+async def expire_default_rows(connection, table: str, column: str, month: date) -> int:
+    """
+    Applies PARTITION_RETENTION_ACTION to the default partition rows for an
+    expired ``month``: deletes them, or moves them into a standalone table
+    named like the month's partition, as a detached partition would be.
+    Returns the number of rows expired.
+    """
+    if PARTITION_RETENTION_ACTION == 'drop':
+        status = await connection.execute(f"""
+        DELETE FROM {table}_default
+        WHERE "{column}" >= '{month}' AND "{column}" < '{add_months(month, 1)}'
+        """)
+        return int(status.split()[-1])
+    return await move_default_rows(connection, table, column, month, partition_name(table, month))
+
+
+async def maintain_table(connection, table: str, column: str, retention_months: int, today: date):
+    partitions = await monthly_partitions(connection, table)
+    if partitions is None:
+        # environmental_scores only exists once the Predictor has run
+        return
+
+    current = add_months(today, 0)
+    oldest_kept = add_months(current, 1 - retention_months) if retention_months else date.min
+
+    stray_months = await connection.fetch(f"""
+    SELECT DISTINCT date_trunc('month', "{column}")::date AS month
+    FROM {table}_default
+    WHERE "{column}" IS NOT NULL
+    """)
+    wanted: List[date] = [add_months(current, offset) for offset in range(PARTITION_MONTHS_AHEAD + 1)]
+    wanted.extend(row['month'] for row in stray_months if row['month'] >= oldest_kept)
+
+    for month in sorted(set(wanted) - set(partitions)):
+        moved = await create_partition(connection, table, column, month)
+        logger.info(f"Created partition {partition_name(table, month)} ({moved} rows moved from the default partition)")
+
+    # Rows already past retention (a backfill, or a month whose partition
+    # was never created) would otherwise stay in the default partition for good
+    for month in sorted(row['month'] for row in stray_months if row['month'] < oldest_kept):
+        expired = await expire_default_rows(connection, table, column, month)
+        logger.info(f"Expired {expired} {month:%Y-%m} rows from {table}_default ({PARTITION_RETENTION_ACTION})")
+
+    for month, name in sorted(partitions.items()):
+        if month < oldest_kept:
+            await expire_partition(connection, table, name)
+            logger.info(f"Expired partition {name} ({PARTITION_RETENTION_ACTION})")
+
+
+async def maintain(pool, today: date = None):
+    """
+    Brings the partitions of every PARTITIONED_TABLES entry up to date.
+    Failures are logged rather than raised: rows still land in the default
+    partition, and the next run tries again.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    async with pool.acquire() as connection:
+        for table, (column, retention_months) in PARTITIONED_TABLES.items():
+            try:
+                await maintain_table(connection, table, column, retention_months, today)
+            except asyncpg.exceptions.PostgresError as e:
+                logger.warning(f"Partition maintenance failed for {table}: {e}")
@@ -0,0 +1,90 @@
+"""
+Timestamp normalisation for the ingestion processors.
+
+NASA DONKI and Space-Track emit a handful of fixed ISO 8601 shapes
+('2024-05-10T17:36Z', '2024-05-10T17:36:00.000Z', '2024-05-10T17:36:00.123456').
+Those are parsed with datetime.fromisoformat, and the shape that worked is
+remembered per field so the next value of the same field is tried against it
+first. Anything else falls back to dateutil.
+
+All datetimes are returned as naive UTC, the convention of the TIMESTAMP
+columns they are written to. Inputs without an offset are taken as UTC.
+"""
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, Optional
+
+
+def _parse_zulu(value: str) -> datetime:
+    if value[-1] != 'Z':
+        raise ValueError(f"not a Zulu timestamp: {value!r}")
+    return datetime.fromisoformat(value[:-1])
+
+
+def _parse_naive(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        raise ValueError(f"unexpected UTC offset: {value!r}")
+    return parsed
+
+
+def _parse_offset(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        raise ValueError(f"missing UTC offset: {value!r}")
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _parse_any(value: str) -> datetime:
+    # Imported on first use; the fixed formats above cover normal payloads
+    from dateutil import parser
+
+    parsed = parser.parse(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+# Fast formats in the order they are tried for a field seen for the first time
+_FAST_FORMATS = (_parse_zulu, _parse_naive, _parse_offset)
+
+# Last fast format that parsed each field
+_field_formats: Dict[str, Callable[[str], datetime]] = {}
+
+
+def parse_utc(value: Optional[str], field: str = None) -> Optional[datetime]:
+    """
+    Parses a timestamp string into a naive UTC datetime.
+
+    ``field`` names the source attribute (e.g. 'donki.startTime') so its
+    detected format can be reused. Empty values return None; unparseable
+    values raise ValueError.
+    """
+    if not value:
+        return None
+
+    cached = _field_formats.get(field)
+    if cached is not None:
+        try:
+            return cached(value)
+        except ValueError:
+            pass
+
+    for fast_format in _FAST_FORMATS:
+        if fast_format is cached:
+            continue
+        try:
+            parsed = fast_format(value)
+        except ValueError:
+            continue
+        if field is not None:
+            _field_formats[field] = fast_format
+        return parsed
+
+    return _parse_any(value)
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    """Parses a 'YYYY-MM-DD' date. Empty values return None"""
+    if not value:
+        return None
+    return date.fromisoformat(value)
@@ -0,0 +1,267 @@
+"""
+Row conversions for the ingestion pipelines: raw API records in, rows ready
+for the bulk writers out, each with its content hash last.
+
+run_pipeline may run these in worker processes (see offload.py), whose fork
+server imports this module up front. It must therefore stay free of side
+effects at import: no logging configuration, no .env loading, no clients.
+lambda_function re-exports the converters and column lists.
+"""
+import hashlib
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from timestamps import parse_date, parse_utc
+
+logger = logging.getLogger(__name__)
+
+def content_hash(row) -> bytes:
+    """
+    Compact digest of a converted row's values. Upserted tables store it in
+    their content_hash column and only rewrite a row when it differs, so a
+    re-ingested but unchanged object costs no dead tuple, trigger call or WAL.
+    """
+    return hashlib.blake2b(repr(tuple(row)).encode(), digest_size=16).digest()
+
+def with_content_hash(row: tuple) -> tuple:
+    """``row`` with its content_hash appended as the last value"""
+    return row + (content_hash(row),)
+
+class ConvertedBatch(list):
+    """
+    Rows converted from one fetched batch, plus the keys of the items that
+    failed conversion. Lets a transform running in a worker process report
+    rejects without touching shared state.
+    """
+    def __init__(self, rows=(), rejected: Optional[List[Any]] = None):
+        super().__init__(rows)
+        self.rejected = rejected if rejected is not None else []
+
+# The TAP columns requested in CSV mode, in the order of EXOPLANET_COLUMNS
+EXOPLANET_CSV_FIELDS = [
+    'pl_name', 'hostname', 'discoverymethod', 'pl_orbper',
+    'pl_rade', 'pl_bmassj', 'pl_orbsmax', 'disc_year',
+    'pl_orbeccen', 'pl_insol', 'pl_eqt', 'pl_density',
+    'st_teff', 'st_rad', 'st_mass', 'st_met',
+    'pl_facilityname', 'pl_telescope', 'pl_instrument',
+    'rastr', 'decstr', 'pl_controv_flag', 'pl_refname'
+]
+EXOPLANET_COLUMNS = [
+    'planet_name', 'host_star', 'discovery_method', 'orbital_period',
+    'planet_radius', 'mass', 'semi_major_axis', 'discovery_year',
+    'orbital_eccentricity', 'insolation_flux', 'equilibrium_temp', 'density',
+    'star_temp', 'star_radius', 'star_mass', 'star_metallicity',
+    'facility', 'telescope', 'instrument', 'ra_str', 'dec_str',
+    'controversial', 'reference', 'content_hash'
+]
+
+def _numeric_column(values: Tuple[str, ...], cast: Callable[[str], Any]) -> List[Any]:
+    """Casts a CSV column in one pass, with empty or malformed values as None"""
+    try:
+        return [cast(value) if value else None for value in values]
+    except ValueError:
+        column = []
+        for value in values:
+            try:
+                column.append(cast(value) if value else None)
+            except ValueError:
+                column.append(None)
+        return column
+
+def _text_column(values: Tuple[str, ...]) -> List[str]:
+    return [value.strip() for value in values]
+
+def _flag_column(values: Tuple[str, ...]) -> List[bool]:
+    return [value.strip() not in ('', '0', 'false', 'False') for value in values]
+
+# Converter per EXOPLANET_CSV_FIELDS column
+EXOPLANET_CSV_CONVERTERS = (
+    [_text_column] * 3
+    + [lambda values: _numeric_column(values, float)] * 4
+    + [lambda values: _numeric_column(values, int)]
+    + [lambda values: _numeric_column(values, float)] * 8
+    + [_text_column] * 5
+    + [_flag_column, _text_column]
+)
+
+def convert_exoplanet_rows(rows: List[List[str]]) -> ConvertedBatch:
+    """
+    Converts a batch of CSV rows into exoplanets rows column by column:
+    each column is transposed out of the batch and cast in one pass, and
+    the rows are zipped back together only to be hashed and copied. The
+    values, and so the content hashes, match those of sanitize_data. Rows
+    with the wrong number of columns or no planet name are returned in
+    ``rejected``.
+    """
+    rejected = [row for row in rows if len(row) != len(EXOPLANET_CSV_FIELDS)]
+    if rejected:
+        logger.warning(f"Rejected {len(rejected)} exoplanet CSV rows without {len(EXOPLANET_CSV_FIELDS)} columns")
+        rows = [row for row in rows if len(row) == len(EXOPLANET_CSV_FIELDS)]
+    if not rows:
+        return ConvertedBatch(rejected=rejected)
+    columns = [convert(values) for convert, values in zip(EXOPLANET_CSV_CONVERTERS, zip(*rows))]
+    # Keyed by planet_name: the merge can't update the same row twice
+    converted = {}
+    for raw_row, row in zip(rows, zip(*columns)):
+        if row[0]:
+            converted[row[0]] = with_content_hash(row)
+        else:
+            rejected.append(raw_row)
+    return ConvertedBatch(converted.values(), rejected)
+
+SAT_CAT_COLUMNS = [
+    'INTLDES', 'NORAD_CAT_ID', 'OBJECT_TYPE', 'SATNAME', 'COUNTRY',
+    'LAUNCH_DATE', 'SITE', 'DECAY_DATE', 'PERIOD', 'INCLINATION',
+    'APOGEE', 'PERIGEE', 'RCS_VALUE', 'RCS_SIZE', 'LAUNCH_YEAR',
+    'LAUNCH_NUM', 'LAUNCH_PIECE', 'CURRENT', 'OBJECT_NAME', 'OBJECT_ID',
+    'OBJECT_NUMBER', 'CONTENT_HASH'
+]
+
+# The sat_cat column limits, checked before the bulk merge so that a row
+# breaking one is quarantined instead of failing its whole batch
+SAT_CAT_TEXT_LENGTHS = {
+    'INTLDES': 12, 'OBJECT_TYPE': 12, 'SATNAME': 25, 'COUNTRY': 6, 'SITE': 5,
+    'RCS_SIZE': 6, 'LAUNCH_PIECE': 3, 'OBJECT_NAME': 25, 'OBJECT_ID': 12,
+}
+SAT_CAT_INTEGER_RANGES = {
+    'NORAD_CAT_ID': (0, 2 ** 31 - 1), 'APOGEE': (0, 2 ** 63 - 1), 'PERIGEE': (0, 2 ** 63 - 1),
+    'RCS_VALUE': (-2 ** 31, 2 ** 31 - 1), 'LAUNCH_YEAR': (0, 2 ** 15 - 1), 'LAUNCH_NUM': (0, 2 ** 15 - 1),
+    'OBJECT_NUMBER': (0, 2 ** 31 - 1),
+}
+# decimal(12,2)
+SAT_CAT_DECIMAL_LIMIT = 10 ** 10
+
+def convert_satcat_item(sat: Dict[str, Any]) -> list:
+    """
+    Converts a raw SATCAT record into a row ordered like SAT_CAT_COLUMNS.
+    Raises ValueError or TypeError, with the reason, for a record that
+    can't be converted or would break a sat_cat constraint.
+    """
+    if not sat.get('NORAD_CAT_ID'):
+        raise ValueError("NORAD_CAT_ID is missing")
+    row = [
+        sat.get('INTLDES') or '',
+        int(sat['NORAD_CAT_ID']),
+        sat.get('OBJECT_TYPE'),
+        sat.get('SATNAME') or '',
+        sat.get('COUNTRY') or '',
+        parse_date(sat.get('LAUNCH')),
+        sat.get('SITE'),
+        parse_date(sat.get('DECAY')),
+        float(sat.get('PERIOD')) if sat.get('PERIOD') else None,
+        float(sat.get('INCLINATION')) if sat.get('INCLINATION') else None,
+        int(sat.get('APOGEE')) if sat.get('APOGEE') else None,
+        int(sat.get('PERIGEE')) if sat.get('PERIGEE') else None,
+        int(sat.get('RCSVALUE') or 0),
+        sat.get('RCS_SIZE'),
+        int(sat.get('LAUNCH_YEAR') or 0),
+        int(sat.get('LAUNCH_NUM') or 0),
+        sat.get('LAUNCH_PIECE') or '',
+        'Y' if sat.get('CURRENT') == 'Y' else 'N',
+        sat.get('OBJECT_NAME') or '',
+        sat.get('OBJECT_ID') or '',
+        int(sat.get('OBJECT_NUMBER')) if sat.get('OBJECT_NUMBER') else None
+    ]
+    values = dict(zip(SAT_CAT_COLUMNS, row))
+    for column, length in SAT_CAT_TEXT_LENGTHS.items():
+        if values[column] is not None and len(values[column]) > length:
+            raise ValueError(f"{column} is longer than {length} characters: {values[column]!r}")
+    for column, (low, high) in SAT_CAT_INTEGER_RANGES.items():
+        if values[column] is not None and not low <= values[column] <= high:
+            raise ValueError(f"{column} is out of range: {values[column]}")
+    for column in ('PERIOD', 'INCLINATION'):
+        if values[column] is not None and abs(values[column]) >= SAT_CAT_DECIMAL_LIMIT:
+            raise ValueError(f"{column} is out of range: {values[column]}")
+    row.append(content_hash(row))
+    return row
+
+def convert_satcat_batch(raw_batch: List[Dict[str, Any]]) -> ConvertedBatch:
+    """
+    Converts one batch of SATCAT records into sat_cat rows, possibly in a
+    worker (see offload.py). Records that fail are returned in ``rejected``
+    as (NORAD_CAT_ID, reason, raw record).
+    """
+    # Keyed by NORAD_CAT_ID: the merge can't update the same row twice
+    rows = {}
+    rejected = []
+    for sat in raw_batch:
+        try:
+            row = convert_satcat_item(sat)
+        except (ValueError, TypeError) as e:
+            logger.error(f"Data conversion error for satellite {sat.get('NORAD_CAT_ID', 'unknown')}: {e}")
+            rejected.append((sat.get('NORAD_CAT_ID'), str(e), sat))
+            continue
+        rows[row[1]] = row
+    return ConvertedBatch(rows.values(), rejected)
+
+GP_COLUMNS = [
+    'NORAD_CAT_ID', 'OBJECT_NAME', 'OBJECT_ID', 'MEAN_ELEMENT_THEORY', 'CREATION_DATE',
+    'EPOCH', 'MEAN_MOTION', 'ECCENTRICITY', 'INCLINATION', 'RA_OF_ASC_NODE',
+    'ARG_OF_PERICENTER', 'MEAN_ANOMALY', 'BSTAR', 'MEAN_MOTION_DOT', 'MEAN_MOTION_DDOT',
+    'SEMIMAJOR_AXIS', 'PERIOD', 'APOAPSIS', 'PERIAPSIS', 'REV_AT_EPOCH',
+    'OBJECT_TYPE', 'COUNTRY_CODE', 'RCS_SIZE', 'LAUNCH_DATE', 'DECAY_DATE',
+    'GP_ID', 'TLE_LINE0', 'TLE_LINE1', 'TLE_LINE2', 'CONTENT_HASH'
+]
+
+def convert_gp_item(item: Dict[str, Any]) -> tuple:
+    """Converts a raw GP record into a row tuple ordered like GP_COLUMNS, content hash last."""
+    creation_date = parse_utc(item.get('CREATION_DATE'), 'gp.CREATION_DATE')
+    epoch = parse_utc(item.get('EPOCH'), 'gp.EPOCH')
+    launch_date = parse_date(item.get('LAUNCH_DATE'))
+    decay_date = parse_date(item.get('DECAY_DATE'))
+
+    return with_content_hash((
+        str(item.get('NORAD_CAT_ID', 0)),  # Cast to string
+        item.get('OBJECT_NAME'),
+        item.get('OBJECT_ID'),
+        item.get('MEAN_ELEMENT_THEORY'),
+        creation_date,
+        epoch,
+        float(item.get('MEAN_MOTION', 0)),
+        float(item.get('ECCENTRICITY', 0)),
+        float(item.get('INCLINATION', 0)),
+        float(item.get('RA_OF_ASC_NODE', 0)),
+        float(item.get('ARG_OF_PERICENTER', 0)),
+        float(item.get('MEAN_ANOMALY', 0)),
+        float(item.get('BSTAR', 0)),
+        float(item.get('MEAN_MOTION_DOT', 0)),
+        float(item.get('MEAN_MOTION_DDOT', 0)),
+        float(item.get('SEMIMAJOR_AXIS', 0)),
+        float(item.get('PERIOD', 0)),
+        float(item.get('APOAPSIS', 0)),
+        float(item.get('PERIAPSIS', 0)),
+        int(item.get('REV_AT_EPOCH', 0)),
+        item.get('OBJECT_TYPE'),
+        item.get('COUNTRY_CODE'),
+        item.get('RCS_SIZE'),
+        launch_date,
+        decay_date,
+        int(item.get('GP_ID', 0)),
+        item.get('TLE_LINE0'),
+        item.get('TLE_LINE1'),
+        item.get('TLE_LINE2'),
+    ))
+
+def convert_gp_batch(raw_batch: List[Dict[str, Any]]) -> ConvertedBatch:
+    """
+    Converts one batch of GP records into rows for upsert_gp_records, possibly
+    in a worker (see offload.py). Items that fail conversion are returned in
+    ``rejected`` as (NORAD_CAT_ID, GP_ID) pairs, GP_ID being None when it
+    can't be read either.
+    """
+    # Keyed by NORAD_CAT_ID so a repeated object keeps its last record, as sequential upserts would
+    records = {}
+    rejected = []
+    for item in raw_batch:
+        try:
+            record = convert_gp_item(item)
+        except (ValueError, TypeError) as e:
+            logger.error(f"Data conversion error for GP item {item.get('NORAD_CAT_ID', 'unknown')}: {e}")
+            try:
+                gp_id = int(item['GP_ID'])
+            except (KeyError, ValueError, TypeError):
+                gp_id = None
+            rejected.append((item.get('NORAD_CAT_ID', 'unknown'), gp_id))
+            continue
+        records[record[0]] = record
+    return ConvertedBatch(records.values(), rejected)
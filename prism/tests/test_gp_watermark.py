@@ -0,0 +1,126 @@
+"""
+GP watermark tests for lambda_function.process_gp_data.
+
+A fake connection fails the bulk upsert so every batch goes through the
+per-row fallback, where chosen GP_IDs fail to write; other items fail
+conversion. The stored watermark must stay below the first element set that
+wasn't written, so the next incremental run fetches it again.
+"""
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import asyncpg
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+# Keep the import from writing nasa_data.log next to the tests
+os.environ.setdefault('LOG_FILE', '')
+
+import lambda_function  # noqa: E402
+
+
+class FakeConnection:
+    def __init__(self, failing_gp_ids=()):
+        self.failing_gp_ids = set(failing_gp_ids)
+        self.written_gp_ids = []
+        self.watermarks = []
+        # Whether each stored watermark replaced the previous one outright
+        self.forced = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def fetchrow(self, query, *args):
+        return None
+
+    async def copy_records_to_table(self, table, records, columns):
+        raise asyncpg.exceptions.DataError('bulk upsert failed')
+
+    async def execute(self, query, *args):
+        if 'ingestion_state' in query:
+            self.watermarks.append(args[1:])
+            self.forced.append('GREATEST' not in query)
+        elif query == lambda_function.INSERT_GP_QUERY:
+            gp_id = args[25]
+            if gp_id in self.failing_gp_ids:
+                raise asyncpg.exceptions.DataError(f'cannot write GP_ID {gp_id}')
+            self.written_gp_ids.append(gp_id)
+            return 'INSERT 0 1'
+        return 'OK'
+
+
+class FakePool:
+    def __init__(self, connection):
+        self.connection = connection
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+
+class FakeGPAPI:
+    def __init__(self, batches):
+        self.batches = batches
+
+    async def stream_gp_data(self, session, **watermark):
+        for batch in self.batches:
+            yield batch
+
+
+def gp_item(gp_id, **values):
+    item = {
+        'NORAD_CAT_ID': 10000 + gp_id,
+        'GP_ID': gp_id,
+        'CREATION_DATE': f'2024-01-01T00:00:{gp_id % 60:02d}',
+        'EPOCH': '2024-01-01T00:00:00',
+    }
+    item.update(values)
+    return item
+
+
+def run_gp(batches, failing_gp_ids=(), full_resync=False):
+    connection = FakeConnection(failing_gp_ids)
+    written = asyncio.run(lambda_function.process_gp_data(
+        FakePool(connection), FakeGPAPI(batches), None, full_resync=full_resync
+    ))
+    return connection, written
+
+
+def test_watermark_advances_over_fully_written_stream():
+    connection, written = run_gp([[gp_item(1), gp_item(2)], [gp_item(3)]])
+    assert written == 3
+    assert connection.watermarks == [(lambda_function.parse_utc('2024-01-01T00:00:03'), 3)]
+
+
+def test_watermark_held_below_row_dropped_by_per_row_fallback():
+    connection, written = run_gp([[gp_item(1), gp_item(2), gp_item(3)], [gp_item(4), gp_item(5)]],
+                                 failing_gp_ids={4})
+    assert written == 4
+    assert connection.written_gp_ids == [1, 2, 3, 5]
+    # GP_ID 4 comes back on the next run; the timestamp of GP_ID 5 isn't kept
+    assert connection.watermarks == [(None, 3)]
+    assert connection.forced == [False]
+
+
+def test_full_resync_replaces_watermark_held_below_failed_row():
+    # The stored watermark may already be past GP_ID 4, so it has to be able to move back
+    connection, written = run_gp([[gp_item(1), gp_item(2)], [gp_item(4), gp_item(5)]],
+                                 failing_gp_ids={4}, full_resync=True)
+    assert written == 3
+    assert connection.watermarks == [(None, 3)]
+    assert connection.forced == [True]
+
+
+def test_watermark_held_below_item_rejected_in_an_earlier_batch():
+    connection, written = run_gp([[gp_item(1), gp_item(2, MEAN_MOTION='not a number')], [gp_item(3), gp_item(4)]])
+    assert written == 3
+    assert connection.watermarks == [(None, 1)]
+
+
+def test_rejected_item_without_gp_id_does_not_hold_watermark():
+    connection, written = run_gp([[gp_item(1), gp_item(2, GP_ID='?')], [gp_item(3)]])
+    assert written == 2
+    assert connection.watermarks == [(lambda_function.parse_utc('2024-01-01T00:00:03'), 3)]
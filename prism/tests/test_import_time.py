@@ -0,0 +1,51 @@
+"""
+Cold-start import regression test for the ingestion Lambda.
+
+Imports lambda_function in a fresh interpreter under ``-X importtime`` with
+the Lambda environment marker set, then checks that modules only some code
+paths need stay unloaded and that the cumulative import time of
+lambda_function stays within IMPORT_TIME_BUDGET_MS (best of a few runs, to
+ride out scheduler noise).
+"""
+import os
+import re
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+IMPORT_TIME_BUDGET_MS = float(os.getenv('IMPORT_TIME_BUDGET_MS', '600'))
+ATTEMPTS = 3
+
+# Loaded on first use only: CLI parsing, local .env support, the dateutil
+# fallback parser and the AWS SDK shipped in the layer
+LAZY_MODULES = {'argparse', 'dotenv', 'dateutil', 'pytz', 'botocore', 'aiobotocore', 'boto3'}
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def import_profile():
+    """Returns {top-level module: cumulative microseconds} for one cold import"""
+    env = dict(os.environ, AWS_LAMBDA_FUNCTION_NAME='import-time-test', PYTHONDONTWRITEBYTECODE='1')
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import lambda_function'],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    profile = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            profile[match.group(4)] = int(match.group(2))
+    return profile
+
+
+def test_lazy_modules_are_not_imported_at_cold_start():
+    loaded = {name.split('.')[0] for name in import_profile()}
+    assert not loaded & LAZY_MODULES, f"imported at cold start: {sorted(loaded & LAZY_MODULES)}"
+
+
+def test_cold_start_import_time_within_budget():
+    best_ms = min(import_profile()['lambda_function'] for _ in range(ATTEMPTS)) / 1000
+    assert best_ms <= IMPORT_TIME_BUDGET_MS, (
+        f"importing lambda_function took {best_ms:.0f} ms, budget is {IMPORT_TIME_BUDGET_MS:.0f} ms"
+    )
@@ -0,0 +1,124 @@
+"""
+Response cache tests: bodies recorded through a ResponseCache are spooled
+to disk once they outgrow SPOOL_MAX_MEMORY and come back intact, hits are
+streamed from the store in bounded chunks, and a DiskStore trims itself
+from its size index without walking the directory again after the first
+write.
+"""
+import asyncio
+import os
+import sys
+import zlib
+from contextlib import asynccontextmanager
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+import cache  # noqa: E402
+
+
+class FakeContent:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self.body), size):
+            yield self.body[start:start + size]
+
+
+class FakeResponse:
+    status = 200
+
+    def __init__(self, body: bytes):
+        self.headers = {'Content-Type': 'application/json', 'ETag': '"v1"'}
+        self.content = FakeContent(body)
+
+
+def fetch_chunks(response_cache, body: bytes, size: int = 4096) -> list:
+    @asynccontextmanager
+    async def send(headers):
+        yield FakeResponse(body)
+
+    async def run():
+        async with response_cache.fetch('gp', 'https://example.test/gp', None, send) as response:
+            return [chunk async for chunk in response.content.iter_chunked(size)]
+
+    return asyncio.run(run())
+
+
+def fetch_body(response_cache, body: bytes) -> bytes:
+    return b''.join(fetch_chunks(response_cache, body))
+
+
+def test_recorded_body_spills_to_a_file_and_round_trips(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'SPOOL_MAX_MEMORY', 1024)
+    # Random bytes don't compress, so the spool has to roll over to a file
+    body = os.urandom(256 * 1024)
+    response_cache = cache.ResponseCache(cache.DiskStore(str(tmp_path)))
+    recordings = []
+    original_init = cache.RecordingResponse.__init__
+
+    def tracking_init(self, response):
+        original_init(self, response)
+        recordings.append(self)
+
+    monkeypatch.setattr(cache.RecordingResponse, '__init__', tracking_init)
+
+    assert fetch_body(response_cache, body) == body
+    (recording,) = recordings
+    assert recording._spool._rolled and recording._spool.closed
+
+    # Served from the store on the next fetch, without calling upstream
+    assert fetch_body(response_cache, b'not this') == body
+    stored = asyncio.run(response_cache.store.get(cache.cache_key('gp', 'https://example.test/gp') + '.gz'))
+    assert zlib.decompress(stored, cache.GZIP_WBITS) == body
+
+
+def test_cache_hits_stream_from_the_store_in_bounded_chunks(tmp_path, monkeypatch):
+    # Compresses very well, so one compressed chunk inflates to many
+    body = b'{"OBJECT_NAME": "ISS (ZARYA)"}, ' * 20000
+    response_cache = cache.ResponseCache(cache.DiskStore(str(tmp_path)))
+    fetch_body(response_cache, body)
+
+    whole_reads = []
+    original_get = response_cache.store.get
+    monkeypatch.setattr(response_cache.store, 'get', lambda name: whole_reads.append(name) or original_get(name))
+
+    chunks = fetch_chunks(response_cache, b'not this', size=1024)
+    assert b''.join(chunks) == body
+    assert max(len(chunk) for chunk in chunks) <= 1024
+    assert not [name for name in whole_reads if name.endswith('.gz')]
+
+
+def test_truncated_stored_body_is_a_miss(tmp_path):
+    response_cache = cache.ResponseCache(cache.DiskStore(str(tmp_path)))
+    fetch_body(response_cache, b'[1, 2, 3]')
+    path = tmp_path / (cache.cache_key('gp', 'https://example.test/gp') + '.gz')
+    path.write_bytes(path.read_bytes()[:-4])
+
+    assert fetch_body(response_cache, b'[4, 5]') == b'[4, 5]'
+
+
+def test_disk_store_trims_oldest_files_from_its_index(tmp_path, monkeypatch):
+    store = cache.DiskStore(str(tmp_path), max_bytes=2500)
+    scans = []
+    original_scan = store._scan
+    monkeypatch.setattr(store, '_scan', lambda: scans.append(1) or original_scan())
+
+    async def run():
+        for index in range(5):
+            await store.put(f"source/{index}.gz", bytes(1000))
+        # Rewriting an object makes it the newest
+        await store.put('source/2.gz', bytes(1000))
+        await store.put('source/5.gz', bytes(1000))
+
+    asyncio.run(run())
+    assert scans == [1]
+    assert sorted(os.listdir(tmp_path / 'source')) == ['2.gz', '5.gz']
+
+
+def test_disk_store_index_starts_from_files_left_by_earlier_runs(tmp_path):
+    asyncio.run(cache.DiskStore(str(tmp_path), max_bytes=None).put('source/old.gz', bytes(2000)))
+    store = cache.DiskStore(str(tmp_path), max_bytes=2500)
+    asyncio.run(store.put('source/new.gz', bytes(1000)))
+    assert os.listdir(tmp_path / 'source') == ['new.gz']
@@ -0,0 +1,160 @@
+"""
+Unit tests for the streaming body parsers in lambda_function.
+
+Each body is fed to iter_json_array / iter_csv_rows in chunks of several
+sizes, down to one byte, so element and record boundaries, string escapes,
+quoted newlines and multi-byte characters all land on chunk edges at least
+once.
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+# Keep the import from writing nasa_data.log next to the tests
+os.environ.setdefault('LOG_FILE', '')
+
+import lambda_function  # noqa: E402
+
+CHUNK_SIZES = (1, 2, 3, 7, 64, 1 << 16)
+
+
+class FakeContent:
+    def __init__(self, body: bytes, chunk_size: int):
+        self.body = body
+        self.chunk_size = chunk_size
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self.body), self.chunk_size):
+            yield self.body[start:start + self.chunk_size]
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, chunk_size: int):
+        self.content = FakeContent(body, chunk_size)
+
+
+def collect(batches):
+    async def run():
+        return [batch async for batch in batches]
+    return asyncio.run(run())
+
+
+def json_batches(body: bytes, chunk_size: int, batch_size: int = lambda_function.STREAM_BATCH_SIZE):
+    return collect(lambda_function.iter_json_array(FakeResponse(body, chunk_size), batch_size))
+
+
+def csv_batches(body: bytes, chunk_size: int, expected_header=None, batch_size: int = lambda_function.STREAM_BATCH_SIZE):
+    return collect(lambda_function.iter_csv_rows(FakeResponse(body, chunk_size), expected_header, batch_size))
+
+
+JSON_ELEMENTS = [
+    {'name': 'comma, ] and } in a string', 'escaped': 'quote \" backslash \\ and tab \t'},
+    {'unicode': 'café ☄ \U0001f680', 'nested': [1, [2, {'x': None}]]},
+    12345,
+    -0.5e-3,
+    'plain',
+    True,
+    None,
+]
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_json_array_across_chunk_boundaries(chunk_size):
+    # ensure_ascii=False puts raw multi-byte UTF-8 sequences on chunk edges too
+    for ensure_ascii in (True, False):
+        body = json.dumps(JSON_ELEMENTS, ensure_ascii=ensure_ascii).encode()
+        batches = json_batches(body, chunk_size)
+        assert [element for batch in batches for element in batch] == JSON_ELEMENTS
+
+
+def test_json_array_batch_size():
+    batches = json_batches(json.dumps(list(range(10))).encode(), 3, batch_size=4)
+    assert batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+@pytest.mark.parametrize('body', [b'[]', b'  [\n]  ', b'[ ]trailing ignored'])
+def test_json_empty_array(body):
+    for chunk_size in CHUNK_SIZES:
+        assert json_batches(body, chunk_size) == []
+
+
+@pytest.mark.parametrize('body', [b'', b'{"a": 1}', b'[1, 2', b'[1x, 2]', b'[{"a": "unterminated'])
+def test_json_rejects_truncated_or_non_array_bodies(body):
+    with pytest.raises(ValueError):
+        json_batches(body, 3)
+
+
+CSV_HEADER = ['name', 'note', 'value']
+CSV_BODY = (
+    'name,note,value\r\n'
+    'a,plain,1\n'
+    'b,"comma, inside",2\n'
+    '"c","line one\nline two",3\n'
+    'd,"escaped ""quote"", and é",4\n'
+    '\n'
+    'e,,5'
+)
+CSV_ROWS = [
+    ['a', 'plain', '1'],
+    ['b', 'comma, inside', '2'],
+    ['c', 'line one\nline two', '3'],
+    ['d', 'escaped "quote", and é', '4'],
+    ['e', '', '5'],
+]
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('batch_size', [1, 2, 100])
+def test_csv_rows_across_chunk_boundaries(chunk_size, batch_size):
+    batches = csv_batches(CSV_BODY.encode(), chunk_size, CSV_HEADER, batch_size)
+    assert [row for batch in batches for row in batch] == CSV_ROWS
+    assert all(len(batch) <= batch_size for batch in batches[:-1])
+
+
+def test_csv_header_only():
+    assert csv_batches(b'name,note,value\n', 4, CSV_HEADER) == []
+
+
+def test_csv_rejects_unexpected_header():
+    with pytest.raises(ValueError, match='header'):
+        csv_batches(b'name,other\na,b\n', 4, CSV_HEADER)
+
+
+def test_csv_rejects_unterminated_quote():
+    with pytest.raises(ValueError, match='quoted field'):
+        csv_batches(b'name,note,value\na,"never closed,1\n', 4, CSV_HEADER)
+
+
+def test_csv_rows_with_wrong_column_count_are_passed_through():
+    body = b'name,note,value\na,b\nc,d,e,f\ng,h,i\n'
+    batches = csv_batches(body, 5, CSV_HEADER)
+    assert batches == [[['a', 'b'], ['c', 'd', 'e', 'f'], ['g', 'h', 'i']]]
+
+
+def exoplanet_row(name: str, **values) -> list:
+    row = dict.fromkeys(lambda_function.EXOPLANET_CSV_FIELDS, '')
+    row[lambda_function.EXOPLANET_CSV_FIELDS[0]] = name
+    row.update(values)
+    return list(row.values())
+
+
+def test_exoplanet_rows_with_wrong_column_count_are_rejected():
+    short_row = ['Short b', '1.0']
+    long_row = exoplanet_row('Long b') + ['extra']
+    nameless_row = exoplanet_row('')
+    batch = lambda_function.convert_exoplanet_rows(
+        [exoplanet_row('Kepler-22 b'), short_row, long_row, nameless_row, exoplanet_row('TOI-700 d')]
+    )
+    assert [row[0] for row in batch] == ['Kepler-22 b', 'TOI-700 d']
+    assert batch.rejected == [short_row, long_row, nameless_row]
+
+
+def test_exoplanet_batch_of_only_malformed_rows():
+    batch = lambda_function.convert_exoplanet_rows([['x'], ['y', 'z']])
+    assert list(batch) == []
+    assert batch.rejected == [['x'], ['y', 'z']]